@@ -0,0 +1,139 @@
+"""
+Import-time benchmark for graph_app.
+
+Imports the module in fresh interpreters with `-X importtime` and fails
+(exit code 1) when:
+- the median import time exceeds the budget, or
+- a heavy integration is imported at module load, or
+- a lazy singleton (checkpointer, stores, models, compiled graph) was built
+
+Usage:
+    python bench_import.py [--runs 5] [--budget-ms 1500] [--module graph_app]
+"""
+import argparse
+import json
+import os
+import re
+import statistics
+import subprocess
+import sys
+import time
+from typing import Dict, List, Tuple
+
+# =================================================
+# CONSTANTS
+# =================================================
+IMPORT_BUDGET_MS = float(os.getenv("IMPORT_BUDGET_MS", 1500))
+
+# Must only be imported on first use
+HEAVY_MODULES = [
+    "langchain_groq",
+    "groq",
+    "bs4",
+    "ddgs",
+    "dns.resolver",
+    "googleapiclient",
+    "google_auth_oauthlib",
+    "aiosqlite",
+    "redis",
+]
+
+# Must still be unbuilt right after import
+LAZY_SINGLETONS = [
+    "model_router",
+    "extraction_model",
+    "summary_model",
+    "cold_email_model",
+    "followup_email_model",
+    "model_with_tools",
+    "checkpointer",
+    "campaign_registry",
+    "blob_store",
+    "app",
+    "retention_service",
+    "calendar_client",
+]
+
+PROBE = """
+import sys, time, json
+start = time.perf_counter()
+import {module} as m
+elapsed = time.perf_counter() - start
+print("@@" + json.dumps({{
+    "seconds": elapsed,
+    "heavy": [h for h in {heavy!r} if h in sys.modules],
+    "built": [n for n in {lazy!r} if getattr(getattr(m, n, None), "_loaded", False)],
+}}))
+"""
+
+IMPORTTIME_LINE = re.compile(r"import time:\s+(\d+)\s+\|\s+(\d+)\s+\|\s+(.*)")
+
+
+# =================================================
+# MEASUREMENT
+# =================================================
+def run_once(module: str) -> Tuple[Dict, List[Tuple[int, str]]]:
+    """One fresh interpreter: probe result and (cumulative us, module) rows"""
+    code = PROBE.format(module=module, heavy=HEAVY_MODULES, lazy=LAZY_SINGLETONS)
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", code],
+        cwd=os.path.dirname(os.path.abspath(__file__)),
+        capture_output=True,
+        text=True,
+    )
+    if proc.returncode != 0:
+        raise RuntimeError(f"Importing {module} failed:\n{proc.stderr[-2000:]}")
+
+    line = next(l for l in proc.stdout.splitlines() if l.startswith("@@"))
+    result = json.loads(line[2:])
+
+    rows = []
+    for l in proc.stderr.splitlines():
+        match = IMPORTTIME_LINE.match(l)
+        if match:
+            rows.append((int(match.group(2)), match.group(3).strip()))
+
+    return result, rows
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--budget-ms", type=float, default=IMPORT_BUDGET_MS)
+    parser.add_argument("--module", default="graph_app")
+    parser.add_argument("--top", type=int, default=10, help="slowest imports to list")
+    args = parser.parse_args()
+
+    timings: List[float] = []
+    failures: List[str] = []
+    slowest: List[Tuple[int, str]] = []
+
+    started = time.time()
+    for _ in range(args.runs):
+        result, rows = run_once(args.module)
+        timings.append(result["seconds"] * 1000)
+        if result["heavy"]:
+            failures.append(f"heavy modules imported at load: {', '.join(result['heavy'])}")
+        if result["built"]:
+            failures.append(f"singletons built at load: {', '.join(result['built'])}")
+        slowest = rows
+
+    median = statistics.median(timings)
+    print(f"{args.module}: median {median:.0f} ms, min {min(timings):.0f} ms, "
+          f"max {max(timings):.0f} ms over {args.runs} runs ({time.time() - started:.1f}s)")
+
+    print("Slowest imports (cumulative):")
+    for us, name in sorted(slowest, reverse=True)[:args.top]:
+        print(f"  {us / 1000:8.1f} ms  {name}")
+
+    if median > args.budget_ms:
+        failures.append(f"median {median:.0f} ms is over the {args.budget_ms:.0f} ms budget")
+
+    for failure in sorted(set(failures)):
+        print(f"FAIL: {failure}")
+
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,164 @@
+import hashlib
+import re
+import threading
+from collections import OrderedDict
+from datetime import datetime, timezone
+from typing import Any, Dict, Iterable, List, Optional, Set
+
+from sqlite_store import connect_sqlite
+
+# =================================================
+# CONSTANTS
+# =================================================
+BLOB_REF_PREFIX = "blob:sha256:"
+# References as they appear inside serialized checkpoints
+BLOB_REF_PATTERN = re.compile(rb"blob:sha256:([0-9a-f]{64})")
+# Shorter texts stay inline; a reference would save almost nothing
+BLOB_MIN_SIZE = 256
+# Resolved blobs kept in memory
+BLOB_CACHE_SIZE = 512
+
+# Large text fields offloaded from checkpointed state
+LEAD_BLOB_FIELDS = ("website_summary", "website_text_sample")
+EMAIL_BLOB_FIELDS = ("email_body",)
+
+
+def is_blob_ref(value: Any) -> bool:
+    return isinstance(value, str) and value.startswith(BLOB_REF_PREFIX)
+
+
+# =================================================
+# BLOB STORE
+# =================================================
+class BlobStore:
+    """
+    Content-addressed text storage in a SQLite table.
+
+    State keeps compact "blob:sha256:<digest>" references instead of large
+    text, so checkpoints stay small; identical text (e.g. a lead shared by
+    several campaigns) is stored once. Readers resolve references lazily.
+    """
+
+    def __init__(self, db_path: str, cache_size: int = BLOB_CACHE_SIZE):
+        self._conn = connect_sqlite(db_path)
+        self._lock = threading.Lock()
+        self._cache: "OrderedDict[str, str]" = OrderedDict()
+        self.cache_size = cache_size
+
+        with self._lock:
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS blobs ("
+                " digest TEXT PRIMARY KEY,"
+                " data TEXT NOT NULL,"
+                " size INTEGER NOT NULL,"
+                " created_at TEXT NOT NULL)"
+            )
+            self._conn.commit()
+
+    # ---------------------------------------------
+    # Writes
+    # ---------------------------------------------
+    def put(self, text: str) -> str:
+        """Store text and return its reference (or the text itself if short)"""
+        if not isinstance(text, str) or len(text) < BLOB_MIN_SIZE or is_blob_ref(text):
+            return text
+
+        digest = hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR IGNORE INTO blobs (digest, data, size, created_at) VALUES (?, ?, ?, ?)",
+                (digest, text, len(text), datetime.now(timezone.utc).isoformat())
+            )
+            self._conn.commit()
+            self._remember(digest, text)
+
+        return BLOB_REF_PREFIX + digest
+
+    def offload(self, record: Dict[str, Any], fields: Iterable[str]) -> Dict[str, Any]:
+        """Replace the given text fields of a record with references, in place"""
+        for field in fields:
+            if field in record:
+                record[field] = self.put(record[field])
+        return record
+
+    # ---------------------------------------------
+    # Reads
+    # ---------------------------------------------
+    def get(self, digest: str) -> Optional[str]:
+        with self._lock:
+            text = self._cache.get(digest)
+            if text is not None:
+                self._cache.move_to_end(digest)
+                return text
+
+            row = self._conn.execute(
+                "SELECT data FROM blobs WHERE digest = ?", (digest,)
+            ).fetchone()
+            if row is None:
+                return None
+            self._remember(digest, row[0])
+            return row[0]
+
+    def resolve(self, value: Any) -> Any:
+        """Text behind a reference; any other value is returned unchanged"""
+        if not is_blob_ref(value):
+            return value
+        text = self.get(value[len(BLOB_REF_PREFIX):])
+        return text if text is not None else ""
+
+    def resolved(self, record: Dict[str, Any], fields: Iterable[str]) -> Dict[str, Any]:
+        """Copy of a record with the given fields resolved"""
+        out = dict(record)
+        for field in fields:
+            if field in out:
+                out[field] = self.resolve(out[field])
+        return out
+
+    def resolve_many(self, records: List[Dict[str, Any]], fields: Iterable[str]) -> List[Dict[str, Any]]:
+        fields = tuple(fields)
+        return [self.resolved(r, fields) for r in records]
+
+    def resolve_deep(self, value: Any) -> Any:
+        """Copy of any JSON-like value (state, patch) with every reference resolved"""
+        if isinstance(value, dict):
+            return {k: self.resolve_deep(v) for k, v in value.items()}
+        if isinstance(value, list):
+            return [self.resolve_deep(v) for v in value]
+        return self.resolve(value)
+
+    # ---------------------------------------------
+    # Garbage collection
+    # ---------------------------------------------
+    def delete_unreferenced(self, live: Set[str], created_before: datetime) -> int:
+        """
+        Delete blobs older than created_before whose digest is not in live.
+        Newer blobs are kept: a run may have stored one and not yet
+        checkpointed the state that refers to it.
+        """
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT digest FROM blobs WHERE created_at < ?", (created_before.isoformat(),)
+            ).fetchall()
+            dead = [digest for (digest,) in rows if digest not in live]
+
+            self._conn.executemany("DELETE FROM blobs WHERE digest = ?", [(d,) for d in dead])
+            self._conn.commit()
+            for digest in dead:
+                self._cache.pop(digest, None)
+
+        return len(dead)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            count, total = self._conn.execute(
+                "SELECT COUNT(*), COALESCE(SUM(size), 0) FROM blobs"
+            ).fetchone()
+        return {"blobs": count, "bytes": total, "cached": len(self._cache)}
+
+    def _remember(self, digest: str, text: str):
+        # Caller holds the lock
+        self._cache[digest] = text
+        self._cache.move_to_end(digest)
+        while len(self._cache) > self.cache_size:
+            self._cache.popitem(last=False)
@@ -0,0 +1,544 @@
+import itertools
+import os
+import queue
+import threading
+import time
+import uuid
+from concurrent.futures import Future
+from datetime import datetime, timedelta, timezone
+from typing import Any, Callable, Dict, List, Optional, Tuple
+from zoneinfo import ZoneInfo
+
+# =================================================
+# CONSTANTS
+# =================================================
+CAL_SCOPES = ['https://www.googleapis.com/auth/calendar']
+CALENDAR_TOKEN_PATH = os.getenv("CALENDAR_TOKEN_PATH", "token.json")
+CALENDAR_CREDENTIALS_PATH = os.getenv("CALENDAR_CREDENTIALS_PATH", "credentials.json")
+# "google" or "fake" (in-memory Calendar API for local runs and tests)
+CALENDAR_BACKEND = os.getenv("CALENDAR_BACKEND", "google")
+CALENDAR_ID = "primary"
+CALENDAR_TIMEZONE = "Asia/Kolkata"
+
+MEETING_MINUTES = 30
+
+# Refresh the access token this long before it expires
+TOKEN_REFRESH_MARGIN_SECONDS = 300
+REFRESH_CHECK_SECONDS = 60
+
+# Inserts arriving within this window go out as one batch request
+BATCH_WINDOW_SECONDS = 0.25
+BATCH_MAX_EVENTS = 50
+
+# Free/busy window kept in memory for slot suggestions
+FREEBUSY_HORIZON_DAYS = 7
+FREEBUSY_TTL_SECONDS = 300
+WORKING_HOURS = (9, 18)
+SLOT_STEP_MINUTES = 30
+
+Interval = Tuple[datetime, datetime]
+
+
+# =================================================
+# GOOGLE CREDENTIALS / SERVICE
+# =================================================
+def load_google_credentials():
+    """token.json credentials, refreshed or obtained via the local OAuth flow"""
+    from google.oauth2.credentials import Credentials
+    from google_auth_oauthlib.flow import InstalledAppFlow
+    from google.auth.transport.requests import Request
+
+    creds = None
+    if os.path.exists(CALENDAR_TOKEN_PATH):
+        creds = Credentials.from_authorized_user_file(CALENDAR_TOKEN_PATH, CAL_SCOPES)
+
+    if not creds or not creds.valid:
+        if creds and creds.expired and creds.refresh_token:
+            creds.refresh(Request())
+        else:
+            flow = InstalledAppFlow.from_client_secrets_file(
+                CALENDAR_CREDENTIALS_PATH, CAL_SCOPES
+            )
+            creds = flow.run_local_server(port=0)
+
+        save_google_credentials(creds)
+
+    return creds
+
+
+def save_google_credentials(creds):
+    with open(CALENDAR_TOKEN_PATH, "w") as token:
+        token.write(creds.to_json())
+
+
+def refresh_google_credentials(creds):
+    from google.auth.transport.requests import Request
+    creds.refresh(Request())
+    save_google_credentials(creds)
+
+
+def google_calendar_service(creds):
+    """Discovery client for Calendar v3 (built once per CalendarClient)"""
+    from googleapiclient.discovery import build
+    return build("calendar", "v3", credentials=creds, cache_discovery=False)
+
+
+def parse_rfc3339(value: str) -> datetime:
+    dt = datetime.fromisoformat(value.replace("Z", "+00:00"))
+    return dt if dt.tzinfo else dt.replace(tzinfo=timezone.utc)
+
+
+# =================================================
+# CALENDAR CLIENT
+# =================================================
+class CalendarClient:
+    """
+    Shared Calendar API client.
+
+    - the authenticated service is built once; the access token is
+      refreshed in the background shortly before it expires
+    - event inserts from concurrent callers are coalesced into batch
+      requests (create_event blocks until its event is created)
+    - busy intervals for the next FREEBUSY_HORIZON_DAYS are cached, so
+      suggest_slots() needs no API call per suggestion
+
+    The service factory and credential functions are injectable, e.g.
+    FakeCalendarService for tests.
+    """
+
+    def __init__(
+        self,
+        service_factory: Callable[[Any], Any] = google_calendar_service,
+        load_credentials: Callable[[], Any] = load_google_credentials,
+        refresh_credentials: Callable[[Any], None] = refresh_google_credentials,
+        calendar_id: str = CALENDAR_ID,
+        time_zone: str = CALENDAR_TIMEZONE,
+        batch_window: float = BATCH_WINDOW_SECONDS
+    ):
+        self.service_factory = service_factory
+        self.load_credentials = load_credentials
+        self.refresh_credentials = refresh_credentials
+        self.calendar_id = calendar_id
+        self.time_zone = time_zone
+        self.tz = ZoneInfo(time_zone)
+        self.batch_window = batch_window
+
+        self._service = None
+        self._creds = None
+        # googleapiclient/httplib2 objects are not thread-safe
+        self._api_lock = threading.Lock()
+        self._init_lock = threading.Lock()
+
+        self._pending: "queue.Queue[Optional[Tuple[Dict[str, Any], Future]]]" = queue.Queue()
+        self._busy: List[Interval] = []
+        self._busy_until: Optional[datetime] = None
+        self._busy_loaded_at = 0.0
+        self._busy_lock = threading.Lock()
+
+        self._stop = threading.Event()
+        self._threads: List[threading.Thread] = []
+
+        self._stats = {
+            "services_built": 0,
+            "token_refreshes": 0,
+            "events_created": 0,
+            "batches_sent": 0,
+            "freebusy_queries": 0,
+            "errors": 0,
+        }
+
+    # ---------------------------------------------
+    # Service / lifecycle
+    # ---------------------------------------------
+    def service(self):
+        """The cached authenticated service (built on first use)"""
+        if self._service is None:
+            with self._init_lock:
+                if self._service is None:
+                    self._creds = self.load_credentials()
+                    self._service = self.service_factory(self._creds)
+                    self._stats["services_built"] += 1
+                    self.start()
+        return self._service
+
+    def authorized(self) -> bool:
+        """Whether the service can be used without an interactive OAuth login"""
+        return (
+            self._service is not None
+            or self.load_credentials is not load_google_credentials
+            or os.path.exists(CALENDAR_TOKEN_PATH)
+        )
+
+    def start(self):
+        if self._threads:
+            return
+        self._stop.clear()
+        for target, name in ((self._refresh_loop, "calendar-refresh"), (self._batch_loop, "calendar-batch")):
+            thread = threading.Thread(target=target, name=name, daemon=True)
+            thread.start()
+            self._threads.append(thread)
+
+    def stop(self):
+        self._stop.set()
+        self._pending.put(None)
+        for thread in self._threads:
+            thread.join(timeout=5)
+        self._threads = []
+
+    def _refresh_loop(self):
+        while not self._stop.wait(REFRESH_CHECK_SECONDS):
+            try:
+                self._refresh_token_if_needed()
+                if time.time() - self._busy_loaded_at > FREEBUSY_TTL_SECONDS:
+                    self.refresh_free_busy()
+            except Exception as e:
+                self._stats["errors"] += 1
+                print(f"Calendar refresh failed: {e}")
+
+    def _refresh_token_if_needed(self):
+        creds = self._creds
+        expiry = getattr(creds, "expiry", None)
+        if creds is None or expiry is None:
+            return
+
+        # google-auth keeps expiry as naive UTC
+        now = datetime.now(timezone.utc).replace(tzinfo=None)
+        if expiry - now > timedelta(seconds=TOKEN_REFRESH_MARGIN_SECONDS):
+            return
+
+        with self._api_lock:
+            self.refresh_credentials(creds)
+        self._stats["token_refreshes"] += 1
+
+    # ---------------------------------------------
+    # Events
+    # ---------------------------------------------
+    def meeting_event(self, company_name: str, attendee_email: str, start: datetime, minutes: int = MEETING_MINUTES) -> Dict[str, Any]:
+        """Event body for a meeting starting at a naive local datetime"""
+        end = start + timedelta(minutes=minutes)
+        return {
+            "summary": f"Meeting with {company_name}",
+            "description": "Automated meeting created by B2B outreach system",
+            "start": {
+                "dateTime": start.isoformat(),
+                "timeZone": self.time_zone,
+            },
+            "end": {
+                "dateTime": end.isoformat(),
+                "timeZone": self.time_zone,
+            },
+            "conferenceData": {
+                "createRequest": {
+                    "requestId": str(uuid.uuid4())
+                }
+            },
+            "attendees": [
+                {"email": attendee_email}
+            ]
+        }
+
+    def create_event(self, event: Dict[str, Any], timeout: float = 60) -> Dict[str, Any]:
+        """Queue an insert and wait for the created event (batched with concurrent inserts)"""
+        self.service()
+        future: Future = Future()
+        self._pending.put((event, future))
+        return future.result(timeout=timeout)
+
+    def insert_events(self, events: List[Dict[str, Any]]) -> List[Any]:
+        """
+        Insert events with one batch request. Returns the created event or
+        the exception for each input, in order.
+        """
+        service = self.service()
+        if not events:
+            return []
+
+        results: List[Any] = [None] * len(events)
+
+        def insert_request(event):
+            return service.events().insert(
+                calendarId=self.calendar_id,
+                body=event,
+                conferenceDataVersion=1,
+                sendUpdates="all"
+            )
+
+        with self._api_lock:
+            if len(events) == 1:
+                try:
+                    results[0] = insert_request(events[0]).execute()
+                except Exception as e:
+                    results[0] = e
+            else:
+                def on_response(request_id, response, exception):
+                    results[int(request_id)] = exception if exception is not None else response
+
+                batch = service.new_batch_http_request(callback=on_response)
+                for i, event in enumerate(events):
+                    batch.add(insert_request(event), request_id=str(i))
+                batch.execute()
+                self._stats["batches_sent"] += 1
+
+        for event, result in zip(events, results):
+            if isinstance(result, Exception) or result is None:
+                self._stats["errors"] += 1
+                continue
+            self._stats["events_created"] += 1
+            self._mark_busy(event)
+
+        return results
+
+    def _batch_loop(self):
+        while not self._stop.is_set():
+            item = self._pending.get()
+            if item is None:
+                break
+
+            items = [item]
+            deadline = time.time() + self.batch_window
+            while len(items) < BATCH_MAX_EVENTS:
+                remaining = deadline - time.time()
+                if remaining <= 0:
+                    break
+                try:
+                    nxt = self._pending.get(timeout=remaining)
+                except queue.Empty:
+                    break
+                if nxt is None:
+                    self._stop.set()
+                    break
+                items.append(nxt)
+
+            try:
+                results = self.insert_events([event for event, _ in items])
+            except Exception as e:
+                results = [e] * len(items)
+
+            for (_, future), result in zip(items, results):
+                if isinstance(result, Exception):
+                    future.set_exception(result)
+                elif result is None:
+                    future.set_exception(RuntimeError("Calendar batch returned no response"))
+                else:
+                    future.set_result(result)
+
+        # Fail whatever is left so callers do not wait for their timeout
+        while True:
+            try:
+                item = self._pending.get_nowait()
+            except queue.Empty:
+                break
+            if item is not None:
+                item[1].set_exception(RuntimeError("Calendar client stopped"))
+
+    # ---------------------------------------------
+    # Free/busy and slot suggestions
+    # ---------------------------------------------
+    def refresh_free_busy(self, days: int = FREEBUSY_HORIZON_DAYS):
+        """Load busy intervals from now to `days` ahead with one freebusy query"""
+        service = self.service()
+        now = datetime.now(timezone.utc)
+        until = now + timedelta(days=days)
+
+        with self._api_lock:
+            response = service.freebusy().query(body={
+                "timeMin": now.isoformat(),
+                "timeMax": until.isoformat(),
+                "timeZone": self.time_zone,
+                "items": [{"id": self.calendar_id}]
+            }).execute()
+        self._stats["freebusy_queries"] += 1
+
+        busy = [
+            (parse_rfc3339(b["start"]), parse_rfc3339(b["end"]))
+            for b in response.get("calendars", {}).get(self.calendar_id, {}).get("busy", [])
+        ]
+
+        with self._busy_lock:
+            self._busy = sorted(busy)
+            self._busy_until = until
+            self._busy_loaded_at = time.time()
+
+    def _mark_busy(self, event: Dict[str, Any]):
+        # Keep the cache right between refreshes
+        try:
+            start = datetime.fromisoformat(event["start"]["dateTime"])
+            end = datetime.fromisoformat(event["end"]["dateTime"])
+        except (KeyError, ValueError):
+            return
+        start = start if start.tzinfo else start.replace(tzinfo=self.tz)
+        end = end if end.tzinfo else end.replace(tzinfo=self.tz)
+        with self._busy_lock:
+            self._busy.append((start, end))
+            self._busy.sort()
+
+    def is_free(self, start: datetime, minutes: int = MEETING_MINUTES) -> bool:
+        """Whether a naive local start time is free according to the cache"""
+        start = start if start.tzinfo else start.replace(tzinfo=self.tz)
+        end = start + timedelta(minutes=minutes)
+        with self._busy_lock:
+            return not any(b_start < end and start < b_end for b_start, b_end in self._busy)
+
+    def suggest_slots(
+        self,
+        count: int = 3,
+        minutes: int = MEETING_MINUTES,
+        after: Optional[datetime] = None
+    ) -> List[str]:
+        """
+        The next `count` free working-hour slots as local "YYYY-MM-DD HH:MM"
+        strings (the format the meeting step takes), from the cached
+        free/busy window (refreshed when stale).
+        """
+        if time.time() - self._busy_loaded_at > FREEBUSY_TTL_SECONDS:
+            self.refresh_free_busy()
+
+        now = datetime.now(self.tz)
+        start = max(after.astimezone(self.tz) if after else now, now)
+        # Round up to the next slot boundary
+        start = start.replace(second=0, microsecond=0)
+        start += timedelta(minutes=(-start.minute) % SLOT_STEP_MINUTES)
+
+        with self._busy_lock:
+            busy = list(self._busy)
+            horizon = self._busy_until.astimezone(self.tz) if self._busy_until else start + timedelta(days=FREEBUSY_HORIZON_DAYS)
+
+        slots: List[str] = []
+        step = timedelta(minutes=SLOT_STEP_MINUTES)
+        length = timedelta(minutes=minutes)
+        i = 0
+
+        candidate = start
+        while candidate + length <= horizon and len(slots) < count:
+            day_start = candidate.replace(hour=WORKING_HOURS[0], minute=0)
+            day_end = candidate.replace(hour=WORKING_HOURS[1], minute=0)
+
+            if candidate.weekday() >= 5 or candidate + length > day_end:
+                # Next working morning
+                candidate = (candidate + timedelta(days=1)).replace(hour=WORKING_HOURS[0], minute=0)
+                continue
+            if candidate < day_start:
+                candidate = day_start
+                continue
+
+            end = candidate + length
+            # Busy intervals are sorted; skip the ones already over
+            while i < len(busy) and busy[i][1] <= candidate:
+                i += 1
+            clash = next((b for b in itertools.islice(busy, i, None) if b[0] < end and candidate < b[1]), None)
+
+            if clash is None:
+                slots.append(candidate.strftime("%Y-%m-%d %H:%M"))
+                candidate = end
+            else:
+                # Jump past the clash, onto the slot grid
+                candidate = clash[1].astimezone(self.tz)
+                candidate += timedelta(minutes=(-candidate.minute) % SLOT_STEP_MINUTES)
+                candidate = candidate.replace(second=0, microsecond=0)
+
+        return slots
+
+    def stats(self) -> Dict[str, Any]:
+        with self._busy_lock:
+            busy = len(self._busy)
+        return {
+            **self._stats,
+            "busy_intervals": busy,
+            "freebusy_age_seconds": round(time.time() - self._busy_loaded_at, 1) if self._busy_loaded_at else None,
+            "pending_inserts": self._pending.qsize(),
+        }
+
+
+# =================================================
+# FAKE CALENDAR API
+# =================================================
+class _FakeRequest:
+    def __init__(self, run: Callable[[], Any]):
+        self._run = run
+
+    def execute(self):
+        return self._run()
+
+
+class _FakeBatch:
+    def __init__(self, service: "FakeCalendarService", callback):
+        self.service = service
+        self.callback = callback
+        self.requests: List[Tuple[str, _FakeRequest]] = []
+
+    def add(self, request: _FakeRequest, request_id: str):
+        self.requests.append((request_id, request))
+
+    def execute(self):
+        self.service.batches += 1
+        for request_id, request in self.requests:
+            try:
+                self.callback(request_id, request.execute(), None)
+            except Exception as e:
+                self.callback(request_id, None, e)
+
+
+class FakeCalendarService:
+    """
+    In-memory stand-in for the Calendar v3 service: events().insert,
+    freebusy().query and new_batch_http_request. Inserted events (and
+    `busy`, seeded by tests) make up the free/busy answer.
+    """
+
+    def __init__(self, busy: Optional[List[Tuple[str, str]]] = None):
+        self.events_created: List[Dict[str, Any]] = []
+        self.busy: List[Tuple[str, str]] = list(busy or [])
+        self.batches = 0
+        self.freebusy_queries = 0
+        self._ids = itertools.count(1)
+
+    def events(self):
+        return self
+
+    def insert(self, calendarId: str, body: Dict[str, Any], **kwargs) -> _FakeRequest:
+        def run():
+            event_id = f"fake-event-{next(self._ids)}"
+            created = {
+                **body,
+                "id": event_id,
+                "conferenceData": {
+                    "entryPoints": [{"entryPointType": "video", "uri": f"https://meet.example/{event_id}"}]
+                }
+            }
+            self.events_created.append(created)
+            return created
+        return _FakeRequest(run)
+
+    def freebusy(self):
+        return self
+
+    def query(self, body: Dict[str, Any]) -> _FakeRequest:
+        def run():
+            self.freebusy_queries += 1
+            tz = ZoneInfo(body.get("timeZone", "UTC"))
+
+            def aware(value: str) -> str:
+                dt = datetime.fromisoformat(value)
+                return (dt if dt.tzinfo else dt.replace(tzinfo=tz)).isoformat()
+
+            busy = [{"start": aware(s), "end": aware(e)} for s, e in self.busy]
+            busy += [
+                {"start": aware(e["start"]["dateTime"]), "end": aware(e["end"]["dateTime"])}
+                for e in self.events_created
+            ]
+            calendar_id = body["items"][0]["id"]
+            return {"calendars": {calendar_id: {"busy": busy}}}
+        return _FakeRequest(run)
+
+    def new_batch_http_request(self, callback=None) -> _FakeBatch:
+        return _FakeBatch(self, callback)
+
+
+def create_calendar_client(backend: str = CALENDAR_BACKEND) -> CalendarClient:
+    if backend == "fake":
+        return CalendarClient(
+            service_factory=lambda creds: FakeCalendarService(),
+            load_credentials=lambda: None,
+            refresh_credentials=lambda creds: None
+        )
+    return CalendarClient()
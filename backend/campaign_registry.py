@@ -0,0 +1,204 @@
+import sqlite3
+import threading
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Optional
+
+from record_index import decode_cursor, encode_cursor
+from sqlite_store import connect_sqlite
+from state_projection import CheckpointHook, summarize_state
+
+# =================================================
+# CONSTANTS
+# =================================================
+COUNTER_COLUMNS = [
+    "leads_count",
+    "qualified_count",
+    "emails_ready",
+    "emails_sent",
+    "monitoring_count",
+    "replies_received",
+]
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS campaigns (
+    thread_id TEXT PRIMARY KEY,
+    query TEXT NOT NULL DEFAULT '',
+    mode TEXT NOT NULL DEFAULT 'live',
+    phase TEXT NOT NULL DEFAULT 'unknown',
+    sender_company TEXT NOT NULL DEFAULT '',
+    leads_count INTEGER NOT NULL DEFAULT 0,
+    qualified_count INTEGER NOT NULL DEFAULT 0,
+    emails_ready INTEGER NOT NULL DEFAULT 0,
+    emails_sent INTEGER NOT NULL DEFAULT 0,
+    monitoring_count INTEGER NOT NULL DEFAULT 0,
+    replies_received INTEGER NOT NULL DEFAULT 0,
+    created_at TEXT NOT NULL,
+    updated_at TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_campaigns_updated ON campaigns (updated_at, thread_id);
+CREATE INDEX IF NOT EXISTS idx_campaigns_phase ON campaigns (phase, updated_at, thread_id);
+CREATE INDEX IF NOT EXISTS idx_campaigns_mode ON campaigns (mode, updated_at, thread_id);
+"""
+
+
+def utc_now() -> str:
+    return datetime.now(timezone.utc).isoformat()
+
+
+# =================================================
+# CAMPAIGN REGISTRY
+# =================================================
+class CampaignRegistry:
+    """
+    One row per campaign thread with its query, mode, phase and counters.
+
+    Rows are created when a campaign starts and refreshed from checkpoint
+    writes (only when the summary actually changed), so listings are an
+    index range scan instead of a walk over checkpoint blobs.
+    """
+
+    def __init__(self, db_path: str):
+        self.db_path = db_path
+        self._conn = connect_sqlite(db_path)
+        self._conn.row_factory = sqlite3.Row
+        self._lock = threading.Lock()
+        # thread_id -> last written (phase, counters), to skip no-op updates
+        self._last: Dict[str, tuple] = {}
+
+        with self._lock:
+            self._conn.executescript(SCHEMA)
+            self._conn.commit()
+
+    # ---------------------------------------------
+    # Writes
+    # ---------------------------------------------
+    def register(self, thread_id: str, query: str, mode: str, sender_profile: Optional[Dict[str, Any]] = None):
+        """Record a campaign at start time (keeps counters if it exists)"""
+        now = utc_now()
+        sender_company = (sender_profile or {}).get("company_name", "")
+
+        with self._lock:
+            self._conn.execute(
+                "INSERT INTO campaigns (thread_id, query, mode, sender_company, created_at, updated_at) "
+                "VALUES (?, ?, ?, ?, ?, ?) "
+                "ON CONFLICT(thread_id) DO UPDATE SET "
+                "query = excluded.query, mode = excluded.mode, "
+                "sender_company = excluded.sender_company, updated_at = excluded.updated_at",
+                (thread_id, query, mode, sender_company, now, now)
+            )
+            self._conn.commit()
+
+    def update_from_state(self, thread_id: str, values: Dict[str, Any]):
+        summary = summarize_state(values)
+        signature = (summary["phase"],) + tuple(summary[c] for c in COUNTER_COLUMNS)
+
+        with self._lock:
+            if self._last.get(thread_id) == signature:
+                return
+
+            now = utc_now()
+            mode = "test" if values.get("source") == "test" else "live"
+            sender_company = (values.get("sender_profile") or {}).get("company_name", "")
+            counters = [summary[c] for c in COUNTER_COLUMNS]
+
+            self._conn.execute(
+                f"INSERT INTO campaigns (thread_id, query, mode, phase, sender_company, "
+                f"{', '.join(COUNTER_COLUMNS)}, created_at, updated_at) "
+                f"VALUES (?, ?, ?, ?, ?, {', '.join('?' * len(COUNTER_COLUMNS))}, ?, ?) "
+                f"ON CONFLICT(thread_id) DO UPDATE SET phase = excluded.phase, "
+                f"{', '.join(f'{c} = excluded.{c}' for c in COUNTER_COLUMNS)}, "
+                f"updated_at = excluded.updated_at",
+                (thread_id, values.get("query", ""), mode, summary["phase"], sender_company,
+                 *counters, now, now)
+            )
+            self._conn.commit()
+            self._last[thread_id] = signature
+
+    def set_phase(self, thread_id: str, phase: str):
+        """Override the phase (e.g. "archived") without touching counters"""
+        with self._lock:
+            self._conn.execute(
+                "UPDATE campaigns SET phase = ?, updated_at = ? WHERE thread_id = ?",
+                (phase, utc_now(), thread_id)
+            )
+            self._conn.commit()
+            self._last.pop(thread_id, None)
+
+    def remove(self, thread_id: str):
+        with self._lock:
+            self._conn.execute("DELETE FROM campaigns WHERE thread_id = ?", (thread_id,))
+            self._conn.commit()
+            self._last.pop(thread_id, None)
+
+    # ---------------------------------------------
+    # Reads
+    # ---------------------------------------------
+    def get(self, thread_id: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT * FROM campaigns WHERE thread_id = ?", (thread_id,)
+            ).fetchone()
+        return dict(row) if row else None
+
+    def list(
+        self,
+        phase: Optional[str] = None,
+        mode: Optional[str] = None,
+        limit: int = 50,
+        cursor: Optional[str] = None
+    ) -> Dict[str, Any]:
+        """
+        Most recently updated first, keyset-paginated on (updated_at, thread_id).
+        """
+        where, params = [], []
+        if phase:
+            where.append("phase = ?")
+            params.append(phase)
+        if mode:
+            where.append("mode = ?")
+            params.append(mode)
+        if cursor:
+            updated_at, thread_id = decode_cursor(cursor, size=2)
+            where.append("(updated_at, thread_id) < (?, ?)")
+            params.extend([updated_at, thread_id])
+
+        sql = "SELECT * FROM campaigns"
+        if where:
+            sql += " WHERE " + " AND ".join(where)
+        sql += " ORDER BY updated_at DESC, thread_id DESC LIMIT ?"
+        params.append(limit + 1)
+
+        with self._lock:
+            rows = [dict(r) for r in self._conn.execute(sql, params).fetchall()]
+
+        next_cursor = None
+        if len(rows) > limit:
+            rows = rows[:limit]
+            next_cursor = encode_cursor([rows[-1]["updated_at"], rows[-1]["thread_id"]])
+
+        return {"campaigns": rows, "next_cursor": next_cursor}
+
+    def thread_ids(self, phase: Optional[str] = None) -> List[str]:
+        with self._lock:
+            if phase:
+                rows = self._conn.execute(
+                    "SELECT thread_id FROM campaigns WHERE phase = ?", (phase,)
+                ).fetchall()
+            else:
+                rows = self._conn.execute("SELECT thread_id FROM campaigns").fetchall()
+        return [r[0] for r in rows]
+
+    def list_all(self) -> List[Dict[str, Any]]:
+        """Every campaign row, unpaginated (for maintenance jobs)"""
+        with self._lock:
+            return [dict(r) for r in self._conn.execute("SELECT * FROM campaigns").fetchall()]
+
+    def count(self) -> int:
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM campaigns").fetchone()[0]
+
+
+def registry_hook(registry: CampaignRegistry) -> CheckpointHook:
+    def hook(thread_id: str, checkpoint: Dict[str, Any], metadata: Dict[str, Any]):
+        registry.update_from_state(thread_id, checkpoint.get("channel_values", {}))
+    return hook
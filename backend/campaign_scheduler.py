@@ -0,0 +1,221 @@
+import time
+from collections import OrderedDict, deque
+from typing import Any, Deque, Dict, Optional
+
+# =================================================
+# CONSTANTS
+# =================================================
+PRIORITY_LIVE = "live"
+PRIORITY_TEST = "test"
+
+# Dispatch cycle: live campaigns get 3 of every 4 free slots when both wait
+PRIORITY_CYCLE = [PRIORITY_LIVE, PRIORITY_LIVE, PRIORITY_LIVE, PRIORITY_TEST]
+
+SCHEDULER_MAX_RUNNING = 8
+SCHEDULER_MAX_QUEUED = 200
+SCHEDULER_MAX_QUEUED_PER_SENDER = 20
+
+# Smoothing factor for wait/run time averages
+EWMA_ALPHA = 0.2
+
+
+class QueueFull(Exception):
+    """Raised when a job cannot be admitted; carries a Retry-After hint."""
+
+    def __init__(self, detail: str, retry_after: int):
+        super().__init__(detail)
+        self.detail = detail
+        self.retry_after = retry_after
+
+
+# =================================================
+# CAMPAIGN SCHEDULER
+# =================================================
+class CampaignScheduler:
+    """
+    Admission control and fair ordering for graph runs.
+
+    - a global cap on concurrently running jobs
+    - priority classes (live before test, weighted so test never starves)
+    - round-robin between senders inside a class, so one sender's burst
+      cannot monopolise the workers
+    - at most one running job per campaign thread
+    - bounded queues (global and per sender) that reject with QueueFull
+
+    Items are dicts with job_id, thread_id, sender_key and priority.
+    Not thread-safe on its own; JobManager serialises access.
+    """
+
+    def __init__(
+        self,
+        max_running: int = SCHEDULER_MAX_RUNNING,
+        max_queued: int = SCHEDULER_MAX_QUEUED,
+        max_queued_per_sender: int = SCHEDULER_MAX_QUEUED_PER_SENDER
+    ):
+        self.max_running = max_running
+        self.max_queued = max_queued
+        self.max_queued_per_sender = max_queued_per_sender
+
+        # priority -> sender_key -> queued items (OrderedDict gives the rotation)
+        self._queues: Dict[str, "OrderedDict[str, Deque[Dict[str, Any]]]"] = {
+            p: OrderedDict() for p in set(PRIORITY_CYCLE)
+        }
+        self._queued = 0
+        self._cycle_pos = 0
+
+        self._running: Dict[str, Dict[str, Any]] = {}
+        self._running_threads: Dict[str, int] = {}
+
+        self._avg_wait = 0.0
+        self._max_wait = 0.0
+        self._avg_run = 0.0
+        self._admitted = 0
+        self._rejected = 0
+
+    # ---------------------------------------------
+    # Admission
+    # ---------------------------------------------
+    def _retry_after(self) -> int:
+        per_slot = self._avg_run or 30.0
+        return max(1, int(per_slot * (self._queued + 1) / self.max_running))
+
+    def enqueue(self, item: Dict[str, Any]):
+        priority = item.get("priority", PRIORITY_LIVE)
+        if priority not in self._queues:
+            priority = PRIORITY_LIVE
+        item["priority"] = priority
+
+        sender_key = item.get("sender_key") or "default"
+        item["sender_key"] = sender_key
+        sender_queue = self._queues[priority].get(sender_key)
+
+        if self._queued >= self.max_queued:
+            self._rejected += 1
+            raise QueueFull("Campaign queue is full", self._retry_after())
+
+        sender_queued = sum(
+            len(q.get(sender_key, ())) for q in self._queues.values()
+        )
+        if sender_queued >= self.max_queued_per_sender:
+            self._rejected += 1
+            raise QueueFull(
+                f"Too many queued campaign jobs for sender '{sender_key}'",
+                self._retry_after()
+            )
+
+        if sender_queue is None:
+            sender_queue = self._queues[priority][sender_key] = deque()
+
+        item["enqueued_at"] = time.monotonic()
+        sender_queue.append(item)
+        self._queued += 1
+        self._admitted += 1
+
+    def remove(self, job_id: str) -> Optional[Dict[str, Any]]:
+        """Drop a queued item (e.g. cancelled before it started)."""
+        for senders in self._queues.values():
+            for sender_key, q in list(senders.items()):
+                for item in q:
+                    if item["job_id"] == job_id:
+                        q.remove(item)
+                        self._queued -= 1
+                        if not q:
+                            del senders[sender_key]
+                        return item
+        return None
+
+    # ---------------------------------------------
+    # Dispatch
+    # ---------------------------------------------
+    def _take_from(self, priority: str) -> Optional[Dict[str, Any]]:
+        senders = self._queues[priority]
+
+        for sender_key in list(senders):
+            q = senders[sender_key]
+            for item in q:
+                if item["thread_id"] in self._running_threads:
+                    continue
+
+                q.remove(item)
+                self._queued -= 1
+                if q:
+                    senders.move_to_end(sender_key)
+                else:
+                    del senders[sender_key]
+                return item
+
+        return None
+
+    def next_ready(self) -> Optional[Dict[str, Any]]:
+        """Pop the next job allowed to run now, or None."""
+        if len(self._running) >= self.max_running or not self._queued:
+            return None
+
+        for offset in range(len(PRIORITY_CYCLE)):
+            priority = PRIORITY_CYCLE[(self._cycle_pos + offset) % len(PRIORITY_CYCLE)]
+            item = self._take_from(priority)
+            if item is None:
+                continue
+
+            self._cycle_pos = (self._cycle_pos + offset + 1) % len(PRIORITY_CYCLE)
+
+            now = time.monotonic()
+            wait = now - item["enqueued_at"]
+            self._avg_wait += EWMA_ALPHA * (wait - self._avg_wait)
+            self._max_wait = max(self._max_wait, wait)
+
+            item["started_at"] = now
+            self._running[item["job_id"]] = item
+            self._running_threads[item["thread_id"]] = self._running_threads.get(item["thread_id"], 0) + 1
+            return item
+
+        return None
+
+    def done(self, job_id: str):
+        item = self._running.pop(job_id, None)
+        if item is None:
+            return
+
+        thread_id = item["thread_id"]
+        self._running_threads[thread_id] -= 1
+        if not self._running_threads[thread_id]:
+            del self._running_threads[thread_id]
+
+        run_time = time.monotonic() - item["started_at"]
+        self._avg_run += EWMA_ALPHA * (run_time - self._avg_run)
+
+    # ---------------------------------------------
+    # Metrics
+    # ---------------------------------------------
+    def stats(self) -> Dict[str, Any]:
+        now = time.monotonic()
+        oldest = min(
+            (item["enqueued_at"] for senders in self._queues.values()
+             for q in senders.values() for item in q),
+            default=None
+        )
+
+        return {
+            "running": len(self._running),
+            "max_running": self.max_running,
+            "queued": self._queued,
+            "max_queued": self.max_queued,
+            "queued_by_priority": {
+                p: sum(len(q) for q in senders.values())
+                for p, senders in self._queues.items()
+            },
+            "queued_by_sender": self._queued_by_sender(),
+            "oldest_wait_seconds": round(now - oldest, 3) if oldest is not None else 0.0,
+            "avg_wait_seconds": round(self._avg_wait, 3),
+            "max_wait_seconds": round(self._max_wait, 3),
+            "avg_run_seconds": round(self._avg_run, 3),
+            "admitted": self._admitted,
+            "rejected": self._rejected
+        }
+
+    def _queued_by_sender(self) -> Dict[str, int]:
+        counts: Dict[str, int] = {}
+        for senders in self._queues.values():
+            for sender_key, q in senders.items():
+                counts[sender_key] = counts.get(sender_key, 0) + len(q)
+        return counts
@@ -0,0 +1,172 @@
+import inspect
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeout
+from contextlib import contextmanager
+from contextvars import ContextVar, copy_context
+from typing import Any, Callable, Dict, Iterator, Optional
+
+# =================================================
+# CONSTANTS
+# =================================================
+# Overall budget of one campaign run (discovery → drafts)
+CAMPAIGN_DEADLINE_SECONDS = float(os.getenv("CAMPAIGN_DEADLINE_SECONDS", 300))
+
+# Share of the time left when a stage starts that the stage may use; the
+# rest is kept for the stages after it
+STAGE_BUDGETS = {
+    "discovery": 0.2,
+    "research": 0.75,
+    "writer": 1.0,
+    "sender": 1.0,
+    "followup": 1.0,
+}
+
+# Calls always get at least this long, even past the deadline, so a
+# stage can finish the item in hand instead of failing it outright
+MIN_CALL_TIMEOUT_SECONDS = 1.0
+
+# Threads that run calls which must return within a timeout
+TIMEOUT_POOL_SIZE = 8
+
+
+class DeadlineExceeded(TimeoutError):
+    pass
+
+
+# =================================================
+# DEADLINE
+# =================================================
+class Deadline:
+    """
+    An absolute point in (wall-clock) time, so it can travel in the graph
+    config. Stages and calls derive shorter deadlines from it.
+    """
+
+    def __init__(self, at: float):
+        self.at = at
+
+    @classmethod
+    def after(cls, seconds: float) -> "Deadline":
+        return cls(time.time() + seconds)
+
+    def remaining(self) -> float:
+        return max(0.0, self.at - time.time())
+
+    def expired(self) -> bool:
+        return time.time() >= self.at
+
+    def child(self, seconds: Optional[float] = None, share: Optional[float] = None) -> "Deadline":
+        """A deadline no later than this one: `seconds` from now or `share` of what is left"""
+        at = self.at
+        if seconds is not None:
+            at = min(at, time.time() + seconds)
+        if share is not None:
+            at = min(at, time.time() + self.remaining() * share)
+        return Deadline(at)
+
+    def timeout(self, default: float, minimum: float = MIN_CALL_TIMEOUT_SECONDS) -> float:
+        """Per-call timeout: the default, cut to the time left (never below minimum)"""
+        return max(minimum, min(default, self.remaining()))
+
+    def __repr__(self) -> str:
+        return f"<Deadline {self.remaining():.1f}s left>"
+
+
+_current: ContextVar[Optional[Deadline]] = ContextVar("campaign_deadline", default=None)
+
+
+def current_deadline() -> Optional[Deadline]:
+    return _current.get()
+
+
+@contextmanager
+def deadline_scope(deadline: Optional[Deadline]) -> Iterator[Optional[Deadline]]:
+    """Make `deadline` the current one for calls made inside the block"""
+    token = _current.set(deadline)
+    try:
+        yield deadline
+    finally:
+        _current.reset(token)
+
+
+def call_timeout(default: float, minimum: float = MIN_CALL_TIMEOUT_SECONDS) -> float:
+    """Timeout for an external call under the current deadline (default if none)"""
+    deadline = current_deadline()
+    return deadline.timeout(default, minimum) if deadline else default
+
+
+def time_left(default: float = float("inf")) -> float:
+    deadline = current_deadline()
+    return deadline.remaining() if deadline else default
+
+
+def deadline_expired() -> bool:
+    deadline = current_deadline()
+    return bool(deadline and deadline.expired())
+
+
+def in_context(fn: Callable[..., Any]) -> Callable[..., Any]:
+    """Bind fn to a copy of the caller's context (deadline included), for thread pools"""
+    ctx = copy_context()
+    return lambda *args, **kwargs: ctx.run(fn, *args, **kwargs)
+
+
+# =================================================
+# GRAPH INTEGRATION
+# =================================================
+def deadline_config(seconds: float = CAMPAIGN_DEADLINE_SECONDS) -> Dict[str, Any]:
+    """configurable entries carrying a campaign deadline into graph nodes"""
+    return {"deadline_at": time.time() + seconds}
+
+
+def deadline_from_config(config: Optional[Dict[str, Any]]) -> Optional[Deadline]:
+    at = ((config or {}).get("configurable") or {}).get("deadline_at")
+    return Deadline(at) if at else None
+
+
+def with_deadline(node: Callable[..., Any], stage: str) -> Callable[..., Any]:
+    """
+    Run a graph node under its stage budget of the campaign deadline (when
+    the run has one). Works for nodes taking (state) or (state, config).
+    """
+    share = STAGE_BUDGETS.get(stage, 1.0)
+    takes_config = "config" in inspect.signature(node).parameters
+
+    def run(state, config):
+        deadline = deadline_from_config(config)
+        stage_deadline = deadline.child(share=share) if deadline else None
+
+        with deadline_scope(stage_deadline):
+            return node(state, config) if takes_config else node(state)
+
+    # No functools.wraps: LangGraph reads the signature to decide whether
+    # to pass config, and must see this wrapper's
+    run.__name__ = getattr(node, "__name__", stage)
+    run.__doc__ = node.__doc__
+    return run
+
+
+# =================================================
+# BOUNDED CALLS
+# =================================================
+_timeout_pool: Optional[ThreadPoolExecutor] = None
+_timeout_pool_lock = threading.Lock()
+
+
+def run_with_timeout(fn: Callable[[], Any], timeout: float) -> Any:
+    """
+    Result of fn, or DeadlineExceeded after `timeout` seconds (for clients
+    without a per-call timeout; the call itself finishes in the background).
+    """
+    global _timeout_pool
+    with _timeout_pool_lock:
+        if _timeout_pool is None:
+            _timeout_pool = ThreadPoolExecutor(max_workers=TIMEOUT_POOL_SIZE, thread_name_prefix="deadline")
+
+    future = _timeout_pool.submit(in_context(fn))
+    try:
+        return future.result(timeout=timeout)
+    except FutureTimeout:
+        raise DeadlineExceeded(f"Call did not finish within {timeout:.1f}s")
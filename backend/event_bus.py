@@ -0,0 +1,328 @@
+import json
+import os
+import queue
+import sqlite3
+import threading
+import time
+import uuid
+from abc import ABC, abstractmethod
+from typing import Any, Callable, Dict, Optional
+
+# =================================================
+# CONSTANTS
+# =================================================
+EVENT_BUS_URL = os.getenv("EVENT_BUS_URL", "memory://")
+EVENT_BUS_CHANNEL = "campaign-events"
+
+# Publishes waiting for the broker; beyond this new events are dropped
+EVENT_BUS_QUEUE_SIZE = 10000
+EVENT_BUS_RECONNECT_SECONDS = 2
+
+# SQLite backend: poll interval and how long rows are kept for slow readers
+SQLITE_BUS_POLL_SECONDS = 0.2
+SQLITE_BUS_RETENTION_SECONDS = 60
+
+Deliver = Callable[[str, Dict[str, Any]], None]
+
+
+# =================================================
+# IN-PROCESS BUS
+# =================================================
+class InProcessEventBus:
+    """
+    Single-worker backend: published events are delivered straight to the
+    local subscriber.
+    """
+
+    name = "memory"
+
+    def __init__(self):
+        self._deliver: Optional[Deliver] = None
+        self.published = 0
+
+    def start(self, deliver: Deliver):
+        self._deliver = deliver
+
+    def stop(self):
+        self._deliver = None
+
+    def publish(self, thread_id: str, message: Dict[str, Any]):
+        self.published += 1
+        if self._deliver:
+            self._deliver(thread_id, message)
+
+    def stats(self) -> Dict[str, Any]:
+        return {"backend": self.name, "published": self.published}
+
+
+# =================================================
+# BROKER-BACKED BUS (shared base)
+# =================================================
+class BrokerEventBus(ABC):
+    """
+    Base for backends that share events between processes; a backend
+    implements _send and _listen (and _reset_publisher if it caches one).
+
+    publish() only enqueues, so callers on the event loop or in job
+    threads never block on the broker. A publisher thread forwards the
+    queue to the broker and a subscriber thread delivers every event,
+    including this worker's own, to the local subscriber.
+    """
+
+    name = "broker"
+
+    def __init__(self, channel: str = EVENT_BUS_CHANNEL):
+        self.channel = channel
+        self.worker_id = uuid.uuid4().hex[:8]
+
+        self._deliver: Optional[Deliver] = None
+        self._outbox: "queue.Queue[Optional[str]]" = queue.Queue(maxsize=EVENT_BUS_QUEUE_SIZE)
+        self._stop = threading.Event()
+        self._threads = []
+
+        self.published = 0
+        self.delivered = 0
+        self.dropped = 0
+        self.errors = 0
+
+    # ---------------------------------------------
+    # Lifecycle
+    # ---------------------------------------------
+    def start(self, deliver: Deliver):
+        self._deliver = deliver
+        self._stop.clear()
+        self._threads = [
+            threading.Thread(target=self._publish_loop, name=f"{self.name}-bus-pub", daemon=True),
+            threading.Thread(target=self._subscribe_loop, name=f"{self.name}-bus-sub", daemon=True)
+        ]
+        for t in self._threads:
+            t.start()
+
+    def stop(self):
+        self._stop.set()
+        try:
+            self._outbox.put_nowait(None)
+        except queue.Full:
+            pass
+        for t in self._threads:
+            t.join(timeout=5)
+        self._threads = []
+
+    # ---------------------------------------------
+    # Publishing
+    # ---------------------------------------------
+    def publish(self, thread_id: str, message: Dict[str, Any]):
+        payload = json.dumps({
+            "thread_id": thread_id,
+            "message": message,
+            "origin": self.worker_id
+        }, default=str)
+
+        try:
+            self._outbox.put_nowait(payload)
+        except queue.Full:
+            self.dropped += 1
+
+    def _publish_loop(self):
+        while not self._stop.is_set():
+            payload = self._outbox.get()
+            if payload is None:
+                return
+
+            while not self._stop.is_set():
+                try:
+                    self._send(payload)
+                    self.published += 1
+                    break
+                except Exception as e:
+                    self.errors += 1
+                    print(f"Event bus publish failed ({self.name}): {e}")
+                    self._reset_publisher()
+                    self._stop.wait(EVENT_BUS_RECONNECT_SECONDS)
+
+    # ---------------------------------------------
+    # Subscribing
+    # ---------------------------------------------
+    def _subscribe_loop(self):
+        while not self._stop.is_set():
+            try:
+                self._listen()
+            except Exception as e:
+                self.errors += 1
+                print(f"Event bus subscription failed ({self.name}): {e}")
+                self._stop.wait(EVENT_BUS_RECONNECT_SECONDS)
+
+    def _dispatch(self, payload):
+        try:
+            event = json.loads(payload)
+        except (TypeError, ValueError):
+            return
+
+        if self._deliver:
+            self.delivered += 1
+            self._deliver(event["thread_id"], event["message"])
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "backend": self.name,
+            "worker_id": self.worker_id,
+            "pending": self._outbox.qsize(),
+            "published": self.published,
+            "delivered": self.delivered,
+            "dropped": self.dropped,
+            "errors": self.errors
+        }
+
+    # Backend hooks
+    @abstractmethod
+    def _send(self, payload: str):
+        """Publish one payload to the broker; raise on broker errors."""
+
+    def _reset_publisher(self):
+        pass
+
+    @abstractmethod
+    def _listen(self):
+        """Block delivering events until stopped; raise on broker errors."""
+
+
+# =================================================
+# REDIS BUS
+# =================================================
+class RedisEventBus(BrokerEventBus):
+    """
+    Pub/sub over a Redis-compatible server (Redis, Valkey, KeyDB...).
+    Requires the `redis` package.
+    """
+
+    name = "redis"
+
+    def __init__(self, url: str, channel: str = EVENT_BUS_CHANNEL):
+        super().__init__(channel)
+        import redis
+
+        self._redis = redis
+        self.url = url
+        self._client = None
+
+    def _connect(self):
+        return self._redis.Redis.from_url(self.url, socket_keepalive=True)
+
+    def _send(self, payload: str):
+        if self._client is None:
+            self._client = self._connect()
+        self._client.publish(self.channel, payload)
+
+    def _reset_publisher(self):
+        self._client = None
+
+    def _listen(self):
+        pubsub = self._connect().pubsub(ignore_subscribe_messages=True)
+        pubsub.subscribe(self.channel)
+
+        try:
+            while not self._stop.is_set():
+                msg = pubsub.get_message(timeout=1.0)
+                if msg and msg.get("type") == "message":
+                    self._dispatch(msg["data"])
+        finally:
+            pubsub.close()
+
+
+# =================================================
+# SQLITE BUS
+# =================================================
+class SqliteEventBus(BrokerEventBus):
+    """
+    Broker-less backend for workers on one host: events are appended to a
+    shared SQLite table and every worker tails it by rowid.
+    """
+
+    name = "sqlite"
+
+    def __init__(self, path: str, channel: str = EVENT_BUS_CHANNEL):
+        super().__init__(channel)
+        self.path = path
+        self._writer: Optional[sqlite3.Connection] = None
+        self._last_prune = 0.0
+
+        conn = self._connect()
+        conn.execute(
+            "CREATE TABLE IF NOT EXISTS bus_events ("
+            " id INTEGER PRIMARY KEY AUTOINCREMENT,"
+            " channel TEXT NOT NULL,"
+            " payload TEXT NOT NULL,"
+            " created_at REAL NOT NULL)"
+        )
+        conn.commit()
+        conn.close()
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(self.path, timeout=10, check_same_thread=False)
+        conn.execute("PRAGMA journal_mode=WAL")
+        return conn
+
+    def _send(self, payload: str):
+        if self._writer is None:
+            self._writer = self._connect()
+
+        now = time.time()
+        self._writer.execute(
+            "INSERT INTO bus_events (channel, payload, created_at) VALUES (?, ?, ?)",
+            (self.channel, payload, now)
+        )
+        if now - self._last_prune > SQLITE_BUS_RETENTION_SECONDS:
+            self._writer.execute(
+                "DELETE FROM bus_events WHERE created_at < ?",
+                (now - SQLITE_BUS_RETENTION_SECONDS,)
+            )
+            self._last_prune = now
+        self._writer.commit()
+
+    def _reset_publisher(self):
+        if self._writer is not None:
+            try:
+                self._writer.close()
+            except sqlite3.Error:
+                pass
+        self._writer = None
+
+    def _listen(self):
+        conn = self._connect()
+        try:
+            # Only events published after this worker subscribed
+            row = conn.execute("SELECT COALESCE(MAX(id), 0) FROM bus_events").fetchone()
+            last_id = row[0]
+
+            while not self._stop.is_set():
+                rows = conn.execute(
+                    "SELECT id, payload FROM bus_events WHERE id > ? AND channel = ? ORDER BY id",
+                    (last_id, self.channel)
+                ).fetchall()
+
+                for event_id, payload in rows:
+                    last_id = event_id
+                    self._dispatch(payload)
+
+                if not rows:
+                    self._stop.wait(SQLITE_BUS_POLL_SECONDS)
+        finally:
+            conn.close()
+
+
+# =================================================
+# Factory
+# =================================================
+def create_event_bus(url: str = EVENT_BUS_URL):
+    """
+    memory://              single worker (default)
+    redis://host:6379/0    Redis-compatible server, any number of hosts
+    sqlite:///path/bus.db  shared file, workers on one host
+    """
+    if not url or url.startswith("memory"):
+        return InProcessEventBus()
+    if url.startswith(("redis://", "rediss://", "unix://")):
+        return RedisEventBus(url)
+    if url.startswith("sqlite:///"):
+        return SqliteEventBus(url[len("sqlite:///"):])
+    raise ValueError(f"Unsupported EVENT_BUS_URL: {url}")
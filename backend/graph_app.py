@@ -1,33 +1,76 @@
-from typing import TypedDict, List, Dict, Any, Set
+from typing import Annotated, TypedDict, List, Dict, Any, Set, Callable, Iterable
 import json
 import re
 import os
+import time
+import threading
 import requests
-import dns.resolver
 from urllib.parse import urlparse, urljoin
-
-from bs4 import BeautifulSoup, XMLParsedAsHTMLWarning
 import warnings
-warnings.filterwarnings("ignore", category=XMLParsedAsHTMLWarning)
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import asynccontextmanager
 
-from ddgs import DDGS
+# bs4, ddgs, dnspython, langchain_groq and the Google client are imported
+# where they are first used, so importing this module stays cheap
 
-from langchain_groq import ChatGroq
 from langchain_core.messages import HumanMessage
 from langchain_core.tools import tool
+from langchain_core.runnables import RunnableConfig
 from langgraph.graph import StateGraph, END
+from langgraph.config import get_stream_writer
 
-import smtplib
+from smtp_pool import SMTPPool
 from email.mime.text import MIMEText
 from email.mime.multipart import MIMEMultipart
 from email.utils import make_msgid
 from datetime import datetime, timezone
 
 from pydantic import BaseModel, Field
-from langgraph.checkpoint.sqlite import SqliteSaver
 import sqlite3
 
-GROQ_API_KEY = os.getenv("GROQ_API_KEY")
+from state_projection import (
+    StateHistory,
+    StateProjection,
+    history_hook,
+    projection_hook,
+    summarize_state,
+)
+from campaign_registry import CampaignRegistry, registry_hook
+from blob_store import BlobStore, LEAD_BLOB_FIELDS, EMAIL_BLOB_FIELDS
+from sqlite_store import STATE_DB_PATH, open_async_saver
+from sharded_store import CHECKPOINT_SHARDS, ShardedSqliteSaver, shard_paths
+from retention import RetentionService
+from lazy import Lazy
+from calendar_client import create_calendar_client
+from resilience import ProviderUnavailable, check_http, fetch_url, providers
+from model_router import create_model_router
+from deadline import (
+    CAMPAIGN_DEADLINE_SECONDS,
+    Deadline,
+    DeadlineExceeded,
+    call_timeout,
+    current_deadline,
+    deadline_config,
+    deadline_expired,
+    deadline_scope,
+    in_context,
+    time_left,
+    with_deadline,
+)
+from state_channels import (
+    upsert_emails,
+    upsert_leads,
+    upsert_monitoring,
+    upsert_qualification,
+    upsert_send_logs,
+)
+from reply_scanner import ReplyScanner, normalize_message_id
+from reply_listener import ReplyListener
+from monitor_scheduler import MonitorScheduler
+from monitor_daemon import MonitorDaemon
+from jobs import JobCancelled
+
 APOLLO_API_KEY = os.getenv("APOLLO_API_KEY")
 
 # =================================================
@@ -41,14 +84,18 @@ SMTP_CONFIG = {
     "from_name": "B2B Research Team"
 }
 
+# Logged-in SMTP connections shared by all campaigns
+smtp_pool = SMTPPool(SMTP_CONFIG)
+
 # =================================================
 # LLM
 # =================================================
-model = ChatGroq(
-    api_key=GROQ_API_KEY,
-    model="llama-3.1-8b-instant",
-    temperature=0
-)
+# Each task has its own model tier (model_router.TASK_CONFIG): fast
+# models for extraction and summaries, larger ones for drafting emails
+model_router = Lazy(create_model_router, "model_router")
+
+extraction_model = Lazy(lambda: model_router.for_task("extraction"), "extraction_model")
+summary_model = Lazy(lambda: model_router.for_task("summary"), "summary_model")
 
 # =================================================
 # Structure LLM
@@ -61,43 +108,65 @@ class EmailDraft(BaseModel):
         description="Plain text B2B cold email body, 100-200 words, no placeholders"
     )
 
-structured_email_model = model.with_structured_output(EmailDraft)
+cold_email_model = Lazy(
+    lambda: model_router.for_task("cold_email").with_structured_output(EmailDraft), "cold_email_model"
+)
+followup_email_model = Lazy(
+    lambda: model_router.for_task("followup").with_structured_output(EmailDraft), "followup_email_model"
+)
 
 # =================================================
 # CHECKPOINTER (PERSIST STATE)
 # =================================================
-conn = sqlite3.connect("lead_graph_state.db", check_same_thread=False)
+# Per-thread summaries kept current on every checkpoint write
+state_projection = StateProjection()
 
-checkpointer = SqliteSaver(conn=conn)
+# Versioned snapshots and patches for delta sync to clients
+state_history = StateHistory()
 
-# =================================================
-# GOOGLE CALENDAR SETUP (ONE TIME)
-# =================================================
-from google.oauth2.credentials import Credentials
-from google_auth_oauthlib.flow import InstalledAppFlow
-from googleapiclient.discovery import build
-from google.auth.transport.requests import Request
+# Indexed campaign listing (thread id, query, mode, phase, counters)
+campaign_registry = Lazy(lambda: CampaignRegistry(STATE_DB_PATH), "campaign_registry")
 
-CAL_SCOPES = ['https://www.googleapis.com/auth/calendar']
+# Large text (site samples, summaries, email bodies) lives here; state
+# only carries references
+blob_store = Lazy(lambda: BlobStore(STATE_DB_PATH), "blob_store")
 
-def get_calendar_service():
-    creds = None
-    if os.path.exists("token.json"):
-        creds = Credentials.from_authorized_user_file("token.json", CAL_SCOPES)
-
-    if not creds or not creds.valid:
-        if creds and creds.expired and creds.refresh_token:
-            creds.refresh(Request())
-        else:
-            flow = InstalledAppFlow.from_client_secrets_file(
-                "credentials.json", CAL_SCOPES
-            )
-            creds = flow.run_local_server(port=0)
+def create_checkpointer(db_path: str = STATE_DB_PATH, shards: int = CHECKPOINT_SHARDS) -> ShardedSqliteSaver:
+    """
+    WAL-mode databases, one connection per thread, with threads spread over
+    `shards` files by consistent hashing (db_path is shard 0). Projection,
+    history and registry hooks are attached.
+    """
+    saver = ShardedSqliteSaver(shard_paths(db_path, shards))
+    saver.add_hook(projection_hook(state_projection))
+    saver.add_hook(history_hook(state_history))
+    saver.add_hook(registry_hook(campaign_registry))
+    return saver
+
+# Opened on first use (STATE_DB_PATH, CHECKPOINT_SHARDS env vars)
+checkpointer = Lazy(create_checkpointer, "checkpointer")
+
+def list_thread_ids() -> List[str]:
+    """
+    All campaign thread ids that have at least one checkpoint (every shard).
+    """
+    return checkpointer.thread_ids()
+
+def latest_checkpoint_id(thread_id: str) -> str | None:
+    """
+    Id of the newest checkpoint of a thread (an index lookup, no state load).
+    """
+    return checkpointer.latest_checkpoint_id(thread_id)
 
-        with open("token.json", "w") as token:
-            token.write(creds.to_json())
+# =================================================
+# GOOGLE CALENDAR
+# =================================================
+# Cached service with background token refresh, batched inserts and a
+# free/busy cache (CALENDAR_BACKEND=fake for an in-memory calendar)
+calendar_client = Lazy(create_calendar_client, "calendar_client")
 
-    return build("calendar", "v3", credentials=creds)
+def get_calendar_service():
+    return calendar_client.service()
 
 # =================================================
 # CONSTANTS
@@ -123,6 +192,13 @@ DISPOSABLE_DOMAINS = {
     "tempmail.com", "yopmail.com"
 }
 
+# Deadline handling: LLM steps need at least this long to be attempted;
+# leads researched with skipped steps keep this share of their confidence
+LLM_MIN_SECONDS = 3
+PARTIAL_RESEARCH_CONFIDENCE_FACTOR = 0.5
+SMTP_SEND_TIMEOUT_SECONDS = 30
+SMTP_MIN_TIMEOUT_SECONDS = 5
+
 ICP_CONFIG = {
     "industries": {"ai", "saas", "fintech"},
     "company_sizes": {"small", "medium"},
@@ -133,6 +209,28 @@ ICP_CONFIG = {
 # =================================================
 # Helper
 # =================================================
+def emit_event(event: str, **data):
+    """
+    Push a progress event to the caller's stream (custom stream mode).
+    No-op when the graph is invoked without streaming.
+    """
+    try:
+        writer = get_stream_writer()
+    except RuntimeError:
+        return
+    writer({"event": event, **data})
+
+def bound_smtp_timeout(server):
+    """Cap the socket timeout of a pooled SMTP connection to the campaign deadline"""
+    if getattr(server, "sock", None) is not None:
+        server.sock.settimeout(call_timeout(SMTP_SEND_TIMEOUT_SECONDS, minimum=SMTP_MIN_TIMEOUT_SECONDS))
+
+def parse_html(text: str):
+    """BeautifulSoup tree of an HTML page"""
+    from bs4 import BeautifulSoup, XMLParsedAsHTMLWarning
+    warnings.filterwarnings("ignore", category=XMLParsedAsHTMLWarning)
+    return BeautifulSoup(text, "html.parser")
+
 def is_real_company_site(domain: str) -> bool:
     reject_keywords = [
         "news", "blog", "mag", "tracker", "directory",
@@ -236,56 +334,37 @@ def calculate_research_confidence(
     return round(score, 2)
 
 
-import imaplib
-import email
-import time
-
 IMAP_CONFIG = {
     "host": "imap.gmail.com",
     "username": SMTP_CONFIG["username"],
     "password": SMTP_CONFIG["password"]
 }
 
-def check_reply_for_message_id(message_id: str) -> bool:
-    """
-    Check Gmail inbox for replies to a specific Message-ID
-    using IMAP HEADER search (In-Reply-To / References).
-    """
-
-    # Gmail IMAP requires Message-ID WITHOUT <>
-    search_id = message_id.strip("<>")
-
-    mail = imaplib.IMAP4_SSL(IMAP_CONFIG["host"])
-    mail.login(IMAP_CONFIG["username"], IMAP_CONFIG["password"])
-    mail.select("inbox")
-
-    # Search by In-Reply-To
-    status, data = mail.search(
-        None,
-        f'HEADER "In-Reply-To" "{search_id}"'
-    )
+# One IMAP session and Message-ID index shared by every campaign
+reply_scanner = ReplyScanner(IMAP_CONFIG)
 
-    if status == "OK" and data[0]:
-        mail.logout()
-        return True
+# IMAP IDLE doorbell that wakes campaigns when a reply lands
+reply_listener = ReplyListener(reply_scanner, IMAP_CONFIG)
 
-    # Fallback: search by References
-    status, data = mail.search(
-        None,
-        f'HEADER "References" "{search_id}"'
-    )
+# Follow-up / expiry timers for every monitored message
+monitor_scheduler = MonitorScheduler()
 
-    if status == "OK" and data[0]:
-        mail.logout()
-        return True
+def check_reply_for_message_id(message_id: str, thread_id: str = "") -> bool:
+    """
+    Check the inbox for replies to a specific Message-ID
+    using the shared incremental reply scanner.
+    """
+    reply_scanner.watch(message_id, thread_id)
+    reply_scanner.poll()
+    return reply_scanner.has_reply(message_id)
 
-    mail.logout()
-    return False
 
+FOLLOWUP_DRAFT_CONCURRENCY = 4
+FOLLOWUP_RETRY_SECONDS = 60
 
-def generate_followup_email(lead: Dict[str, Any], followup_no: int, sender: Dict[str, Any]) -> EmailDraft:
+def build_followup_prompt(lead: Dict[str, Any], followup_no: int, sender: Dict[str, Any]) -> str:
 
-    prompt = f"""
+    return f"""
 Write a professional B2B follow-up email.
 
 Rules:
@@ -332,16 +411,46 @@ Tone:
 - Follow-up 2 → final polite check-in
 """
 
-    return structured_email_model.invoke(
+
+def generate_followup_email(lead: Dict[str, Any], followup_no: int, sender: Dict[str, Any]) -> EmailDraft:
+
+    prompt = build_followup_prompt(lead, followup_no, sender)
+
+    return followup_email_model.invoke(
         [HumanMessage(content=prompt)]
     )
 
 
+def generate_followup_emails(items: List[Dict[str, Any]], sender: Dict[str, Any]) -> List[Any]:
+    """
+    Draft many follow-ups concurrently.
+    Each request is {"lead": ..., "followup_no": ...}; failed drafts come
+    back as the exception instead of an EmailDraft.
+    """
+    prompts = [
+        [HumanMessage(content=build_followup_prompt(r["lead"], r["followup_no"], sender))]
+        for r in items
+    ]
+
+    try:
+        return followup_email_model.batch(
+            prompts,
+            config={"max_concurrency": FOLLOWUP_DRAFT_CONCURRENCY},
+            return_exceptions=True
+        )
+    except (ProviderUnavailable, DeadlineExceeded) as e:
+        # Every follow-up is retried later, like a failed draft
+        return [e] * len(prompts)
+
+
 # ======================================
 # CAMPAIGN RUNNER
 # ======================================
+MONITOR_CHECK_SECONDS = 60
+
 def run_campaign(app, thread_id: str):
     print("Campaign started")
+    reply_listener.start()
 
     while True:
         state = app.invoke(
@@ -358,8 +467,16 @@ def run_campaign(app, thread_id: str):
             print("Campaign finished")
             break
 
-        print("Monitoring... next check in 60s")
-        time.sleep(60)
+        # Sleep until the next follow-up/expiry is due, or a reply arrives
+        next_due = monitor_scheduler.next_due(thread_id)
+        timeout = (
+            max(0.0, next_due - time.time())
+            if next_due is not None
+            else MONITOR_CHECK_SECONDS
+        )
+
+        print(f"Monitoring... next check in {timeout:.0f}s or on reply")
+        reply_listener.wait_for_thread(thread_id, timeout=timeout)
 
 
 # =================================================
@@ -370,15 +487,19 @@ class LeadState(TypedDict):
     companies: List[Dict[str, str]]
     current_company: Dict[str, str]
     site_text: str
-    leads: List[Dict[str, Any]]
-    qualification: List[Dict[str, Any]]
-    emails: List[Dict[str, Any]]
-    email_send_logs: List[Dict[str, Any]]
-    monitoring: List[Dict[str, Any]]
+    # Keyed channels: nodes return only new/changed items, merged by key
+    leads: Annotated[List[Dict[str, Any]], upsert_leads]
+    qualification: Annotated[List[Dict[str, Any]], upsert_qualification]
+    emails: Annotated[List[Dict[str, Any]], upsert_emails]
+    email_send_logs: Annotated[List[Dict[str, Any]], upsert_send_logs]
+    monitoring: Annotated[List[Dict[str, Any]], upsert_monitoring]
     active_monitor: Dict[str, Any]
+    followup_queue: List[Dict[str, Any]]
     source: str
 
     start_from_writer: bool
+    # Companies were discovered up front (bulk submission); planner is skipped
+    skip_discovery: bool
     phase: str
 
     human_decision: Dict[str, Any]
@@ -421,7 +542,10 @@ def apollo_company_search(
         "per_page": per_page
     }
 
-    resp = requests.post(url, headers=headers, json=payload, timeout=15)
+    apollo = providers["apollo"]
+    resp = apollo.call(
+        lambda: check_http(requests.post(url, headers=headers, json=payload, timeout=call_timeout(apollo.timeout)))
+    )
     if resp.status_code != 200:
         return []
 
@@ -450,27 +574,32 @@ def web_company_search(query: str) -> List[Dict[str, str]]:
     Search the web for real B2B company websites matching the query.
     Filters out media, blogs, directories, and aggregators.
     """
+    from ddgs import DDGS
+
+    def search():
+        with DDGS(timeout=int(call_timeout(providers["ddg"].timeout))) as ddgs:
+            return list(ddgs.text(query, max_results=15))
+
     companies = []
-    with DDGS() as ddgs:
-        for r in ddgs.text(query, max_results=15):
-            if r.get("href"):
-                domain = urlparse(r["href"]).netloc.lower()
-                if (
-                    domain
-                    and not any(bad in domain for bad in BAD_DOMAINS)
-                    and is_real_company_site(domain)
-                ):
-                    parts = domain.split(".")
-                    if len(parts) >= 2:
-                        company_key = parts[-2]
-                    else:
-                        company_key = parts[0]
-
-                    companies.append({
-                        "company_name": company_key.replace("-", " ").title(),
-                        "company_website": f"https://{domain}",
-                        "domain": domain
-                    })
+    for r in providers["ddg"].call(search):
+        if r.get("href"):
+            domain = urlparse(r["href"]).netloc.lower()
+            if (
+                domain
+                and not any(bad in domain for bad in BAD_DOMAINS)
+                and is_real_company_site(domain)
+            ):
+                parts = domain.split(".")
+                if len(parts) >= 2:
+                    company_key = parts[-2]
+                else:
+                    company_key = parts[0]
+
+                companies.append({
+                    "company_name": company_key.replace("-", " ").title(),
+                    "company_website": f"https://{domain}",
+                    "domain": domain
+                })
     return companies[:5]
 
 
@@ -485,15 +614,17 @@ def deep_crawl_site(url: str, max_pages: int = 6) -> str:
     base_domain = urlparse(url).netloc
     combined = ""
 
-    while to_visit and len(visited) < max_pages:
+    # Fewer pages when the campaign deadline is reached
+    while to_visit and len(visited) < max_pages and not deadline_expired():
         current = to_visit.pop(0)
         if current in visited:
             continue
         visited.add(current)
 
         try:
-            r = requests.get(current, headers=HEADERS, timeout=10)
-            soup = BeautifulSoup(r.text, "html.parser")
+            # Rate limited, per-host breaker, hedged when the site is slow
+            r = fetch_url(requests.get, current, key=base_domain, headers=HEADERS)
+            soup = parse_html(r.text)
             for t in soup(["script", "style", "noscript"]):
                 t.decompose()
             combined += " " + soup.get_text(" ", strip=True)
@@ -502,6 +633,9 @@ def deep_crawl_site(url: str, max_pages: int = 6) -> str:
                 link = urljoin(current, a["href"])
                 if urlparse(link).netloc == base_domain:
                     to_visit.append(link)
+        except ProviderUnavailable:
+            # Site keeps failing; stop instead of timing out page by page
+            break
         except:
             pass
 
@@ -521,11 +655,22 @@ def extract_and_validate_emails(text: str, domain: str) -> List[str]:
     else:
         root_domain = domain.lower()
 
+    import dns.resolver
+
     found = set(re.findall(EMAIL_REGEX, text))
     emails = []
 
+    def has_mx() -> bool:
+        # A missing domain is an answer, not a resolver failure
+        try:
+            dns.resolver.resolve(root_domain, "MX", lifetime=call_timeout(providers["dns"].timeout))
+            return True
+        except (dns.resolver.NXDOMAIN, dns.resolver.NoAnswer):
+            return False
+
     try:
-        dns.resolver.resolve(root_domain, "MX")
+        if not providers["dns"].call(has_mx):
+            return []
     except:
         return []
 
@@ -573,75 +718,207 @@ tools = [
     extract_and_validate_emails,
     detect_decision_maker_roles
 ]
-model_with_tools = model.bind_tools(tools)
+model_with_tools = Lazy(lambda: model_router.for_task("tools").bind_tools(tools), "model_with_tools")
 
 
 # =================================================
 # NODES
 # =================================================
 def human_sender_profile_node(state: LeadState) -> LeadState:
-    if state.get("sender_profile"):
-        return state 
-
-    return state
+    return {}
 
 
 def planner_node(state: LeadState) -> LeadState:
     if state.get("phase") == "monitor":
-        return state
+        return {}
     if state.get("start_from_writer"):
-        return state
+        return {}
+    if state.get("skip_discovery"):
+        return {}
+
+    companies, source = discover_companies(state["query"])
+
+    for company in companies:
+        emit_event(
+            "company_discovered",
+            company_name=company["company_name"],
+            domain=company["domain"],
+            source=source
+        )
 
-    apollo_results = apollo_company_search.invoke({
-        "query": state["query"]
-    })
+    return {"companies": companies, "source": source}
 
-    if apollo_results:
-        state["companies"] = apollo_results
-        state["source"] = "apollo"
-        return state
 
-    web_results = web_company_search.invoke({
-        "query": state["query"]
-    })
+# =================================================
+# DISCOVERY / RESEARCH (shared by single and bulk campaigns)
+# =================================================
+# Researched leads per domain, reused across campaigns; least recently
+# used domains are evicted past RESEARCH_CACHE_SIZE
+RESEARCH_CACHE_TTL_SECONDS = 6 * 3600
+RESEARCH_CACHE_SIZE = 2000
+research_cache: "OrderedDict[str, tuple]" = OrderedDict()
+research_cache_lock = threading.Lock()
+# domain -> [lock, callers using it]; dropped when the last caller is done
+research_domain_locks: Dict[str, list] = {}
+
+def cached_research(domain: str) -> Dict[str, Any] | None:
+    with research_cache_lock:
+        cached = research_cache.get(domain)
+        if cached is None:
+            return None
+        if time.time() - cached[0] >= RESEARCH_CACHE_TTL_SECONDS:
+            del research_cache[domain]
+            return None
+        research_cache.move_to_end(domain)
+        return cached[1]
+
+def cache_research(domain: str, lead: Dict[str, Any]):
+    with research_cache_lock:
+        research_cache[domain] = (time.time(), lead)
+        research_cache.move_to_end(domain)
+        while len(research_cache) > RESEARCH_CACHE_SIZE:
+            research_cache.popitem(last=False)
+
+def discover_companies(query: str) -> tuple:
+    """
+    Find candidate companies for a query: Apollo first, web search as
+    fallback. Returns (companies, source).
+    """
+    # An open Apollo circuit fails fast here and goes straight to the web
+    try:
+        apollo_results = apollo_company_search.invoke({
+            "query": query
+        })
+    except Exception as e:
+        print(f"Apollo search failed, using web search: {e}")
+        apollo_results = []
 
-    state["companies"] = web_results
-    state["source"] = "web"
-    return state
+    if apollo_results:
+        return apollo_results, "apollo"
 
+    try:
+        return web_company_search.invoke({
+            "query": query
+        }), "web"
+    except ProviderUnavailable as e:
+        print(f"Web search unavailable: {e}")
+        return [], "web"
+
+def plan_bulk_discovery(
+    queries: List[str],
+    max_workers: int = 4,
+    deadline_seconds: float | None = CAMPAIGN_DEADLINE_SECONDS
+) -> List[Dict[str, Any]]:
+    """
+    One combined discovery pass for many queries. Queries are searched
+    concurrently and each domain is kept only by the first query that
+    found it, so no company is researched or emailed twice.
+    """
+    deadline = Deadline.after(deadline_seconds) if deadline_seconds else None
+
+    with deadline_scope(deadline), ThreadPoolExecutor(max_workers=max(1, min(max_workers, len(queries)))) as pool:
+        # Each search runs in its own copy of the context (with the deadline)
+        futures = [pool.submit(in_context(discover_companies), query) for query in queries]
+        results = [future.result() for future in futures]
+
+    seen_domains: Set[str] = set()
+    plans = []
+
+    for query, (companies, source) in zip(queries, results):
+        unique = []
+        for company in companies:
+            domain = (company.get("domain") or "").lower()
+            if not domain or domain in seen_domains:
+                continue
+            seen_domains.add(domain)
+            unique.append({**company, "source": company.get("source", source)})
+
+        plans.append({
+            "query": query,
+            "companies": unique,
+            "source": source,
+            "duplicates": len(companies) - len(unique)
+        })
 
-def research_node(state: LeadState) -> LeadState:
-    """Research ALL companies before moving to qualifier"""
-    if state.get("phase") == "monitor":
-        return state
-    if state.get("start_from_writer"):
-        return state
+    return plans
 
-    while state["companies"]:
-        company = state["companies"].pop(0)
+def research_company(company: Dict[str, Any], source: str = "web") -> Dict[str, Any]:
+    """
+    Crawl and enrich one company into a lead. Results are cached per
+    domain, and concurrent campaigns researching the same domain wait
+    for a single crawl instead of repeating it.
+    """
+    domain = (company.get("domain") or "").lower()
 
-        site_text = deep_crawl_site.invoke(company["company_website"])
+    with research_cache_lock:
+        entry = research_domain_locks.setdefault(domain, [threading.Lock(), 0])
+        entry[1] += 1
 
+    try:
+        with entry[0]:
+            cached = cached_research(domain)
+            if cached is not None:
+                return {
+                    **cached,
+                    "company_name": company["company_name"],
+                    "source": company.get("source", source)
+                }
+
+            lead = crawl_and_enrich(company, source)
+
+            # Deadline-cut research is not reused by other campaigns
+            if not lead.get("research_partial"):
+                cache_research(domain, lead)
+
+        return lead
+    finally:
+        with research_cache_lock:
+            entry[1] -= 1
+            if entry[1] == 0:
+                research_domain_locks.pop(domain, None)
+
+def crawl_and_enrich(company: Dict[str, Any], source: str) -> Dict[str, Any]:
+    """
+    Crawl a company site and extract the lead fields (no caching). Under a
+    deadline, steps that do not fit are skipped and the lead is marked
+    research_partial with a lower confidence.
+    """
+    skipped: List[str] = []
+
+    site_text = deep_crawl_site.invoke(company["company_website"])
+    if deadline_expired():
+        skipped.append("crawl")
+    emit_event(
+        "crawl_done",
+        company_name=company["company_name"],
+        domain=company["domain"],
+        chars=len(site_text)
+    )
+
+    if deadline_expired():
+        emails = []
+        skipped.append("email_validation")
+    else:
         emails = extract_and_validate_emails.invoke({
             "text": site_text,
             "domain": company["domain"]
         })
 
-        decision_maker_roles = detect_decision_maker_roles.invoke(site_text)
+    decision_maker_roles = detect_decision_maker_roles.invoke(site_text)
 
-        industry = company.get("industry", "unknown")
+    industry = company.get("industry", "unknown")
 
-        company_size = normalize_company_size(
-            company.get("estimated_employees")
-        )
+    company_size = normalize_company_size(
+        company.get("estimated_employees")
+    )
 
-        intent_signals = map_keywords_to_intent(
-            company.get("keywords", [])
-        )
+    intent_signals = map_keywords_to_intent(
+        company.get("keywords", [])
+    )
 
-        pain_points = []
+    pain_points = []
 
-        prompt = f"""
+    prompt = f"""
 Extract business facts ONLY from text.
 DO NOT invent names for decision_makers.
 Try to fill the intent_signals & pain_points field with help of text.
@@ -666,29 +943,37 @@ TEXT:
 {site_text[:3500]}
 """
 
-        response = model.invoke([HumanMessage(content=prompt)])
-        raw = response.content.replace("```", "").replace("json", "").strip()
+    # Without the LLM (open circuit, no time left) the heuristic fields are kept
+    raw = ""
+    if time_left() < LLM_MIN_SECONDS:
+        skipped.append("enrichment")
+    else:
+        try:
+            response = extraction_model.invoke([HumanMessage(content=prompt)])
+            raw = response.content.replace("```", "").replace("json", "").strip()
+        except (ProviderUnavailable, DeadlineExceeded):
+            skipped.append("enrichment")
 
 
-        try:
-            enriched = json.loads(raw)
-            industry = normalize_industry(
-                enriched.get("industry", industry)
-            )
+    try:
+        enriched = json.loads(raw)
+        industry = normalize_industry(
+            enriched.get("industry", industry)
+        )
 
-            company_size = normalize_company_size_llm(
-                enriched.get("company_size", company_size)
-            )
-            pain_points = enriched.get("pain_points", [])
+        company_size = normalize_company_size_llm(
+            enriched.get("company_size", company_size)
+        )
+        pain_points = enriched.get("pain_points", [])
 
-            if not intent_signals:
-                intent_signals = enriched.get("intent_signals", [])
+        if not intent_signals:
+            intent_signals = enriched.get("intent_signals", [])
 
-        except:
-            pain_points = []
+    except:
+        pain_points = []
 
 
-        summary_prompt = f"""
+    summary_prompt = f"""
 Summarize the following company website text in a clear, descriptive, business-focused way.
 Do NOT say "Here is", "Summary:", or similar phrases.
 You must return ONLY the summary text.
@@ -705,52 +990,101 @@ TEXT:
 {site_text[:3000]}
 """
 
-        summary_response = model.invoke(
-            [HumanMessage(content=summary_prompt)]
-        )
-
-        website_summary = summary_response.content.strip()
+    website_summary = site_text[:600].strip()
+    if time_left() < LLM_MIN_SECONDS:
+        skipped.append("summary")
+    else:
+        try:
+            summary_response = summary_model.invoke(
+                [HumanMessage(content=summary_prompt)]
+            )
+            website_summary = summary_response.content.strip()
+        except (ProviderUnavailable, DeadlineExceeded):
+            skipped.append("summary")
 
 
-        email_quality = get_email_quality(emails)
+    email_quality = get_email_quality(emails)
 
-        intent_confidence = get_intent_confidence(intent_signals)
+    intent_confidence = get_intent_confidence(intent_signals)
 
-        research_confidence = calculate_research_confidence(
-            industry=industry,
-            company_size=company_size,
-            emails=emails,
-            people=decision_maker_roles,
-            intent_signals=intent_signals
+    research_confidence = calculate_research_confidence(
+        industry=industry,
+        company_size=company_size,
+        emails=emails,
+        people=decision_maker_roles,
+        intent_signals=intent_signals
+    )
+    if skipped:
+        research_confidence = round(research_confidence * PARTIAL_RESEARCH_CONFIDENCE_FACTOR, 2)
+        emit_event(
+            "research_partial",
+            company_name=company["company_name"],
+            domain=company["domain"],
+            skipped=skipped
         )
 
-        state["leads"].append({
-            "company_name": company["company_name"],
-            "company_website": company["company_website"],
-            "domain": company["domain"],
+    lead = {
+        "company_name": company["company_name"],
+        "company_website": company["company_website"],
+        "domain": company["domain"],
 
-            "industry": industry,
-            "company_size": company_size,
+        "industry": industry,
+        "company_size": company_size,
 
-            "intent_signals": intent_signals,
-            "intent_confidence": intent_confidence,
+        "intent_signals": intent_signals,
+        "intent_confidence": intent_confidence,
 
-            "pain_points": pain_points,
+        "pain_points": pain_points,
 
-            "decision_makers": decision_maker_roles,
+        "decision_makers": decision_maker_roles,
 
-            "validated_emails": emails,
-            "email_quality": email_quality,
+        "validated_emails": emails,
+        "email_quality": email_quality,
 
-            "website_summary": website_summary,
-            "website_text_sample": site_text[:900],
+        "website_summary": website_summary,
+        "website_text_sample": site_text[:900],
 
-            "research_confidence": research_confidence,
+        "research_confidence": research_confidence,
+        # Steps skipped to stay within the campaign deadline
+        "research_partial": skipped,
 
-            "source": company.get("source", state.get("source", "web")),
-        })
+        "source": company.get("source", source),
+    }
 
-    return state
+    # Large text goes to the blob store; state keeps references
+    return blob_store.offload(lead, LEAD_BLOB_FIELDS)
+
+
+def research_node(state: LeadState) -> LeadState:
+    """Research ALL companies before moving to qualifier"""
+    if state.get("phase") == "monitor":
+        return {}
+    if state.get("start_from_writer"):
+        return {}
+
+    companies = list(state["companies"])
+    new_leads = []
+    deadline = current_deadline()
+
+    while companies:
+        company = companies.pop(0)
+
+        # Each company gets a fair share of the research time still left
+        budget = deadline.child(seconds=deadline.remaining() / (len(companies) + 1)) if deadline else None
+        with deadline_scope(budget):
+            lead = research_company(company, state.get("source", "web"))
+        new_leads.append(lead)
+
+        emit_event(
+            "lead_researched",
+            company_name=company["company_name"],
+            domain=company["domain"],
+            industry=lead["industry"],
+            research_confidence=lead["research_confidence"],
+            remaining=len(companies)
+        )
+
+    return {"companies": [], "leads": new_leads}
 
 
 def qualifier_node(state: LeadState) -> LeadState:
@@ -758,9 +1092,9 @@ def qualifier_node(state: LeadState) -> LeadState:
     Rule-based qualification of researched leads.
     """
     if state.get("phase") == "monitor":
-        return state
+        return {}
     if state.get("start_from_writer"):
-        return state
+        return {}
 
     qualified_results = []
 
@@ -802,9 +1136,14 @@ def qualifier_node(state: LeadState) -> LeadState:
             "qualification_reason": reasons
         })
 
-    state["qualification"] = qualified_results
+        emit_event(
+            "lead_qualified",
+            company_name=lead["company_name"],
+            qualification_score=score,
+            qualified=score >= ICP_CONFIG["min_score"]
+        )
 
-    return state
+    return {"qualification": qualified_results}
 
 def qualifier_router(state: LeadState):
     """Only go to writer if any lead has score ≥ 70"""
@@ -822,7 +1161,7 @@ def writer_node(state: LeadState) -> LeadState:
     using schema-enforced structured output.
     """
     if state.get("phase") == "monitor":
-        return state
+        return {}
 
     emails_to_send = []
 
@@ -875,7 +1214,7 @@ Sender Role
 sender company
 
 Company Summary:
-{lead["website_summary"]}
+{blob_store.resolve(lead["website_summary"])}
 
 Pain Points:
 {lead["pain_points"]}
@@ -884,20 +1223,31 @@ Intent Signals:
 {lead["intent_signals"]}
 """
 
-        email_draft: EmailDraft = structured_email_model.invoke(
-            [HumanMessage(content=prompt)]
-        )
+        try:
+            email_draft: EmailDraft = cold_email_model.invoke(
+                [HumanMessage(content=prompt)]
+            )
+        except (ProviderUnavailable, DeadlineExceeded) as e:
+            # Best effort under the deadline: the other drafts still go out
+            emit_event("draft_skipped", company_name=lead["company_name"], reason=str(e))
+            continue
 
         for email_addr in lead["validated_emails"]:
-            emails_to_send.append({
+            emails_to_send.append(blob_store.offload({
                 "company_name": lead["company_name"],
                 "email": email_addr,
                 "email_subject": email_draft.subject,
                 "email_body": email_draft.body
-            })
+            }, EMAIL_BLOB_FIELDS))
 
-    state["emails"] = emails_to_send
-    return state
+        emit_event(
+            "draft_ready",
+            company_name=lead["company_name"],
+            subject=email_draft.subject,
+            recipients=len(lead["validated_emails"])
+        )
+
+    return {"emails": emails_to_send}
 
 
 
@@ -906,16 +1256,11 @@ def sender_node(state: LeadState) -> LeadState:
     Sender Agent: Sends emails and logs Message-IDs for monitoring.
     """
     if state.get("phase") == "monitor":
-        return state
+        return {}
 
     sent_logs = []
 
-    with smtplib.SMTP(SMTP_CONFIG["host"], SMTP_CONFIG["port"]) as server:
-        server.starttls()
-        server.login(
-            SMTP_CONFIG["username"],
-            SMTP_CONFIG["password"]
-        )
+    with smtp_pool.connection() as server:
 
         for item in state.get("emails", []):
             try:
@@ -928,8 +1273,9 @@ def sender_node(state: LeadState) -> LeadState:
                 message_id = make_msgid()
                 msg["Message-ID"] = message_id
 
-                msg.attach(MIMEText(item["email_body"], "plain"))
+                msg.attach(MIMEText(blob_store.resolve(item["email_body"]), "plain"))
 
+                bound_smtp_timeout(server)
                 server.send_message(msg)
 
                 sent_logs.append({
@@ -939,6 +1285,7 @@ def sender_node(state: LeadState) -> LeadState:
                     "status": "sent",
                     "sent_at": datetime.utcnow().isoformat()
                 })
+                emit_event("email_sent", company_name=item["company_name"], email=item["email"])
 
             except Exception as e:
                 sent_logs.append({
@@ -950,17 +1297,15 @@ def sender_node(state: LeadState) -> LeadState:
                     "sent_at": datetime.utcnow().isoformat()
                 })
 
-    state["email_send_logs"] = sent_logs
-
     now = datetime.now(timezone.utc).isoformat()
 
-    state["monitoring"] = []
+    new_monitoring = []
 
-    for log in state["email_send_logs"]:
+    for log in sent_logs:
         if log["status"] != "sent":
             continue
 
-        state["monitoring"].append({
+        new_monitoring.append({
             "company_name": log["company_name"],
             "email": log["email"],
             "message_id": log["message_id"],
@@ -977,19 +1322,18 @@ def sender_node(state: LeadState) -> LeadState:
             "monitor_status": "active"
         })
 
-    state["phase"] = "monitor"
-    return state
+    return {
+        "email_send_logs": sent_logs,
+        "monitoring": new_monitoring,
+        "phase": "monitor"
+    }
 
 def human_send_approval_node(state: LeadState) -> LeadState:
     """
     Pause graph and wait for human input:
     send_first_email: yes / no
     """
-    # If decision already exists, just continue
-    if state.get("human_decision", {}).get("send_first_email") is not None:
-        return state
-
-    return state
+    return {}
 
 def human_send_router(state: LeadState):
     decision = state["human_decision"].get("send_first_email")
@@ -998,229 +1342,491 @@ def human_send_router(state: LeadState):
     return END
 
 
-from datetime import datetime, timezone
-
-def monitor_node(state: LeadState) -> LeadState:
+def monitor_node(state: LeadState, config: RunnableConfig) -> LeadState:
+    """
+    Handle every reply, follow-up and expiry that is due, in one pass.
+    Timers come from the deadline scheduler, replies from the IMAP scanner.
+    Replies still waiting for a meeting decision are handed to the human
+    one at a time (active_monitor), on this pass or a later one.
+    """
     now = datetime.now(timezone.utc)
+    thread_id = config.get("configurable", {}).get("thread_id", "")
+
+    if monitor_scheduler.ensure_loaded(thread_id, state["monitoring"]):
+        reply_scanner.watch_all(state["monitoring"], thread_id)
+
+    # One incremental IMAP fetch covers every monitored message;
+    # skipped while the IDLE listener is already pushing changes
+    if not reply_listener.push_active:
+        reply_scanner.poll()
+
+    replied = reply_scanner.take_replies(thread_id)
+    due = monitor_scheduler.pop_due(thread_id, now.timestamp())
+
+    entries = {normalize_message_id(m["message_id"]): m for m in state["monitoring"]}
+
+    if not replied and not due:
+        return {"active_monitor": pending_reply(entries.values())}
+
+    updates = []
+    followup_queue = list(state.get("followup_queue") or [])
 
-    for m in state["monitoring"]:
-        if m["monitor_status"] != "active":
+    for message_id in replied:
+        m = entries.get(message_id)
+        if not m or m["monitor_status"] != "active":
             continue
 
-        start = datetime.fromisoformat(m["monitor_started_at"])
-        elapsed = (now - start).total_seconds()
+        update = {
+            "message_id": m["message_id"],
+            "reply_received": True,
+            "last_checked_at": now.isoformat()
+        }
+        updates.append(update)
+        entries[message_id] = {**m, **update}
+        # Cancels its follow-up and expiry timers
+        monitor_scheduler.schedule(thread_id, entries[message_id])
+        emit_event("reply_received", company_name=m["company_name"], email=m["email"])
+
+    for message_id, kind in due:
+        m = entries.get(normalize_message_id(message_id))
+        if not m or m.get("reply_received") or m["monitor_status"] != "active":
+            continue
 
-        if not m["reply_received"]:
-            if check_reply_for_message_id(m["message_id"]):
-                m["reply_received"] = True
-                m["last_checked_at"] = now.isoformat()
-                state["active_monitor"] = m
-                return state
+        if kind == "expire":
+            # Due whether or not the follow-ups could be sent
+            updates.append({"message_id": m["message_id"], "monitor_status": "expired"})
+            entries[normalize_message_id(message_id)] = {**m, "monitor_status": "expired"}
+            # Cancels a pending follow-up timer
+            monitor_scheduler.schedule(thread_id, entries[normalize_message_id(message_id)])
+            reply_scanner.unwatch(m["message_id"])
+            continue
 
-        if elapsed >= 60 and not m["followup_1_sent"]:
-            state["active_monitor"] = m
-            return state
+        followup_queue.append({
+            "message_id": m["message_id"],
+            "followup_no": 1 if kind == "followup_1" else 2
+        })
 
-        if elapsed >= 420 and not m["followup_2_sent"]:
-            state["active_monitor"] = m
-            return state
+    return {
+        "monitoring": updates,
+        "active_monitor": pending_reply(entries.values()),
+        "followup_queue": followup_queue
+    }
 
-        if elapsed >= 600:
-            m["monitor_status"] = "expired"
 
-    state["active_monitor"] = {}
-    return state
+def pending_reply(entries: Iterable[Dict[str, Any]]) -> Dict[str, Any]:
+    """First replied entry still waiting for a meeting decision ({} if none)"""
+    for m in entries:
+        if m.get("reply_received") and m["monitor_status"] == "active" and not m.get("meeting_decision"):
+            return m
+    return {}
 
 
-def human_meeting_decision_node(state: LeadState) -> LeadState:
-    m = state["active_monitor"]
+def without_meeting_decision(human_decision: Dict[str, Any]) -> Dict[str, Any]:
+    """Drop a used meeting decision so it is not applied to the next reply"""
+    return {
+        k: v for k, v in (human_decision or {}).items()
+        if k not in ("send_meeting_email", "meeting_datetime")
+    }
 
-    if not m:
-        return state
 
-    if state["human_decision"].get("send_meeting_email") is not None:
-        return state
+def monitor_router(state: LeadState):
+    # Follow-ups first: a reply waiting on the human must not hold them up
+    if state.get("followup_queue"):
+        return "followup"
+    if state.get("active_monitor", {}).get("reply_received"):
+        return "meeting"
+    return END
 
-    return state
+
+def human_meeting_decision_node(state: LeadState) -> LeadState:
+    """
+    Apply a declined meeting to the reply in active_monitor. "yes" is
+    handled by meeting_node; without a decision the reply stays pending.
+    """
+    m = state.get("active_monitor") or {}
+    if not m or state["human_decision"].get("send_meeting_email") != "no":
+        return {}
+
+    reply_scanner.unwatch(m["message_id"])
+    return {
+        "monitoring": [{
+            "message_id": m["message_id"],
+            "meeting_decision": "no",
+            "monitor_status": "declined"
+        }],
+        "active_monitor": {},
+        "human_decision": without_meeting_decision(state["human_decision"])
+    }
 
 def human_meeting_router(state: LeadState):
     if state["human_decision"].get("send_meeting_email") == "yes":
         return "meeting"
-    return "monitor"
+    # Declined: the next pending reply (if any) comes up in monitor
+    if not state.get("active_monitor"):
+        return "monitor"
+    # Waiting for the human to decide on this reply
+    return END
 
 
-def followup_node(state: LeadState) -> LeadState:
-    m = state["active_monitor"]
+def followup_node(state: LeadState, config: RunnableConfig) -> LeadState:
+    """
+    Send every queued follow-up in one batch: drafts are generated
+    concurrently (one per company and follow-up number, shared by all
+    addresses at that company) and delivered over one pooled connection.
+    """
+    thread_id = config.get("configurable", {}).get("thread_id", "")
+
+    entries = {m["message_id"]: m for m in state["monitoring"]}
+    leads = {l["company_name"]: l for l in state["leads"]}
+
+    # (company_name, followup_no) -> monitoring entries sharing one draft
+    groups: Dict[tuple, List[Dict[str, Any]]] = {}
+    for item in state.get("followup_queue", []):
+        m = entries.get(item["message_id"])
+        if not m or m["monitor_status"] != "active":
+            continue
+        # Never follow up with someone who already answered
+        if m.get("reply_received"):
+            continue
+        if m.get(f'followup_{item["followup_no"]}_sent'):
+            continue
+        groups.setdefault((m["company_name"], item["followup_no"]), []).append(m)
+
+    if not groups:
+        return {"followup_queue": [], "active_monitor": {}}
 
-    lead = next(
-        (l for l in state["leads"] if l["company_name"] == m["company_name"]),
-        {}
+    keys = list(groups)
+    drafts = generate_followup_emails(
+        [{"lead": leads.get(company, {"company_name": company}), "followup_no": no} for company, no in keys],
+        state["sender_profile"]
     )
 
-    followup_no = 1 if not m["followup_1_sent"] else 2
+    retry_at = time.time() + FOLLOWUP_RETRY_SECONDS
+    sent_at = datetime.now(timezone.utc).isoformat()
+    updates = []
 
-    draft = generate_followup_email(lead, followup_no, state["sender_profile"])
+    with smtp_pool.connection() as server:
+        for key, draft in zip(keys, drafts):
+            _, followup_no = key
 
-    with smtplib.SMTP(SMTP_CONFIG["host"], SMTP_CONFIG["port"]) as server:
-        server.starttls()
-        server.login(
-            SMTP_CONFIG["username"],
-            SMTP_CONFIG["password"]
-        )
+            for m in groups[key]:
+                try:
+                    if isinstance(draft, Exception):
+                        raise draft
 
-        msg = MIMEMultipart()
-        msg["From"] = f'{SMTP_CONFIG["from_name"]} <{SMTP_CONFIG["username"]}>'
-        msg["To"] = m["email"]
-        msg["Subject"] = draft.subject
+                    msg = MIMEMultipart()
+                    msg["From"] = f'{SMTP_CONFIG["from_name"]} <{SMTP_CONFIG["username"]}>'
+                    msg["To"] = m["email"]
+                    msg["Subject"] = draft.subject
 
-        msg.attach(MIMEText(draft.body, "plain"))
+                    msg.attach(MIMEText(draft.body, "plain"))
 
-        server.send_message(msg)
+                    bound_smtp_timeout(server)
+                    server.send_message(msg)
 
-    if not m["followup_1_sent"]:
-        m["followup_1_sent"] = True
-    else:
-        m["followup_2_sent"] = True
+                    update = {
+                        "message_id": m["message_id"],
+                        f"followup_{followup_no}_sent": True,
+                        f"followup_{followup_no}_sent_at": sent_at,
+                        "followup_error": None
+                    }
+                    updates.append(update)
+                    monitor_scheduler.schedule(thread_id, {**m, **update})
+                    emit_event(
+                        "followup_sent",
+                        company_name=m["company_name"],
+                        email=m["email"],
+                        followup_no=followup_no
+                    )
 
-    state["active_monitor"] = {}
-    return state
+                except Exception as e:
+                    # Leave it unsent and retry on a later pass
+                    updates.append({"message_id": m["message_id"], "followup_error": str(e)})
+                    monitor_scheduler.schedule(thread_id, m, not_before=retry_at)
 
+    return {"monitoring": updates, "followup_queue": [], "active_monitor": {}}
 
 
-from datetime import datetime, timedelta
-import uuid
 
-def meeting_node(state: LeadState) -> LeadState:
+def meeting_node(state: LeadState, config: RunnableConfig) -> LeadState:
     m = state["active_monitor"]
 
     meeting_dt_str = state["human_decision"].get("meeting_datetime")
     if not meeting_dt_str:
-        return state
+        # Nothing to book: the reply stays pending for a new decision
+        return {"human_decision": without_meeting_decision(state["human_decision"])}
 
     # Convert "YYYY-MM-DD HH:MM" → datetime
     start_dt = datetime.strptime(meeting_dt_str, "%Y-%m-%d %H:%M")
-    end_dt = start_dt + timedelta(minutes=30)
-
-    service = get_calendar_service()
-
-    event = {
-        "summary": f"Meeting with {m['company_name']}",
-        "description": "Automated meeting created by B2B outreach system",
-        "start": {
-            "dateTime": start_dt.isoformat(),
-            "timeZone": "Asia/Kolkata",
-        },
-        "end": {
-            "dateTime": end_dt.isoformat(),
-            "timeZone": "Asia/Kolkata",
-        },
-        "conferenceData": {
-            "createRequest": {
-                "requestId": str(uuid.uuid4())
-            }
-        },
-        "attendees": [
-            {"email": m["email"]}
-        ]
-    }
 
-    created_event = service.events().insert(
-        calendarId="primary",
-        body=event,
-        conferenceDataVersion=1,
-        sendUpdates="all"
-    ).execute()
+    # Inserts from campaigns booking at the same time share one batch request
+    created_event = calendar_client.create_event(
+        calendar_client.meeting_event(m["company_name"], m["email"], start_dt)
+    )
 
     meet_link = created_event["conferenceData"]["entryPoints"][0]["uri"]
 
-    m["meet_link"] = meet_link
-    m["calendar_event_id"] = created_event["id"]
-    m["monitor_status"] = "meeting_created"
-    m["meeting_scheduled"] = True
+    update = {
+        "message_id": m["message_id"],
+        "meet_link": meet_link,
+        "calendar_event_id": created_event["id"],
+        "monitor_status": "meeting_created",
+        "meeting_scheduled": True,
+        "meeting_decision": "yes"
+    }
+    reply_scanner.unwatch(m["message_id"])
+    monitor_scheduler.schedule(config.get("configurable", {}).get("thread_id", ""), {**m, **update})
 
-    state["active_monitor"] = {}
-    return state
+    return {
+        "monitoring": [update],
+        "active_monitor": {},
+        "human_decision": without_meeting_decision(state["human_decision"])
+    }
 
 
 
 # =================================================
 # GRAPH
 # =================================================
-graph = StateGraph(LeadState)
-
-graph.add_node("human_sender_profile", human_sender_profile_node)
-graph.add_node("planner", planner_node)
-graph.add_node("research", research_node)
-graph.add_node("qualifier", qualifier_node)
-graph.add_node("writer", writer_node)
-graph.add_node("human_send_approval", human_send_approval_node)
-graph.add_node("sender", sender_node)
-graph.add_node("monitor", monitor_node)
-graph.add_node("human_meeting", human_meeting_decision_node)
-graph.add_node("followup", followup_node)
-graph.add_node("meeting", meeting_node)
-
-graph.set_entry_point("human_sender_profile")
-
-graph.add_edge("human_sender_profile", "planner")
-graph.add_edge("planner", "research")
-graph.add_edge("research", "qualifier")
-graph.add_conditional_edges("qualifier", qualifier_router, {"writer": "writer", END: END})
-graph.add_edge("writer", "human_send_approval")
-
-graph.add_conditional_edges(
-    "human_send_approval",
-    human_send_router,
-    {
-        "sender": "sender",
-        END: END
-    }
-)
+def build_graph() -> StateGraph:
+    """The campaign graph (nodes and edges), not yet compiled"""
+    graph = StateGraph(LeadState)
+
+    graph.add_node("human_sender_profile", human_sender_profile_node)
+    graph.add_node("planner", with_deadline(planner_node, "discovery"))
+    graph.add_node("research", with_deadline(research_node, "research"))
+    graph.add_node("qualifier", qualifier_node)
+    graph.add_node("writer", with_deadline(writer_node, "writer"))
+    graph.add_node("human_send_approval", human_send_approval_node)
+    graph.add_node("sender", with_deadline(sender_node, "sender"))
+    graph.add_node("monitor", monitor_node)
+    graph.add_node("human_meeting", human_meeting_decision_node)
+    graph.add_node("followup", with_deadline(followup_node, "followup"))
+    graph.add_node("meeting", meeting_node)
+
+    graph.set_entry_point("human_sender_profile")
+
+    graph.add_edge("human_sender_profile", "planner")
+    graph.add_edge("planner", "research")
+    graph.add_edge("research", "qualifier")
+    graph.add_conditional_edges("qualifier", qualifier_router, {"writer": "writer", END: END})
+    graph.add_edge("writer", "human_send_approval")
+
+    graph.add_conditional_edges(
+        "human_send_approval",
+        human_send_router,
+        {
+            "sender": "sender",
+            END: END
+        }
+    )
 
-graph.add_conditional_edges(
-    "human_meeting",
-    human_meeting_router,
-    {
-        "meeting": "meeting",
-        "monitor": "monitor"
-    }
-)
+    graph.add_conditional_edges(
+        "human_meeting",
+        human_meeting_router,
+        {
+            "meeting": "meeting",
+            "monitor": "monitor",
+            END: END
+        }
+    )
 
-graph.add_edge("sender", "monitor")
-graph.add_conditional_edges(
-    "monitor",
-    lambda s: (
-        "meeting"
-        if s.get("active_monitor", {}).get("reply_received")
-        else "followup"
-        if s.get("active_monitor")
-        else END
-    ),
-    {
-        "meeting": "human_meeting",
-        "followup": "followup",
-        END: END,
-    },
-)
+    graph.add_edge("sender", "monitor")
+    graph.add_conditional_edges(
+        "monitor",
+        monitor_router,
+        {
+            "meeting": "human_meeting",
+            "followup": "followup",
+            END: END,
+        },
+    )
 
-graph.add_edge("followup", "monitor")
-graph.add_edge("meeting", "monitor")
+    graph.add_edge("followup", "monitor")
+    graph.add_edge("meeting", "monitor")
 
+    return graph
 
-# Create the LangGraph application
-app = graph.compile(checkpointer=checkpointer)
+def create_app(saver=None):
+    """
+    Compile the campaign graph. `saver` defaults to the shared sharded
+    checkpointer; pass another one (e.g. an in-memory saver) to run the
+    graph against different storage.
+    """
+    return build_graph().compile(checkpointer=saver if saver is not None else checkpointer._resolve())
+
+# The LangGraph application, compiled on first use
+app = Lazy(create_app, "app")
+
+# Shared monitoring service for every live campaign (started by the API)
+monitor_daemon = MonitorDaemon(
+    app,
+    lambda: campaign_registry.thread_ids(phase="monitor"),
+    monitor_scheduler,
+    reply_listener
+)
 
 # =================================================
 # Utility functions for API
 # =================================================
+def run_graph(
+    input_state: Dict[str, Any],
+    thread_id: str,
+    should_cancel: Callable[[], bool] | None = None,
+    on_event: Callable[[Dict[str, Any]], None] | None = None,
+    deadline_seconds: float | None = CAMPAIGN_DEADLINE_SECONDS
+) -> Dict[str, Any]:
+    """
+    Execute the graph step by step, stopping between nodes if cancelled.
+    Per-node and per-lead progress is passed to on_event as it happens.
+    Stages share a deadline_seconds budget and return partial results
+    rather than overrun it (None: no deadline).
+    Returns the final state, like app.invoke.
+    """
+    config = {"configurable": {"thread_id": thread_id}}
+    if deadline_seconds:
+        config["configurable"].update(deadline_config(deadline_seconds))
+    state: Dict[str, Any] = {}
+    nodes: List[str] = []
+
+    for mode, chunk in app.stream(
+        input_state,
+        config=config,
+        stream_mode=["updates", "values", "custom"]
+    ):
+        if mode == "updates":
+            nodes = list(chunk)
+            continue
+
+        if mode == "custom":
+            if on_event:
+                on_event(chunk)
+            continue
+
+        state = chunk
+        if on_event and nodes:
+            on_event({"event": "node_completed", "nodes": nodes, "state": summarize_state(state)})
+
+        if should_cancel and should_cancel():
+            raise JobCancelled(f"Run cancelled for {thread_id}")
+
+    return state
+
+@asynccontextmanager
+async def open_async_app(thread_id: str):
+    """
+    The graph compiled with the async checkpointer (the shard owning
+    thread_id, same hooks), for callers driving it with ainvoke/astream.
+    """
+    async with open_async_saver(checkpointer.shard_path(thread_id), checkpointer.hooks) as saver:
+        yield create_app(saver)
+
+def load_state(thread_id: str) -> Dict[str, Any]:
+    """Latest checkpointed state of a thread, without executing any node"""
+    snapshot = app.get_state({"configurable": {"thread_id": thread_id}})
+    return snapshot.values or {}
+
+def load_state_at(thread_id: str) -> tuple[Dict[str, Any], str | None]:
+    """Latest state of a thread with the id of the checkpoint it was read from"""
+    snapshot = app.get_state({"configurable": {"thread_id": thread_id}})
+    return snapshot.values or {}, snapshot.config["configurable"].get("checkpoint_id")
+
+def load_summary(thread_id: str) -> Dict[str, Any] | None:
+    """
+    Campaign summary from the projection. Rebuilt from the checkpoint when
+    missing or stale (written by another worker or before a restart).
+    """
+    head = latest_checkpoint_id(thread_id)
+    if head is None:
+        return None
+
+    summary = state_projection.get(thread_id)
+    if summary is not None and summary.get("checkpoint_id") == head:
+        return summary
+
+    snapshot = app.get_state({"configurable": {"thread_id": thread_id}})
+    if not snapshot.values:
+        return None
+
+    state_projection.update(
+        thread_id,
+        snapshot.values,
+        snapshot.config["configurable"].get("checkpoint_id", "")
+    )
+    return state_projection.get(thread_id)
+
+def load_state_delta(thread_id: str, since_version: int | None = None) -> Dict[str, Any] | None:
+    """
+    State changes since `since_version` as a JSON patch, or the full state
+    when the client has no version or is too far behind. None if unknown.
+    """
+    head = latest_checkpoint_id(thread_id)
+    if head is None:
+        return None
+
+    # Written by another worker (or before a restart): catch up from the checkpoint
+    if state_history.checkpoint_id(thread_id) != head:
+        snapshot = app.get_state({"configurable": {"thread_id": thread_id}})
+        if not snapshot.values:
+            return None
+        state_history.record(
+            thread_id,
+            snapshot.values,
+            (snapshot.metadata or {}).get("step", -1),
+            snapshot.config["configurable"].get("checkpoint_id", "")
+        )
+
+    return state_history.delta(thread_id, since_version)
+
+def sync_campaign_registry() -> int:
+    """
+    Register checkpointed campaigns missing from the registry (e.g. ones
+    created before it existed). Returns how many were added.
+    """
+    known = set(campaign_registry.thread_ids())
+    added = 0
+
+    for thread_id in list_thread_ids():
+        if thread_id in known:
+            continue
+        snapshot = app.get_state({"configurable": {"thread_id": thread_id}})
+        if snapshot.values:
+            campaign_registry.update_from_state(thread_id, snapshot.values)
+            added += 1
+
+    return added
+
+def resolve_state_blobs(values: Dict[str, Any]) -> Dict[str, Any]:
+    """Copy of a state with blob references in leads and emails replaced by text"""
+    out = dict(values)
+    out["leads"] = blob_store.resolve_many(values.get("leads", []), LEAD_BLOB_FIELDS)
+    out["emails"] = blob_store.resolve_many(values.get("emails", []), EMAIL_BLOB_FIELDS)
+    return out
+
+def create_retention_service() -> RetentionService:
+    """Retention over every checkpoint shard; archived threads leave the caches"""
+    service = RetentionService(
+        checkpointer.paths,
+        campaign_registry,
+        load_state,
+        resolve_state_blobs,
+        blob_store
+    )
+    service.on_archived.append(state_projection.discard)
+    service.on_archived.append(state_history.discard)
+    return service
+
+# Checkpoint pruning, archiving of idle campaigns and incremental VACUUM
+# (started by the API)
+retention_service = Lazy(create_retention_service, "retention_service")
+
 def create_test_state(query: str, sender_profile: Dict[str, str]) -> LeadState:
     """Create a test state for test mode"""
-    from datetime import datetime, timezone
-    
     now = datetime.now(timezone.utc).isoformat()
 
     return {
         "start_from_writer": True,
+        "skip_discovery": False,
         "phase": "campaign",
 
         "query": query,
@@ -1274,6 +1880,7 @@ def create_test_state(query: str, sender_profile: Dict[str, str]) -> LeadState:
         "email_send_logs": [],
         "monitoring": [],
         "active_monitor": {},
+        "followup_queue": [],
         "current_company": {},
         "human_decision": {},
         "sender_profile": sender_profile
@@ -0,0 +1,225 @@
+import threading
+import uuid
+from collections import OrderedDict
+from concurrent.futures import Future, ThreadPoolExecutor
+from datetime import datetime, timezone
+from typing import Any, Callable, Dict, List, Optional
+
+from campaign_scheduler import CampaignScheduler, PRIORITY_LIVE, SCHEDULER_MAX_RUNNING
+
+# =================================================
+# CONSTANTS
+# =================================================
+JOB_MAX_WORKERS = SCHEDULER_MAX_RUNNING
+# Finished jobs kept for status lookups
+JOB_HISTORY_LIMIT = 1000
+
+JOB_QUEUED = "queued"
+JOB_RUNNING = "running"
+JOB_SUCCEEDED = "succeeded"
+JOB_FAILED = "failed"
+JOB_CANCELLED = "cancelled"
+
+FINISHED_STATUSES = {JOB_SUCCEEDED, JOB_FAILED, JOB_CANCELLED}
+
+
+class JobCancelled(Exception):
+    """Raised inside a job when it notices a cancellation request."""
+
+
+def utc_now() -> str:
+    return datetime.now(timezone.utc).isoformat()
+
+
+# =================================================
+# JOB MANAGER
+# =================================================
+class JobManager:
+    """
+    Runs graph executions off the event loop in a bounded worker pool.
+
+    Admission and ordering are delegated to a CampaignScheduler: jobs wait
+    in its fair queues and are only handed to a worker when a slot is free
+    and no other job for the same campaign thread is running.
+    A job function receives a `should_cancel()` callable and is expected to
+    check it between graph steps; queued jobs are cancelled outright.
+    on_done runs once for every job, whatever state it ends in.
+    """
+
+    def __init__(
+        self,
+        max_workers: int = JOB_MAX_WORKERS,
+        scheduler: Optional[CampaignScheduler] = None
+    ):
+        self.scheduler = scheduler or CampaignScheduler(max_running=max_workers)
+        self._executor = ThreadPoolExecutor(
+            max_workers=self.scheduler.max_running, thread_name_prefix="graph-job"
+        )
+        self._jobs: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+        self._futures: Dict[str, Future] = {}
+        self._cancel_flags: Dict[str, threading.Event] = {}
+        self._pending: Dict[str, Callable] = {}
+        self._on_done: Dict[str, Callable[[Dict[str, Any]], None]] = {}
+        self._lock = threading.Lock()
+
+    # ---------------------------------------------
+    # Submission
+    # ---------------------------------------------
+    def submit(
+        self,
+        kind: str,
+        thread_id: str,
+        fn: Callable[[Callable[[], bool]], Any],
+        on_done: Optional[Callable[[Dict[str, Any]], None]] = None,
+        sender_key: str = "default",
+        priority: str = PRIORITY_LIVE
+    ) -> Dict[str, Any]:
+        """
+        Queue a job. Raises QueueFull when the scheduler rejects it.
+        """
+        job_id = f"job-{uuid.uuid4().hex[:12]}"
+        job = {
+            "job_id": job_id,
+            "kind": kind,
+            "thread_id": thread_id,
+            "sender_key": sender_key,
+            "priority": priority,
+            "status": JOB_QUEUED,
+            "created_at": utc_now(),
+            "started_at": None,
+            "finished_at": None,
+            "result": None,
+            "error": None
+        }
+
+        with self._lock:
+            self.scheduler.enqueue({
+                "job_id": job_id,
+                "thread_id": thread_id,
+                "sender_key": sender_key,
+                "priority": priority
+            })
+            self._jobs[job_id] = job
+            self._cancel_flags[job_id] = threading.Event()
+            self._pending[job_id] = fn
+            if on_done:
+                self._on_done[job_id] = on_done
+            self._trim_history()
+            self._pump()
+
+        return dict(job)
+
+    def _pump(self):
+        # Caller holds the lock
+        while True:
+            item = self.scheduler.next_ready()
+            if item is None:
+                return
+            job_id = item["job_id"]
+            fn = self._pending.pop(job_id)
+            self._futures[job_id] = self._executor.submit(self._run, job_id, fn)
+
+    def _run(self, job_id: str, fn):
+        job = self._jobs[job_id]
+        cancel_flag = self._cancel_flags[job_id]
+
+        try:
+            if cancel_flag.is_set():
+                self._finish(job, JOB_CANCELLED)
+            else:
+                job["status"] = JOB_RUNNING
+                job["started_at"] = utc_now()
+                try:
+                    job["result"] = fn(cancel_flag.is_set)
+                    self._finish(job, JOB_SUCCEEDED)
+                except JobCancelled:
+                    self._finish(job, JOB_CANCELLED)
+                except Exception as e:
+                    job["error"] = str(e)
+                    self._finish(job, JOB_FAILED)
+        finally:
+            with self._lock:
+                self.scheduler.done(job_id)
+                self._pump()
+
+        self._notify(job)
+
+    def _notify(self, job: Dict[str, Any]):
+        with self._lock:
+            on_done = self._on_done.pop(job["job_id"], None)
+        if on_done:
+            try:
+                on_done(dict(job))
+            except Exception as e:
+                print(f"Job callback failed for {job['job_id']}: {e}")
+
+    def _finish(self, job: Dict[str, Any], status: str):
+        job["status"] = status
+        job["finished_at"] = utc_now()
+        with self._lock:
+            self._futures.pop(job["job_id"], None)
+            self._cancel_flags.pop(job["job_id"], None)
+
+    def _trim_history(self):
+        # Caller holds the lock. Oldest finished jobs go first; queued and
+        # running ones are skipped, never dropped
+        excess = len(self._jobs) - JOB_HISTORY_LIMIT
+        if excess <= 0:
+            return
+        finished = [job_id for job_id, job in self._jobs.items() if job["status"] in FINISHED_STATUSES]
+        for job_id in finished[:excess]:
+            self._jobs.pop(job_id)
+
+    # ---------------------------------------------
+    # Queries / control
+    # ---------------------------------------------
+    def get(self, job_id: str) -> Optional[Dict[str, Any]]:
+        job = self._jobs.get(job_id)
+        return dict(job) if job else None
+
+    def list(self, thread_id: Optional[str] = None) -> List[Dict[str, Any]]:
+        with self._lock:
+            jobs = list(self._jobs.values())
+        return [dict(j) for j in jobs if thread_id is None or j["thread_id"] == thread_id]
+
+    def cancel(self, job_id: str) -> bool:
+        """
+        Request cancellation. Returns False if the job already finished.
+        """
+        with self._lock:
+            job = self._jobs.get(job_id)
+            flag = self._cancel_flags.get(job_id)
+            future = self._futures.get(job_id)
+
+        if not job or job["status"] in FINISHED_STATUSES or flag is None:
+            return False
+
+        flag.set()
+
+        with self._lock:
+            queued = self.scheduler.remove(job_id) is not None
+            if queued:
+                self._pending.pop(job_id, None)
+
+        if queued:
+            self._finish(job, JOB_CANCELLED)
+            self._notify(job)
+        elif future is not None and future.cancel():
+            with self._lock:
+                self.scheduler.done(job_id)
+                self._pump()
+            self._finish(job, JOB_CANCELLED)
+            self._notify(job)
+        return True
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            jobs = list(self._jobs.values())
+            scheduler_stats = self.scheduler.stats()
+        counts = {s: 0 for s in (JOB_QUEUED, JOB_RUNNING, JOB_SUCCEEDED, JOB_FAILED, JOB_CANCELLED)}
+        for j in jobs:
+            counts[j["status"]] += 1
+        return {"jobs": counts, "scheduler": scheduler_stats}
+
+    def shutdown(self):
+        self._executor.shutdown(wait=False, cancel_futures=True)
@@ -0,0 +1,54 @@
+import threading
+from typing import Any, Callable
+
+# =================================================
+# LAZY SINGLETONS
+# =================================================
+_UNSET = object()
+
+
+class Lazy:
+    """
+    Stand-in for a module-level singleton that is built on first use.
+
+    Attribute access is forwarded to the object returned by `factory`,
+    which runs once (thread-safe) the first time it is needed, so
+    importing a module does not open connections or clients.
+
+    The proxy's own helpers are underscore-named so they never hide an
+    attribute of the wrapped object (blob_store.get, registry.get, ...).
+    """
+
+    def __init__(self, factory: Callable[[], Any], name: str = ""):
+        object.__setattr__(self, "_factory", factory)
+        object.__setattr__(self, "_name", name or getattr(factory, "__name__", "lazy"))
+        object.__setattr__(self, "_value", _UNSET)
+        object.__setattr__(self, "_lock", threading.Lock())
+
+    def _resolve(self) -> Any:
+        value = self._value
+        if value is _UNSET:
+            with self._lock:
+                value = self._value
+                if value is _UNSET:
+                    value = self._factory()
+                    object.__setattr__(self, "_value", value)
+        return value
+
+    def _override(self, value: Any):
+        """Use an explicitly configured object instead of the factory"""
+        object.__setattr__(self, "_value", value)
+
+    @property
+    def _loaded(self) -> bool:
+        return self._value is not _UNSET
+
+    def __getattr__(self, name: str) -> Any:
+        return getattr(self._resolve(), name)
+
+    def __setattr__(self, name: str, value: Any):
+        setattr(self._resolve(), name, value)
+
+    def __repr__(self) -> str:
+        state = "loaded" if self._loaded else "not loaded"
+        return f"<Lazy {self._name} ({state})>"
@@ -0,0 +1,103 @@
+import os
+import threading
+from typing import Callable, Optional
+
+from sqlite_store import STATE_DB_PATH
+
+try:
+    import fcntl
+except ImportError:  # Windows: no multi-worker deployment, every process leads
+    fcntl = None
+
+# =================================================
+# CONSTANTS
+# =================================================
+LEADER_LOCK_PATH = os.getenv("LEADER_LOCK_PATH", f"{STATE_DB_PATH}.leader.lock")
+# How often a follower tries to take over from a leader that went away
+LEADER_RETRY_SECONDS = 15
+
+
+# =================================================
+# LEADER LOCK
+# =================================================
+class LeaderLock:
+    """
+    Picks one process among the API workers (on this host, which also holds
+    the SQLite state) to run the background singletons: monitor daemon,
+    IMAP listener, retention, registry sync and shard rebalancing.
+
+    The leader holds an exclusive flock on LEADER_LOCK_PATH; the OS drops
+    it when the process exits, and a follower polling every retry_interval
+    seconds then takes over and runs on_elected.
+    """
+
+    def __init__(self, path: str = LEADER_LOCK_PATH, retry_interval: float = LEADER_RETRY_SECONDS):
+        self.path = path
+        self.retry_interval = retry_interval
+
+        self._file = None
+        self._on_elected: Optional[Callable[[], None]] = None
+        self._thread: Optional[threading.Thread] = None
+        self._stop = threading.Event()
+        self._lock = threading.Lock()
+
+    @property
+    def is_leader(self) -> bool:
+        return self._file is not None or fcntl is None
+
+    def try_acquire(self) -> bool:
+        with self._lock:
+            if self.is_leader:
+                return True
+
+            f = open(self.path, "a+")
+            try:
+                fcntl.flock(f, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            except OSError:
+                f.close()
+                return False
+
+            f.seek(0)
+            f.truncate()
+            f.write(str(os.getpid()))
+            f.flush()
+            self._file = f
+            return True
+
+    def start(self, on_elected: Callable[[], None]):
+        """
+        Run on_elected now if this process wins, else keep trying in the
+        background and run it (on that thread) once the lock is ours.
+        """
+        self._on_elected = on_elected
+        self._stop.clear()
+
+        if self.try_acquire():
+            print(f"Leader: process {os.getpid()} runs the background services")
+            on_elected()
+            return
+
+        self._thread = threading.Thread(target=self._run, name="leader-election", daemon=True)
+        self._thread.start()
+
+    def _run(self):
+        while not self._stop.wait(self.retry_interval):
+            if not self.try_acquire():
+                continue
+
+            print(f"Leader: process {os.getpid()} took over the background services")
+            try:
+                self._on_elected()
+            except Exception as e:
+                print(f"Leader startup failed: {e}")
+            return
+
+    def stop(self):
+        self._stop.set()
+        with self._lock:
+            if self._file is not None:
+                try:
+                    fcntl.flock(self._file, fcntl.LOCK_UN)
+                finally:
+                    self._file.close()
+                    self._file = None
@@ -1,15 +1,44 @@
+import os
 import json
 import asyncio
 import uuid
 from typing import Dict, List, Any, Optional
 from datetime import datetime, timezone
 
-from fastapi import FastAPI, HTTPException, WebSocket, WebSocketDisconnect
+from fastapi import FastAPI, Header, HTTPException, Query, WebSocket, WebSocketDisconnect
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import JSONResponse
+from fastapi.responses import JSONResponse, Response
 from pydantic import BaseModel, Field
 
-from graph_app import app as langgraph_app, LeadState, create_test_state
+from graph_app import (
+    LeadState,
+    create_test_state,
+    monitor_daemon,
+    load_state,
+    load_state_at,
+    load_summary,
+    load_state_delta,
+    latest_checkpoint_id,
+    run_graph,
+    plan_bulk_discovery,
+    blob_store,
+    state_history,
+    campaign_registry,
+    sync_campaign_registry,
+    retention_service,
+    checkpointer,
+    calendar_client,
+    model_router,
+)
+from jobs import JobManager, JobCancelled, JOB_MAX_WORKERS, JOB_SUCCEEDED
+from campaign_scheduler import CampaignScheduler, QueueFull, PRIORITY_LIVE, PRIORITY_TEST
+from ws_hub import ConnectionHub
+from event_bus import create_event_bus
+from state_projection import summarize_state
+from resilience import hedge_stats, provider_stats
+from record_index import RecordCache, make_etag, LEAD_SORT_FIELDS, EMAIL_SORT_FIELDS
+from blob_store import LEAD_BLOB_FIELDS, EMAIL_BLOB_FIELDS
+from leader import LeaderLock
 
 # =================================================
 # Pydantic Models for API
@@ -26,6 +55,11 @@ class CampaignStartRequest(BaseModel):
     thread_id: Optional[str] = None
     sender_profile: SenderProfile
 
+class BulkCampaignRequest(BaseModel):
+    queries: List[str]
+    mode: str = Field("live", description="Mode: 'test' or 'live'")
+    sender_profile: SenderProfile
+
 class EmailApprovalRequest(BaseModel):
     thread_id: str
     decision: str = Field(..., description="'yes' or 'no'")
@@ -45,6 +79,8 @@ class CampaignStatusResponse(BaseModel):
     monitoring_count: int
     replies_received: int
     current_state: Dict[str, Any]
+    state_version: Optional[int] = None
+    state_patch: Optional[List[Dict[str, Any]]] = None
 
 # =================================================
 # FastAPI App
@@ -61,52 +97,355 @@ app.add_middleware(
 )
 
 
-active_connections: Dict[str, List[WebSocket]] = {}
+# WebSocket subscribers, fanned out with bounded per-client queues
+ws_hub = ConnectionHub()
+# Carries campaign events between API workers; each worker fans them out
+# to its own WebSocket clients (EVENT_BUS_URL selects the backend)
+event_bus = create_event_bus()
+
+MONITOR_DAEMON_ENABLED = os.getenv("MONITOR_DAEMON_ENABLED", "1") == "1"
+
+# Graph runs (crawling, LLM, SMTP) execute here, never on the event loop
+campaign_scheduler = CampaignScheduler(
+    max_running=int(os.getenv("GRAPH_JOB_WORKERS", JOB_MAX_WORKERS)),
+    max_queued=int(os.getenv("CAMPAIGN_QUEUE_LIMIT", 200)),
+    max_queued_per_sender=int(os.getenv("CAMPAIGN_QUEUE_PER_SENDER_LIMIT", 20))
+)
+job_manager = JobManager(scheduler=campaign_scheduler)
+
+def submit_monitor_run(thread_id: str, resume, on_done):
+    """Daemon resumes share the API's per-thread admission (one run per thread)"""
+    job_manager.submit(
+        "monitor", thread_id, lambda should_cancel: resume(),
+        on_done=lambda job: on_done(job["status"] == JOB_SUCCEEDED and bool(job["result"])),
+        sender_key="monitor-daemon"
+    )
+
+monitor_daemon.submit = submit_monitor_run
+
+# Joined, sorted lead/email rows per campaign checkpoint
+record_cache = RecordCache()
+RETENTION_ENABLED = os.getenv("RETENTION_ENABLED", "1") == "1"
+MAX_PAGE_SIZE = 1000
+MAX_BULK_QUERIES = 50
+event_loop: Optional[asyncio.AbstractEventLoop] = None
+
+# Only one API worker runs the background singletons below
+leader_lock = LeaderLock()
+
+@app.on_event("startup")
+async def start_monitor_daemon():
+    global event_loop
+    event_loop = asyncio.get_running_loop()
+
+    ws_hub.start()
+    event_bus.start(deliver_to_clients)
+
+    retention_service.on_archived.append(record_cache.discard)
+    await asyncio.to_thread(leader_lock.start, start_background_services)
+
+def start_background_services():
+    """
+    Process-wide singletons, run by the elected leader worker only (each
+    worker has its own in-memory timers, so more than one would send
+    every follow-up once per worker)
+    """
+    checkpointer.rebalance()
+
+    added = sync_campaign_registry()
+    if added:
+        print(f"Campaign registry: backfilled {added} campaigns")
+
+    if MONITOR_DAEMON_ENABLED:
+        monitor_daemon.start()
+
+    if RETENTION_ENABLED:
+        retention_service.start()
+
+@app.on_event("shutdown")
+async def stop_monitor_daemon():
+    monitor_daemon.stop()
+    retention_service.stop()
+    leader_lock.stop()
+    if calendar_client._loaded:
+        calendar_client.stop()
+    job_manager.shutdown()
+    event_bus.stop()
+    await ws_hub.stop()
 
 # =================================================
 # Helper Functions
 # =================================================
 async def notify_clients(thread_id: str, message: Dict[str, Any]):
-    """Send update to all connected clients for this thread"""
-    if thread_id in active_connections:
-        for connection in active_connections[thread_id]:
-            try:
-                await connection.send_json(message)
-            except:
-                pass
+    """Publish an update to the clients of this thread on every worker"""
+    event_bus.publish(thread_id, message)
+
+def deliver_to_clients(thread_id: str, message: Dict[str, Any]):
+    """Event bus subscriber: hand the event to this worker's hub"""
+    if event_loop is None or event_loop.is_closed():
+        return
+    event_loop.call_soon_threadsafe(ws_hub.publish, thread_id, message)
 
 def get_state_summary(state: LeadState) -> Dict[str, Any]:
     """Extract summary from state"""
+    return summarize_state(state)
+
+def notify_from_worker(thread_id: str, message: Dict[str, Any]):
+    """Publish an update from a job thread (the bus is thread-safe)"""
+    event_bus.publish(thread_id, message)
+
+def publish_state_patch(thread_id: str, from_version: int, version: int, patch: List[Dict[str, Any]]):
+    """
+    Push each checkpoint's delta to subscribers. A client whose version is
+    not from_version (e.g. it missed a message) should resync.
+    """
+    notify_from_worker(thread_id, {
+        "type": "state_patch",
+        "thread_id": thread_id,
+        "from_version": from_version,
+        "version": version,
+        "patch": blob_store.resolve_deep(patch)
+    })
+
+def load_client_delta(thread_id: str, since_version: Optional[int] = None) -> Optional[Dict[str, Any]]:
+    """load_state_delta with blob references resolved to their text"""
+    delta = load_state_delta(thread_id, since_version)
+    return blob_store.resolve_deep(delta) if delta is not None else None
+
+state_history.add_listener(publish_state_patch)
+
+def sender_key_for(sender_profile: Dict[str, Any], user_id: Optional[str] = None) -> str:
+    """Fair-queuing key: the calling user if known, else the sender identity"""
+    if user_id:
+        return f"user:{user_id}"
+    return f'sender:{sender_profile.get("company_name", "")}/{sender_profile.get("sender_name", "")}'
+
+def priority_for(state: Dict[str, Any]) -> str:
+    return PRIORITY_TEST if state.get("source") == "test" else PRIORITY_LIVE
+
+def submit_graph_job(
+    kind: str,
+    thread_id: str,
+    run,
+    message: Dict[str, Any],
+    sender_key: str = "default",
+    priority: str = PRIORITY_LIVE
+) -> Dict[str, Any]:
+    """
+    Run a graph execution in the job pool, stream its progress events to
+    subscribers as they happen and notify them when it ends.
+    `run(should_cancel, on_event)` returns the final state.
+    Raises 429 with Retry-After when the campaign scheduler is saturated.
+    """
+    def forward(event: Dict[str, Any]):
+        payload = dict(event)
+        notify_from_worker(thread_id, {
+            "type": payload.pop("event"),
+            "thread_id": thread_id,
+            "kind": kind,
+            **payload
+        })
+
+    def job_fn(should_cancel):
+        state = run(should_cancel, forward)
+        return {"state_summary": get_state_summary(state)}
+
+    def on_done(job: Dict[str, Any]):
+        if job["status"] == JOB_SUCCEEDED:
+            notify_from_worker(thread_id, {
+                **message,
+                "job_id": job["job_id"],
+                "state": job["result"]["state_summary"]
+            })
+        else:
+            notify_from_worker(thread_id, {
+                "type": f"job_{job['status']}",
+                "thread_id": thread_id,
+                "job_id": job["job_id"],
+                "kind": kind,
+                "error": job["error"]
+            })
+
+    try:
+        return job_manager.submit(kind, thread_id, job_fn, on_done, sender_key, priority)
+    except QueueFull as e:
+        raise HTTPException(
+            status_code=429,
+            detail=e.detail,
+            headers={"Retry-After": str(e.retry_after)}
+        )
+
+def accepted(job: Dict[str, Any], extra: Optional[Dict[str, Any]] = None) -> JSONResponse:
+    """202 response for a submitted job"""
+    return JSONResponse(status_code=202, content={
+        "thread_id": job["thread_id"],
+        "job_id": job["job_id"],
+        "status": "accepted",
+        "job_status": job["status"],
+        "status_url": f"/api/jobs/{job['job_id']}",
+        **(extra or {})
+    })
+
+def create_live_state(
+    query: str,
+    sender_profile: Dict[str, Any],
+    companies: Optional[List[Dict[str, Any]]] = None,
+    source: str = "unknown"
+) -> LeadState:
+    """
+    Initial state of a live campaign. With companies, discovery already
+    happened (bulk submission) and the planner is skipped.
+    """
     return {
-        "phase": state.get("phase", "unknown"),
-        "leads_count": len(state.get("leads", [])),
-        "qualified_count": len([q for q in state.get("qualification", []) if q.get("qualified")]),
-        "emails_ready": len(state.get("emails", [])),
-        "emails_sent": len([e for e in state.get("email_send_logs", []) if e.get("status") == "sent"]),
-        "monitoring_count": len([m for m in state.get("monitoring", []) if m.get("monitor_status") == "active"]),
-        "replies_received": len([m for m in state.get("monitoring", []) if m.get("reply_received")]),
-        "current_node": "unknown"
+        "query": query,
+        "companies": companies or [],
+        "current_company": {},
+        "site_text": "",
+        "leads": [],
+        "qualification": [],
+        "emails": [],
+        "email_send_logs": [],
+        "monitoring": [],
+        "active_monitor": {},
+        "followup_queue": [],
+        "source": source,
+        "start_from_writer": False,
+        "skip_discovery": companies is not None,
+        "phase": "campaign",
+        "human_decision": {},
+        "pending_action": "",
+        "sender_profile": sender_profile
     }
 
+def start_campaign_job(
+    thread_id: str,
+    initial_state: LeadState,
+    mode: str,
+    sender_key: str
+) -> Dict[str, Any]:
+    def run(should_cancel, on_event):
+        return run_graph(initial_state, thread_id, should_cancel, on_event)
+
+    return submit_graph_job("start", thread_id, run, {
+        "type": "campaign_started",
+        "thread_id": thread_id,
+        "mode": mode
+    },
+        sender_key=sender_key,
+        priority=PRIORITY_TEST if mode == "test" else PRIORITY_LIVE
+    )
+
+def list_records(
+    thread_id: str,
+    kind: str,
+    if_none_match: Optional[str],
+    filters: Dict[str, Any],
+    predicate,
+    sort: str,
+    order: str,
+    cursor: Optional[str],
+    limit: Optional[int],
+    fields: Optional[str],
+    resolve: bool = True
+):
+    """
+    One page of leads or emails with a strong ETag. The ETag is derived
+    from the checkpoint id and the query, so a matching If-None-Match is
+    answered with 304 before any state is loaded; the ETag sent with a
+    page names the checkpoint its rows were built from. Blob references
+    in the page are resolved unless resolve=false.
+    Blocking (SQLite reads): handlers call it via asyncio.to_thread.
+    """
+    if order not in ("asc", "desc"):
+        raise HTTPException(status_code=400, detail="order must be 'asc' or 'desc'")
+
+    checkpoint_id = latest_checkpoint_id(thread_id)
+    if checkpoint_id is None:
+        raise HTTPException(status_code=404, detail="Campaign not found")
+
+    field_list = [f.strip() for f in fields.split(",") if f.strip()] if fields else None
+    etag = make_etag(checkpoint_id, kind, filters, sort, order, cursor, limit, field_list, resolve)
+
+    if if_none_match and etag in [t.strip() for t in if_none_match.split(",")]:
+        return Response(status_code=304, headers={"ETag": etag})
+
+    def load():
+        state, loaded_id = load_state_at(thread_id)
+        if not state:
+            raise HTTPException(status_code=404, detail="Campaign not found")
+        return state, loaded_id
+
+    # A checkpoint written since the lookup above is what gets served
+    loaded_id, records = record_cache.get(thread_id, checkpoint_id, load)
+    if loaded_id != checkpoint_id:
+        etag = make_etag(loaded_id, kind, filters, sort, order, cursor, limit, field_list, resolve)
+
+    try:
+        page = records[kind].page(
+            sort,
+            descending=order == "desc",
+            cursor=cursor,
+            limit=limit,
+            predicate=predicate,
+            fields=field_list
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    items = page["items"]
+    if resolve:
+        items = blob_store.resolve_many(items, LEAD_BLOB_FIELDS if kind == "leads" else EMAIL_BLOB_FIELDS)
+
+    return JSONResponse(
+        content={
+            "thread_id": thread_id,
+            kind: items,
+            "count": len(items),
+            "total": page["total"],
+            "next_cursor": page["next_cursor"]
+        },
+        headers={"ETag": etag}
+    )
+
+def read_state(thread_id: str) -> Dict[str, Any]:
+    """
+    Read the latest checkpoint without running the graph; 404 if missing.
+    Blocking: handlers call it via asyncio.to_thread.
+    """
+    state = load_state(thread_id)
+    if not state:
+        raise HTTPException(status_code=404, detail="Campaign not found")
+    return state
+
 # =================================================
 # WebSocket Endpoint
 # =================================================
 @app.websocket("/ws/{thread_id}")
 async def websocket_endpoint(websocket: WebSocket, thread_id: str):
-    await websocket.accept()
-    
-    if thread_id not in active_connections:
-        active_connections[thread_id] = []
-    active_connections[thread_id].append(websocket)
+    conn = await ws_hub.connect(websocket, thread_id)
     
     try:
+        # Heartbeats and updates are sent by the hub; this loop answers
+        # sync requests and notices when the client goes away
         while True:
-            await asyncio.sleep(30)
-            await websocket.send_json({"type": "ping", "timestamp": datetime.now(timezone.utc).isoformat()})
+            try:
+                message = json.loads(await websocket.receive_text())
+            except ValueError:
+                continue
+
+            # {"type": "sync", "since_version": N} -> delta or full state
+            if isinstance(message, dict) and message.get("type") == "sync":
+                since_version = message.get("since_version")
+                # Anything but a version number gets the full state
+                if isinstance(since_version, bool) or not isinstance(since_version, int) or since_version < 0:
+                    since_version = None
+                delta = await asyncio.to_thread(load_client_delta, thread_id, since_version)
+                if delta is not None:
+                    conn.offer({"type": "state_sync", "thread_id": thread_id, **delta})
     except WebSocketDisconnect:
-        active_connections[thread_id].remove(websocket)
-        if not active_connections[thread_id]:
-            del active_connections[thread_id]
+        pass
+    finally:
+        ws_hub.disconnect(conn)
 
 # =================================================
 # API Endpoints
@@ -115,94 +454,180 @@ async def websocket_endpoint(websocket: WebSocket, thread_id: str):
 async def root():
     return {"message": "B2B Lead Generation API", "status": "running"}
 
-@app.post("/api/campaign/start", response_model=Dict[str, Any])
-async def start_campaign(request: CampaignStartRequest):
+@app.post("/api/campaign/start", response_model=Dict[str, Any], status_code=202)
+async def start_campaign(request: CampaignStartRequest, x_user_id: Optional[str] = Header(None)):
     """
-    Start a new campaign or resume existing one
+    Start a new campaign or resume existing one.
+    Runs as a background job; returns 202 with the job id.
     """
     try:
         thread_id = request.thread_id or f"campaign-{uuid.uuid4().hex[:8]}"
         
         if request.mode == "test":
             initial_state = create_test_state(request.query, request.sender_profile.dict())
-            
-            config = {"configurable": {"thread_id": thread_id}}
-            
-            state = langgraph_app.invoke(initial_state, config=config)
-            
-            await notify_clients(thread_id, {
-                "type": "campaign_started",
-                "thread_id": thread_id,
-                "mode": "test",
-                "state": get_state_summary(state)
-            })
-            
-            return {
-                "thread_id": thread_id,
-                "status": "started",
-                "mode": "test",
-                "state_summary": get_state_summary(state),
-                "next_action": "review_emails"
-            }
+            next_action = "review_emails"
             
         else:
+            initial_state = create_live_state(request.query, request.sender_profile.dict())
+            next_action = "searching_companies"
 
-            initial_state: LeadState = {
-                "query": request.query,
-                "companies": [],
-                "current_company": {},
-                "site_text": "",
-                "leads": [],
-                "qualification": [],
-                "emails": [],
-                "email_send_logs": [],
-                "monitoring": [],
-                "active_monitor": {},
-                "source": "unknown",
-                "start_from_writer": False,
-                "phase": "campaign",
-                "human_decision": {},
-                "pending_action": "",
-                "sender_profile": request.sender_profile.dict()
-            }
-            
-            config = {"configurable": {"thread_id": thread_id}}
-            state = langgraph_app.invoke(initial_state, config=config)
-            
-            await notify_clients(thread_id, {
-                "type": "campaign_started",
-                "thread_id": thread_id,
-                "mode": "live",
-                "state": get_state_summary(state)
-            })
-            
-            return {
-                "thread_id": thread_id,
-                "status": "started",
-                "mode": "live",
-                "state_summary": get_state_summary(state),
-                "next_action": "searching_companies"
-            }
+        await asyncio.to_thread(
+            campaign_registry.register,
+            thread_id, request.query, request.mode, request.sender_profile.dict()
+        )
+
+        job = start_campaign_job(
+            thread_id,
+            initial_state,
+            request.mode,
+            sender_key_for(request.sender_profile.dict(), x_user_id)
+        )
+        
+        return accepted(job, {
+            "mode": request.mode,
+            "next_action": next_action
+        })
             
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Failed to start campaign: {str(e)}")
 
-@app.get("/api/campaign/{thread_id}/status", response_model=CampaignStatusResponse)
-async def get_campaign_status(thread_id: str):
+@app.post("/api/campaign/bulk", status_code=202)
+async def start_bulk_campaigns(request: BulkCampaignRequest, x_user_id: Optional[str] = Header(None)):
     """
-    Get current status of a campaign
+    Start one campaign per query with a single shared discovery pass.
+    Domains found by several queries go to the first query only, and
+    research results are shared. Thread ids are returned immediately;
+    each campaign job is submitted once discovery finishes.
     """
     try:
+        queries = list(dict.fromkeys(q.strip() for q in request.queries if q.strip()))
+        if not queries:
+            raise HTTPException(status_code=400, detail="At least one query is required")
+        if len(queries) > MAX_BULK_QUERIES:
+            raise HTTPException(status_code=400, detail=f"At most {MAX_BULK_QUERIES} queries per request")
+
+        sender_profile = request.sender_profile.dict()
+        sender_key = sender_key_for(sender_profile, x_user_id)
+        bulk_id = f"bulk-{uuid.uuid4().hex[:8]}"
+        campaigns = [
+            {"query": q, "thread_id": f"campaign-{uuid.uuid4().hex[:8]}"}
+            for q in queries
+        ]
+
+        def register_all():
+            for c in campaigns:
+                campaign_registry.register(c["thread_id"], c["query"], request.mode, sender_profile)
+
+        await asyncio.to_thread(register_all)
+
+        if request.mode == "test":
+            for c in campaigns:
+                job = start_campaign_job(
+                    c["thread_id"],
+                    create_test_state(c["query"], sender_profile),
+                    request.mode,
+                    sender_key
+                )
+                c["job_id"] = job["job_id"]
+
+            return JSONResponse(status_code=202, content={
+                "bulk_id": bulk_id,
+                "status": "accepted",
+                "mode": request.mode,
+                "campaigns": campaigns
+            })
+
+        def discover(should_cancel):
+            plans = plan_bulk_discovery(queries)
+            if should_cancel():
+                raise JobCancelled(f"Bulk discovery cancelled for {bulk_id}")
+
+            results = []
+            for c, plan in zip(campaigns, plans):
+                result = {
+                    **c,
+                    "companies": len(plan["companies"]),
+                    "duplicates_skipped": plan["duplicates"]
+                }
+                try:
+                    job = start_campaign_job(
+                        c["thread_id"],
+                        create_live_state(c["query"], sender_profile, plan["companies"], plan["source"]),
+                        request.mode,
+                        sender_key
+                    )
+                    result["job_id"] = job["job_id"]
+                except HTTPException as e:
+                    result["error"] = e.detail
+                results.append(result)
+
+            return {"campaigns": results}
+
+        def on_done(job: Dict[str, Any]):
+            notify_from_worker(bulk_id, {
+                "type": "bulk_planned" if job["status"] == JOB_SUCCEEDED else f"job_{job['status']}",
+                "thread_id": bulk_id,
+                "job_id": job["job_id"],
+                "result": job["result"],
+                "error": job["error"]
+            })
 
-        config = {"configurable": {"thread_id": thread_id}}
-        
         try:
-            state = langgraph_app.invoke({}, config=config)
-        except:
-            # If no state exists
+            job = job_manager.submit("bulk_discovery", bulk_id, discover, on_done, sender_key, PRIORITY_LIVE)
+        except QueueFull as e:
+            raise HTTPException(
+                status_code=429,
+                detail=e.detail,
+                headers={"Retry-After": str(e.retry_after)}
+            )
+
+        return JSONResponse(status_code=202, content={
+            "bulk_id": bulk_id,
+            "status": "accepted",
+            "mode": request.mode,
+            "job_id": job["job_id"],
+            "status_url": f"/api/jobs/{job['job_id']}",
+            "campaigns": campaigns
+        })
+
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Failed to start bulk campaigns: {str(e)}")
+
+@app.get("/api/campaign/{thread_id}/status", response_model=CampaignStatusResponse)
+async def get_campaign_status(
+    thread_id: str,
+    include_state: bool = True,
+    since_version: Optional[int] = Query(None, ge=0)
+):
+    """
+    Get current status of a campaign.
+    Served from the summary projection; include_state=false skips
+    loading the full checkpoint. With since_version, current_state is
+    replaced by state_patch unless the client is too far behind.
+    """
+    try:
+
+        summary = await asyncio.to_thread(load_summary, thread_id)
+        if summary is None:
             raise HTTPException(status_code=404, detail="Campaign not found")
-        
-        summary = get_state_summary(state)
+
+        state: Dict[str, Any] = {}
+        patch = None
+        version = None
+
+        if include_state:
+            delta = await asyncio.to_thread(load_client_delta, thread_id, since_version)
+            if delta is None:
+                raise HTTPException(status_code=404, detail="Campaign not found")
+            version = delta["version"]
+            if delta["full"]:
+                state = delta["state"]
+            else:
+                patch = delta["patch"]
         
         return CampaignStatusResponse(
             thread_id=thread_id,
@@ -213,7 +638,9 @@ async def get_campaign_status(thread_id: str):
             emails_sent=summary["emails_sent"],
             monitoring_count=summary["monitoring_count"],
             replies_received=summary["replies_received"],
-            current_state=state
+            current_state=state,
+            state_version=version,
+            state_patch=patch
         )
         
     except HTTPException:
@@ -221,33 +648,51 @@ async def get_campaign_status(thread_id: str):
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Failed to get status: {str(e)}")
 
-@app.post("/api/campaign/{thread_id}/continue")
-async def continue_campaign(thread_id: str):
+@app.get("/api/campaign/{thread_id}/state")
+async def get_campaign_state(thread_id: str, since_version: Optional[int] = Query(None, ge=0)):
+    """
+    Versioned campaign state: a JSON patch from since_version to the
+    latest version, or the full state ("full": true) when needed.
+    """
+    try:
+        delta = await asyncio.to_thread(load_client_delta, thread_id, since_version)
+        if delta is None:
+            raise HTTPException(status_code=404, detail="Campaign not found")
+        return {"thread_id": thread_id, **delta}
+
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Failed to get state: {str(e)}")
+
+@app.post("/api/campaign/{thread_id}/continue", status_code=202)
+async def continue_campaign(thread_id: str, x_user_id: Optional[str] = Header(None)):
     """
     Continue execution of a paused campaign
     """
     try:
+        state = await asyncio.to_thread(read_state, thread_id)
 
-        config = {"configurable": {"thread_id": thread_id}}
-        state = langgraph_app.invoke({}, config=config)
-        
-        await notify_clients(thread_id, {
+        def run(should_cancel, on_event):
+            return run_graph({}, thread_id, should_cancel, on_event)
+
+        job = submit_graph_job("continue", thread_id, run, {
             "type": "campaign_updated",
-            "thread_id": thread_id,
-            "state": get_state_summary(state)
-        })
+            "thread_id": thread_id
+        },
+            sender_key=sender_key_for(state.get("sender_profile", {}), x_user_id),
+            priority=priority_for(state)
+        )
         
-        return {
-            "thread_id": thread_id,
-            "status": "continued",
-            "state_summary": get_state_summary(state)
-        }
+        return accepted(job)
         
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Failed to continue campaign: {str(e)}")
 
-@app.post("/api/campaign/{thread_id}/approve-emails")
-async def approve_emails(thread_id: str, request: EmailApprovalRequest):
+@app.post("/api/campaign/{thread_id}/approve-emails", status_code=202)
+async def approve_emails(thread_id: str, request: EmailApprovalRequest, x_user_id: Optional[str] = Header(None)):
     """
     Approve or reject sending emails
     """
@@ -255,142 +700,245 @@ async def approve_emails(thread_id: str, request: EmailApprovalRequest):
         if request.decision not in ["yes", "no"]:
             raise HTTPException(status_code=400, detail="Decision must be 'yes' or 'no'")
         
-        config = {"configurable": {"thread_id": thread_id}}
-        
-        current_state = langgraph_app.invoke({}, config=config)
-        
-        if "human_decision" not in current_state:
-            current_state["human_decision"] = {}
-        
-        current_state["human_decision"]["send_first_email"] = request.decision
-        
-        new_state = langgraph_app.invoke(current_state, config=config)
-        
-        await notify_clients(thread_id, {
+        state = await asyncio.to_thread(read_state, thread_id)
+
+        def run(should_cancel, on_event):
+            # Read inside the job so earlier queued runs are applied first
+            current_state = load_state(thread_id)
+
+            # Only the decision is written; list channels are left untouched
+            human_decision = dict(current_state.get("human_decision") or {})
+            human_decision["send_first_email"] = request.decision
+            
+            return run_graph({"human_decision": human_decision}, thread_id, should_cancel, on_event)
+
+        job = submit_graph_job("approve_emails", thread_id, run, {
             "type": "emails_approved" if request.decision == "yes" else "emails_rejected",
             "thread_id": thread_id,
-            "decision": request.decision,
-            "state": get_state_summary(new_state)
-        })
+            "decision": request.decision
+        },
+            sender_key=sender_key_for(state.get("sender_profile", {}), x_user_id),
+            priority=priority_for(state)
+        )
         
-        return {
-            "thread_id": thread_id,
-            "decision": request.decision,
-            "status": "processed",
-            "state_summary": get_state_summary(new_state)
-        }
+        return accepted(job, {"decision": request.decision})
         
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Failed to process email approval: {str(e)}")
 
-@app.post("/api/campaign/{thread_id}/schedule-meeting")
-async def schedule_meeting(thread_id: str, request: MeetingRequest):
+@app.post("/api/campaign/{thread_id}/schedule-meeting", status_code=202)
+async def schedule_meeting(thread_id: str, request: MeetingRequest, x_user_id: Optional[str] = Header(None)):
     try:
         if request.decision not in ["yes", "no"]:
             raise HTTPException(status_code=400, detail="Decision must be 'yes' or 'no'")
         
         if request.decision == "yes" and not request.meeting_datetime:
-            raise HTTPException(status_code=400, detail="Meeting datetime required for 'yes' decision")
-        
-        config = {"configurable": {"thread_id": thread_id}}
-        current_state = langgraph_app.invoke({}, config=config)
-        
-        if "human_decision" not in current_state:
-            current_state["human_decision"] = {}
-        
-        current_state["human_decision"]["send_meeting_email"] = request.decision
-        
-        if request.decision == "yes":
-            current_state["human_decision"]["meeting_datetime"] = request.meeting_datetime
-        
-        new_state = langgraph_app.invoke(current_state, config=config)
+            raise HTTPException(status_code=400, detail={
+                "message": "Meeting datetime required for 'yes' decision",
+                "suggested_slots": await suggested_meeting_slots()
+            })
         
+        state = await asyncio.to_thread(read_state, thread_id)
 
-        if request.decision == "yes":
-            new_state = langgraph_app.invoke(new_state, config=config)
-        
-        await notify_clients(thread_id, {
+        def run(should_cancel, on_event):
+            current_state = load_state(thread_id)
+
+            human_decision = dict(current_state.get("human_decision") or {})
+            human_decision["send_meeting_email"] = request.decision
+            
+            if request.decision == "yes":
+                human_decision["meeting_datetime"] = request.meeting_datetime
+            
+            # One pass: meeting_node books the meeting and clears the decision
+            return run_graph({"human_decision": human_decision}, thread_id, should_cancel, on_event)
+
+        job = submit_graph_job("schedule_meeting", thread_id, run, {
             "type": "meeting_scheduled" if request.decision == "yes" else "meeting_declined",
             "thread_id": thread_id,
-            "decision": request.decision,
-            "state": get_state_summary(new_state)
-        })
+            "decision": request.decision
+        },
+            sender_key=sender_key_for(state.get("sender_profile", {}), x_user_id),
+            priority=priority_for(state)
+        )
         
-        return {
-            "thread_id": thread_id,
-            "decision": request.decision,
-            "status": "processed",
-            "state_summary": get_state_summary(new_state)
-        }
+        return accepted(job, {"decision": request.decision})
         
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Failed to schedule meeting: {str(e)}")
 
+async def suggested_meeting_slots(count: int = 3) -> List[str]:
+    """Open calendar slots, or none when the calendar is unavailable"""
+    if not calendar_client.authorized():
+        return []
+    try:
+        return await asyncio.to_thread(calendar_client.suggest_slots, count)
+    except Exception as e:
+        print(f"Slot suggestion failed: {e}")
+        return []
+
+@app.get("/api/calendar/slots")
+async def get_calendar_slots(
+    count: int = Query(5, ge=1, le=50),
+    minutes: int = Query(30, ge=15, le=240),
+    after: Optional[str] = Query(None, description="Format: YYYY-MM-DD HH:MM")
+):
+    """
+    Open meeting slots in working hours, from the cached free/busy window
+    """
+    try:
+        # Never start the interactive OAuth flow from a request worker
+        if not calendar_client.authorized():
+            raise HTTPException(status_code=503, detail="Calendar is not authorized")
+
+        start = None
+        if after:
+            try:
+                start = datetime.strptime(after, "%Y-%m-%d %H:%M").replace(tzinfo=calendar_client.tz)
+            except ValueError:
+                raise HTTPException(status_code=400, detail="after must be YYYY-MM-DD HH:MM")
+
+        slots = await asyncio.to_thread(calendar_client.suggest_slots, count, minutes, start)
+        return {"slots": slots, "time_zone": calendar_client.time_zone, "minutes": minutes}
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Failed to suggest slots: {str(e)}")
+
+@app.get("/api/calendar/stats")
+async def get_calendar_stats():
+    """
+    Batch, token refresh and free/busy cache counters of the calendar client
+    """
+    return calendar_client.stats() if calendar_client._loaded else {"loaded": False}
+
 @app.get("/api/campaign/{thread_id}/leads")
-async def get_leads(thread_id: str):
+async def get_leads(
+    thread_id: str,
+    if_none_match: Optional[str] = Header(None),
+    cursor: Optional[str] = None,
+    limit: Optional[int] = Query(None, ge=1, le=MAX_PAGE_SIZE),
+    sort: str = "company_name",
+    order: str = "asc",
+    qualified: Optional[bool] = None,
+    min_score: Optional[float] = None,
+    max_score: Optional[float] = None,
+    company: Optional[str] = None,
+    fields: Optional[str] = None,
+    resolve: bool = True
+):
     """
-    Get all leads for a campaign
+    Leads joined with qualification, filtered, sorted and paginated.
+    Without limit every matching lead is returned.
     """
     try:
-        config = {"configurable": {"thread_id": thread_id}}
-        state = langgraph_app.invoke({}, config=config)
-        
-        leads = state.get("leads", [])
-        qualification = state.get("qualification", [])
-        
-        for lead in leads:
-            qual = next((q for q in qualification if q["company_name"] == lead["company_name"]), {})
-            lead["qualification_score"] = qual.get("qualification_score", 0)
-            lead["qualified"] = qual.get("qualified", False)
-            lead["qualification_reason"] = qual.get("qualification_reason", [])
-        
-        return {
-            "thread_id": thread_id,
-            "leads": leads,
-            "count": len(leads)
-        }
-        
+        if sort not in LEAD_SORT_FIELDS:
+            raise HTTPException(status_code=400, detail=f"sort must be one of {sorted(LEAD_SORT_FIELDS)}")
+
+        company_q = company.lower() if company else None
+
+        def matches(lead: Dict[str, Any]) -> bool:
+            if qualified is not None and lead["qualified"] != qualified:
+                return False
+            if min_score is not None and lead["qualification_score"] < min_score:
+                return False
+            if max_score is not None and lead["qualification_score"] > max_score:
+                return False
+            if company_q and company_q not in lead["company_name"].lower():
+                return False
+            return True
+
+        filters = {"qualified": qualified, "min_score": min_score, "max_score": max_score, "company": company_q}
+        filtered = any(v is not None for v in filters.values())
+
+        return await asyncio.to_thread(
+            list_records,
+            thread_id, "leads", if_none_match, filters,
+            matches if filtered else None,
+            sort, order, cursor, limit, fields, resolve
+        )
+
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Failed to get leads: {str(e)}")
 
 @app.get("/api/campaign/{thread_id}/emails")
-async def get_emails(thread_id: str):
+async def get_emails(
+    thread_id: str,
+    if_none_match: Optional[str] = Header(None),
+    cursor: Optional[str] = None,
+    limit: Optional[int] = Query(None, ge=1, le=MAX_PAGE_SIZE),
+    sort: str = "company_name",
+    order: str = "asc",
+    sent: Optional[bool] = None,
+    company: Optional[str] = None,
+    fields: Optional[str] = None,
+    resolve: bool = True
+):
     """
-    Get all drafted emails for a campaign
+    Drafted emails joined with send logs, filtered, sorted and paginated.
+    Without limit every matching email is returned.
     """
     try:
-        config = {"configurable": {"thread_id": thread_id}}
-        state = langgraph_app.invoke({}, config=config)
-        
-        emails = state.get("emails", [])
-        send_logs = state.get("email_send_logs", [])
-        
-        for email in emails:
-            log = next((l for l in send_logs if l["email"] == email["email"] and l["company_name"] == email["company_name"]), {})
-            email["sent"] = log.get("status") == "sent"
-            email["sent_at"] = log.get("sent_at")
-            email["message_id"] = log.get("message_id")
-        
-        return {
-            "thread_id": thread_id,
-            "emails": emails,
-            "count": len(emails)
-        }
-        
+        if sort not in EMAIL_SORT_FIELDS:
+            raise HTTPException(status_code=400, detail=f"sort must be one of {sorted(EMAIL_SORT_FIELDS)}")
+
+        company_q = company.lower() if company else None
+
+        def matches(email: Dict[str, Any]) -> bool:
+            if sent is not None and email["sent"] != sent:
+                return False
+            if company_q and company_q not in email["company_name"].lower():
+                return False
+            return True
+
+        filters = {"sent": sent, "company": company_q}
+        filtered = any(v is not None for v in filters.values())
+
+        return await asyncio.to_thread(
+            list_records,
+            thread_id, "emails", if_none_match, filters,
+            matches if filtered else None,
+            sort, order, cursor, limit, fields, resolve
+        )
+
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Failed to get emails: {str(e)}")
 
+@app.get("/api/blobs/{digest}")
+async def get_blob(digest: str):
+    """
+    Text behind a "blob:sha256:<digest>" reference found in campaign state.
+    Content-addressed, so it can be cached forever.
+    """
+    text = await asyncio.to_thread(blob_store.get, digest)
+    if text is None:
+        raise HTTPException(status_code=404, detail="Blob not found")
+    return Response(
+        content=text,
+        media_type="text/plain; charset=utf-8",
+        headers={"ETag": f'"{digest}"', "Cache-Control": "public, max-age=31536000, immutable"}
+    )
+
 @app.get("/api/campaign/{thread_id}/monitoring")
 async def get_monitoring(thread_id: str):
     """
     Get monitoring status for a campaign
     """
     try:
-        config = {"configurable": {"thread_id": thread_id}}
-        state = langgraph_app.invoke({}, config=config)
+        state = await asyncio.to_thread(read_state, thread_id)
         
         monitoring = state.get("monitoring", [])
         active_monitor = state.get("active_monitor", {})
+        monitoring, active_monitor = await asyncio.to_thread(
+            blob_store.resolve_deep, [monitoring, active_monitor or {}]
+        )
         
         return {
             "thread_id": thread_id,
@@ -399,20 +947,134 @@ async def get_monitoring(thread_id: str):
             "count": len(monitoring)
         }
         
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Failed to get monitoring data: {str(e)}")
 
+@app.get("/api/jobs/{job_id}")
+async def get_job(job_id: str):
+    """
+    Status of a background graph job
+    """
+    job = job_manager.get(job_id)
+    if not job:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return job
+
+@app.post("/api/jobs/{job_id}/cancel")
+async def cancel_job(job_id: str):
+    """
+    Cancel a queued job, or stop a running one after its current node
+    """
+    if not job_manager.get(job_id):
+        raise HTTPException(status_code=404, detail="Job not found")
+
+    if not job_manager.cancel(job_id):
+        raise HTTPException(status_code=409, detail="Job already finished")
+
+    return job_manager.get(job_id)
+
+@app.get("/api/campaign/{thread_id}/jobs")
+async def list_campaign_jobs(thread_id: str):
+    """
+    All known jobs for a campaign
+    """
+    jobs = job_manager.list(thread_id)
+    return {"thread_id": thread_id, "jobs": jobs, "count": len(jobs)}
+
+@app.get("/api/scheduler")
+async def get_scheduler_status():
+    """
+    Queue depth, wait times and job counts of the campaign scheduler
+    """
+    return job_manager.stats()
+
+@app.get("/api/ws/stats")
+async def get_ws_stats():
+    """
+    Connection and queue counters of the WebSocket hub and event bus
+    """
+    return {**ws_hub.stats(), "event_bus": event_bus.stats()}
+
+@app.get("/api/providers")
+async def get_provider_status():
+    """
+    Rate-limit tokens, circuit breaker state and latency per external provider
+    """
+    return {"providers": provider_stats(), "hedging": hedge_stats()}
+
+@app.get("/api/models")
+async def get_model_routing():
+    """
+    Task → model tier routing, fallbacks and concurrency slot usage per task
+    """
+    try:
+        return model_router.stats()
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+@app.get("/api/monitoring/daemon")
+async def get_monitor_daemon_status():
+    """
+    Queue depth, lag and worker usage of the shared monitoring service
+    (running only on the leader worker)
+    """
+    return {**monitor_daemon.stats(), "leader": leader_lock.is_leader, "pid": os.getpid()}
+
+@app.get("/api/maintenance/retention")
+async def get_retention_status():
+    """
+    Retention policy settings, database size and the last pass report
+    """
+    return await asyncio.to_thread(retention_service.stats)
+
+@app.get("/api/maintenance/shards")
+async def get_checkpoint_shards():
+    """
+    Checkpoint shard files with their thread counts and open connections
+    """
+    try:
+        return await asyncio.to_thread(checkpointer.stats)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Failed to read shard stats: {str(e)}")
+
+@app.post("/api/maintenance/retention/run")
+async def run_retention():
+    """
+    Prune, archive and compact now instead of waiting for the next pass
+    """
+    try:
+        report = await asyncio.to_thread(retention_service.run_once)
+        return {"status": "completed", "report": report}
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Retention pass failed: {str(e)}")
+
 @app.get("/api/threads")
-async def list_threads():
+async def list_threads(
+    phase: Optional[str] = None,
+    mode: Optional[str] = None,
+    limit: int = Query(50, ge=1, le=MAX_PAGE_SIZE),
+    cursor: Optional[str] = None
+):
     """
-    List all campaign threads
+    List campaign threads from the registry, most recently updated first
     """
     try:
+        try:
+            page = await asyncio.to_thread(
+                campaign_registry.list, phase=phase, mode=mode, limit=limit, cursor=cursor
+            )
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
 
         return {
-            "threads": [],
-            "count": 0
+            "threads": page["campaigns"],
+            "count": len(page["campaigns"]),
+            "next_cursor": page["next_cursor"]
         }
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Failed to list threads: {str(e)}")
 
@@ -0,0 +1,358 @@
+import os
+import threading
+import time
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+
+from deadline import deadline_expired, in_context, time_left
+from resilience import GuardedModel, ProviderUnavailable, providers
+
+# =================================================
+# CONSTANTS
+# =================================================
+GROQ_API_KEY = os.getenv("GROQ_API_KEY")
+MODEL_BACKEND = os.getenv("MODEL_BACKEND", "groq")
+
+# Model tiers: models are tried in order, the next one on an error or
+# timeout. Inputs longer than max_input_chars go to overflow_tier.
+# LLM_MODELS_<TIER>="model-a,model-b" overrides the model list.
+TIER_CONFIG = {
+    "fast": {
+        "models": ["llama-3.1-8b-instant", "llama-3.3-70b-versatile"],
+        "timeout": 15,
+        "max_input_chars": 12000,
+        "overflow_tier": "large",
+    },
+    "large": {
+        "models": ["llama-3.3-70b-versatile", "llama-3.1-8b-instant"],
+        "timeout": 30,
+        "max_input_chars": None,
+        "overflow_tier": None,
+    },
+}
+
+# Task → tier and how many calls of the task may run at once.
+# LLM_TASK_TIERS="summary=large,extraction=large" overrides tiers.
+TASK_CONFIG = {
+    "extraction": {"tier": "fast", "concurrency": 4},
+    "summary": {"tier": "fast", "concurrency": 4},
+    "cold_email": {"tier": "large", "concurrency": 2},
+    "followup": {"tier": "large", "concurrency": 2},
+    "tools": {"tier": "fast", "concurrency": 2},
+}
+
+LLM_TEMPERATURE = 0
+
+# Longest a call waits for a free concurrency slot of its task
+MODEL_QUEUE_MAX_WAIT_SECONDS = 20
+
+
+class ConcurrencyLimited(ProviderUnavailable):
+    """No free concurrency slot for the task in time; nothing was sent"""
+
+
+def _apply_env_overrides():
+    for tier, config in TIER_CONFIG.items():
+        models = os.getenv(f"LLM_MODELS_{tier.upper()}")
+        if models:
+            config["models"] = [m.strip() for m in models.split(",") if m.strip()]
+
+    for pair in os.getenv("LLM_TASK_TIERS", "").split(","):
+        task, _, tier = pair.partition("=")
+        if task.strip() in TASK_CONFIG and tier.strip() in TIER_CONFIG:
+            TASK_CONFIG[task.strip()]["tier"] = tier.strip()
+
+_apply_env_overrides()
+
+
+def input_chars(value: Any) -> int:
+    """Rough prompt size: characters of a string, message or list of messages"""
+    if isinstance(value, str):
+        return len(value)
+    if isinstance(value, (list, tuple)):
+        return sum(input_chars(v) for v in value)
+    content = getattr(value, "content", None)
+    if content is not None:
+        return input_chars(content)
+    if isinstance(value, dict):
+        return input_chars(value.get("content", ""))
+    return 0
+
+
+# =================================================
+# MODEL FACTORIES
+# =================================================
+def groq_chat_model(model_name: str, timeout: float) -> Any:
+    from langchain_groq import ChatGroq
+    return ChatGroq(
+        api_key=GROQ_API_KEY,
+        model=model_name,
+        temperature=LLM_TEMPERATURE,
+        timeout=timeout
+    )
+
+
+class FakeChatModel:
+    """
+    Local stand-in for a chat model: invoke/batch, with_structured_output
+    and bind_tools. `reply(text)` gives the response text (fixed text by
+    default); `error` is raised instead when set, to exercise fallback.
+    """
+
+    def __init__(
+        self,
+        model_name: str = "fake",
+        reply: Optional[Callable[[str], str]] = None,
+        error: Optional[Exception] = None,
+        schema: Any = None
+    ):
+        self.model_name = model_name
+        self.reply = reply or (lambda text: f"Response from {model_name}.")
+        self.error = error
+        self.schema = schema
+        self.calls: List[str] = []
+
+    def invoke(self, messages: Any, *args, **kwargs) -> Any:
+        text = messages if isinstance(messages, str) else "\n".join(
+            str(getattr(m, "content", m)) for m in messages
+        )
+        self.calls.append(text)
+        if self.error is not None:
+            raise self.error
+
+        content = self.reply(text)
+        if self.schema is None:
+            from langchain_core.messages import AIMessage
+            return AIMessage(content=content)
+        return self.schema(**{name: content for name in self.schema.model_fields})
+
+    def batch(self, inputs: Iterable[Any], *args, return_exceptions: bool = False, **kwargs) -> List[Any]:
+        results = []
+        for value in inputs:
+            try:
+                results.append(self.invoke(value))
+            except Exception as e:
+                if not return_exceptions:
+                    raise
+                results.append(e)
+        return results
+
+    def with_structured_output(self, schema: Any, **kwargs) -> "FakeChatModel":
+        fake = FakeChatModel(self.model_name, self.reply, self.error, schema)
+        fake.calls = self.calls
+        return fake
+
+    def bind_tools(self, tools: Any, **kwargs) -> "FakeChatModel":
+        return self
+
+
+# =================================================
+# ROUTER
+# =================================================
+class ModelRouter:
+    """
+    Picks the model for a call from its task (TASK_CONFIG) and input size
+    (TIER_CONFIG), falls back through the tier's models on errors, and
+    caps concurrent calls per task.
+
+    `factory(model_name, timeout)` builds the underlying chat model; each
+    model is guarded by `provider` with its own circuit breaker.
+    """
+
+    def __init__(
+        self,
+        factory: Callable[[str, float], Any] = groq_chat_model,
+        provider=None,
+        tiers: Optional[Dict[str, Dict[str, Any]]] = None,
+        tasks: Optional[Dict[str, Dict[str, Any]]] = None,
+        queue_wait: float = MODEL_QUEUE_MAX_WAIT_SECONDS
+    ):
+        self.factory = factory
+        self.provider = provider or providers["groq"]
+        self.tiers = tiers or TIER_CONFIG
+        self.tasks = tasks or TASK_CONFIG
+        self.queue_wait = queue_wait
+
+        self._models: Dict[Tuple[str, str], GuardedModel] = {}
+        self._slots = {
+            task: threading.BoundedSemaphore(config["concurrency"]) for task, config in self.tasks.items()
+        }
+        self._lock = threading.Lock()
+        self._stats: Dict[str, Dict[str, int]] = defaultdict(
+            lambda: {"calls": 0, "failures": 0, "fallbacks": 0, "overflow": 0, "queued": 0, "rejected": 0}
+        )
+        self._model_calls: Dict[str, int] = defaultdict(int)
+        self._wait_seconds: Dict[str, float] = defaultdict(float)
+
+    def for_task(self, task: str) -> "RoutedModel":
+        if task not in self.tasks:
+            raise ValueError(f"Unknown model task: {task}")
+        return RoutedModel(self, task)
+
+    def model(self, model_name: str, tier: str) -> GuardedModel:
+        """Guarded client for a model in a tier (the tier sets its timeout), built once"""
+        with self._lock:
+            guarded = self._models.get((tier, model_name))
+            if guarded is None:
+                timeout = self.tiers[tier]["timeout"]
+                # One breaker per model name, shared by the tiers using it
+                guarded = GuardedModel(self.factory(model_name, timeout), self.provider, key=model_name, timeout=timeout)
+                self._models[(tier, model_name)] = guarded
+            return guarded
+
+    def tier_for(self, task: str, value: Any) -> str:
+        tier = self.tasks[task]["tier"]
+        size = input_chars(value)
+        # Follow overflow tiers until one takes inputs this long
+        seen = set()
+        while tier not in seen:
+            seen.add(tier)
+            limit = self.tiers[tier].get("max_input_chars")
+            overflow = self.tiers[tier].get("overflow_tier")
+            if not limit or size <= limit or not overflow:
+                break
+            tier = overflow
+        return tier
+
+    def call(self, task: str, value: Any, derive: Callable[[GuardedModel], Any], *args, **kwargs) -> Any:
+        """
+        One call of `task`: the tier's models in order, each derived by
+        `derive` (structured output, bound tools). Raises the last error
+        when all fail, or ConcurrencyLimited when no slot frees up.
+        """
+        tier = self.tier_for(task, value)
+        if tier != self.tasks[task]["tier"]:
+            self._count(task, "overflow")
+
+        slot = self._slots[task]
+        started = time.monotonic()
+        if not slot.acquire(blocking=False):
+            self._count(task, "queued")
+            if not slot.acquire(timeout=max(0.0, min(self.queue_wait, time_left()))):
+                self._count(task, "rejected")
+                raise ConcurrencyLimited(f"No free {task} model slot")
+            with self._lock:
+                self._wait_seconds[task] += time.monotonic() - started
+
+        try:
+            last_error: Optional[Exception] = None
+            for i, model_name in enumerate(self.tiers[tier]["models"]):
+                if i > 0:
+                    # No point trying another model once the deadline is gone
+                    if deadline_expired():
+                        break
+                    self._count(task, "fallbacks")
+                    print(f"[ModelRouter] {task}: falling back to {model_name} ({type(last_error).__name__})")
+                try:
+                    result = derive(self.model(model_name, tier)).invoke(value, *args, **kwargs)
+                except Exception as e:
+                    last_error = e
+                    continue
+
+                self._count(task, "calls")
+                with self._lock:
+                    self._model_calls[model_name] += 1
+                return result
+
+            self._count(task, "failures")
+            raise last_error
+        finally:
+            slot.release()
+
+    def _count(self, task: str, stat: str):
+        with self._lock:
+            self._stats[task][stat] += 1
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            tasks = {
+                task: {
+                    **self._stats[task],
+                    "tier": config["tier"],
+                    "concurrency": config["concurrency"],
+                    "queue_wait_seconds": round(self._wait_seconds[task], 2),
+                }
+                for task, config in self.tasks.items()
+            }
+            model_calls = dict(self._model_calls)
+
+        return {
+            "tasks": tasks,
+            "tiers": {name: list(config["models"]) for name, config in self.tiers.items()},
+            "models": model_calls,
+        }
+
+
+class RoutedModel:
+    """
+    Model for one task, used like a chat model (invoke, batch,
+    with_structured_output, bind_tools); every call goes through the router.
+    """
+
+    def __init__(self, router: ModelRouter, task: str, derive: Callable[[GuardedModel], Any] = None):
+        self.router = router
+        self.task = task
+        self.derive = derive or (lambda m: m)
+        self._derived: Dict[int, Any] = {}
+        self._lock = threading.Lock()
+
+    def _derived_model(self, guarded: GuardedModel) -> Any:
+        # Structured output / tool binding is set up once per model
+        with self._lock:
+            derived = self._derived.get(id(guarded))
+            if derived is None:
+                derived = self.derive(guarded)
+                self._derived[id(guarded)] = derived
+            return derived
+
+    def invoke(self, value: Any, *args, **kwargs) -> Any:
+        return self.router.call(self.task, value, self._derived_model, *args, **kwargs)
+
+    def batch(
+        self,
+        inputs: Iterable[Any],
+        config: Optional[Dict[str, Any]] = None,
+        return_exceptions: bool = False,
+        **kwargs
+    ) -> List[Any]:
+        """invoke per input (each routed and falling back on its own), in order"""
+        inputs = list(inputs)
+        if not inputs:
+            return []
+
+        workers = min(
+            len(inputs),
+            (config or {}).get("max_concurrency") or len(inputs),
+            self.router.tasks[self.task]["concurrency"]
+        )
+
+        def run(value):
+            try:
+                return self.invoke(value, **kwargs)
+            except Exception as e:
+                if not return_exceptions:
+                    raise
+                return e
+
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            futures = [pool.submit(in_context(run), value) for value in inputs]
+            return [f.result() for f in futures]
+
+    def with_structured_output(self, *args, **kwargs) -> "RoutedModel":
+        derive = self.derive
+        return RoutedModel(self.router, self.task, lambda m: derive(m).with_structured_output(*args, **kwargs))
+
+    def bind_tools(self, *args, **kwargs) -> "RoutedModel":
+        derive = self.derive
+        return RoutedModel(self.router, self.task, lambda m: derive(m).bind_tools(*args, **kwargs))
+
+
+def fake_chat_model(model_name: str, timeout: float) -> FakeChatModel:
+    return FakeChatModel(model_name)
+
+
+def create_model_router(backend: str = MODEL_BACKEND) -> ModelRouter:
+    if backend == "fake":
+        return ModelRouter(factory=fake_chat_model)
+    return ModelRouter()
@@ -0,0 +1,264 @@
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, Iterable, Optional, Set
+
+from monitor_scheduler import MonitorScheduler
+from reply_listener import ReplyListener
+
+# =================================================
+# CONSTANTS
+# =================================================
+DAEMON_MAX_WORKERS = 4
+DAEMON_DISCOVER_SECONDS = 300
+DAEMON_IDLE_WAIT_SECONDS = 60
+DAEMON_RETRY_SECONDS = 30
+
+
+# =================================================
+# MONITOR DAEMON
+# =================================================
+class MonitorDaemon:
+    """
+    One long-running service that monitors every live campaign.
+
+    Campaigns in the "monitor" phase are discovered via list_threads (the
+    campaign registry). Follow-up/expiry deadlines come from the shared
+    scheduler and replies from the shared IMAP listener; due campaigns are
+    queued and resumed by a bounded worker pool, at most one run per
+    thread at a time.
+
+    `submit(thread_id, fn, on_done)` runs a resume; pass the API's job
+    submission so daemon runs and API runs on the same thread never
+    overlap. It must call on_done(ok) once the run ends in any way (done,
+    failed, cancelled while queued); ok is fn's result, False if it never
+    ran. Without it the daemon uses its own pool.
+    """
+
+    def __init__(
+        self,
+        app,
+        list_threads: Callable[[], Iterable[str]],
+        scheduler: MonitorScheduler,
+        listener: ReplyListener,
+        max_workers: int = DAEMON_MAX_WORKERS,
+        discover_interval: float = DAEMON_DISCOVER_SECONDS,
+        submit: Optional[Callable[[str, Callable[[], bool], Callable[[bool], None]], Any]] = None
+    ):
+        self.app = app
+        self.list_threads = list_threads
+        self.scheduler = scheduler
+        self.listener = listener
+        self.max_workers = max_workers
+        self.discover_interval = discover_interval
+        self.submit = submit
+
+        self._campaigns: Set[str] = set()
+        # thread_id -> time it became ready to run
+        self._queue: "OrderedDict[str, float]" = OrderedDict()
+        self._in_flight: Dict[str, float] = {}
+        self._retry_at: Dict[str, float] = {}
+        self._last_lag = 0.0
+        self._runs = 0
+        self._failures = 0
+
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._thread: Optional[threading.Thread] = None
+        self._stop = threading.Event()
+        self._cond = threading.Condition()
+
+    # ---------------------------------------------
+    # Lifecycle
+    # ---------------------------------------------
+    def start(self):
+        if self._thread and self._thread.is_alive():
+            return
+
+        self._stop.clear()
+        self._executor = ThreadPoolExecutor(
+            max_workers=self.max_workers, thread_name_prefix="monitor-worker"
+        )
+        self.listener.add_callback(self._on_replies)
+        self.listener.start()
+
+        self._thread = threading.Thread(
+            target=self._run, name="monitor-daemon", daemon=True
+        )
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        with self._cond:
+            self._cond.notify_all()
+        if self._thread:
+            self._thread.join(timeout=5)
+        if self._executor:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+
+    # ---------------------------------------------
+    # Discovery
+    # ---------------------------------------------
+    def discover(self):
+        for thread_id in self.list_threads():
+            if thread_id in self._campaigns:
+                continue
+
+            snapshot = self.app.get_state({"configurable": {"thread_id": thread_id}})
+            values = snapshot.values or {}
+            if values.get("phase") != "monitor":
+                continue
+
+            monitoring = values.get("monitoring", [])
+            if not any(m.get("monitor_status") == "active" for m in monitoring):
+                continue
+
+            self.track(thread_id, monitoring)
+
+    def track(self, thread_id: str, monitoring: Iterable[Dict[str, Any]]):
+        monitoring = list(monitoring)
+        self.scheduler.ensure_loaded(thread_id, monitoring)
+        self.listener.scanner.watch_all(monitoring, thread_id)
+
+        with self._cond:
+            self._campaigns.add(thread_id)
+            self._cond.notify_all()
+
+    def untrack(self, thread_id: str):
+        self.scheduler.forget(thread_id)
+        with self._cond:
+            self._campaigns.discard(thread_id)
+            self._queue.pop(thread_id, None)
+            self._retry_at.pop(thread_id, None)
+
+    # ---------------------------------------------
+    # Queueing
+    # ---------------------------------------------
+    def _enqueue(self, thread_id: str, ready_at: float):
+        if thread_id in self._queue:
+            return
+        if self._retry_at.get(thread_id, 0.0) > time.time():
+            return
+        # Timers and replies only exist for live campaigns, so adopt them
+        self._campaigns.add(thread_id)
+        self._queue[thread_id] = ready_at
+
+    def _on_replies(self, thread_ids: Set[str]):
+        now = time.time()
+        with self._cond:
+            for thread_id in thread_ids:
+                self._enqueue(thread_id, now)
+            self._cond.notify_all()
+
+    def _dispatch(self):
+        while self._queue and len(self._in_flight) < self.max_workers:
+            ready = [t for t in self._queue if t not in self._in_flight]
+            if not ready:
+                return
+
+            thread_id = ready[0]
+            ready_at = self._queue.pop(thread_id)
+            now = time.time()
+            self._last_lag = max(0.0, now - ready_at)
+            self._in_flight[thread_id] = now
+
+            try:
+                if self.submit:
+                    self.submit(
+                        thread_id,
+                        lambda t=thread_id: self._resume(t),
+                        lambda ok, t=thread_id: self._release(t, ok)
+                    )
+                else:
+                    future = self._executor.submit(self._resume, thread_id)
+                    future.add_done_callback(
+                        lambda f, t=thread_id: self._release(t, not f.cancelled() and f.result())
+                    )
+            except Exception as e:
+                # e.g. the job queue is full: try again later
+                print(f"Monitor run not submitted for {thread_id}: {e}")
+                self._in_flight.pop(thread_id, None)
+                self._retry_at[thread_id] = now + DAEMON_RETRY_SECONDS
+
+    def _resume(self, thread_id: str) -> bool:
+        """One monitor pass; False if it failed"""
+        config = {"configurable": {"thread_id": thread_id}}
+
+        try:
+            state = self.app.invoke({}, config=config)
+        except Exception as e:
+            self._failures += 1
+            print(f"Monitor run failed for {thread_id}: {e}")
+            return False
+
+        self._runs += 1
+        if not any(m.get("monitor_status") == "active" for m in state.get("monitoring", [])):
+            print(f"Campaign {thread_id} finished monitoring")
+            self.untrack(thread_id)
+        return True
+
+    def _release(self, thread_id: str, ok: bool):
+        """A dispatched run ended (or was dropped before it ran)"""
+        with self._cond:
+            self._in_flight.pop(thread_id, None)
+            if not ok:
+                self._retry_at[thread_id] = time.time() + DAEMON_RETRY_SECONDS
+            self._cond.notify_all()
+
+    # ---------------------------------------------
+    # Loop
+    # ---------------------------------------------
+    def _run(self):
+        next_discover = 0.0
+
+        while not self._stop.is_set():
+            now = time.time()
+
+            if now >= next_discover:
+                try:
+                    self.discover()
+                except Exception as e:
+                    print(f"Campaign discovery failed: {e}")
+                next_discover = now + self.discover_interval
+
+            with self._cond:
+                for thread_id in self.scheduler.due_threads(now):
+                    # A running thread consumes its own due timers
+                    if thread_id in self._in_flight:
+                        continue
+                    due_at = self.scheduler.next_due(thread_id) or now
+                    self._enqueue(thread_id, due_at)
+
+                self._dispatch()
+
+                # Timers already due belong to queued/running threads;
+                # completions notify us, so only tick while runs are active
+                next_due = self.scheduler.next_due()
+                if next_due is None or next_due <= time.time():
+                    next_due = now + (1.0 if self._in_flight else DAEMON_IDLE_WAIT_SECONDS)
+                wake_at = min(next_discover, next_due)
+                self._cond.wait(max(0.0, wake_at - time.time()))
+
+    # ---------------------------------------------
+    # Metrics
+    # ---------------------------------------------
+    def stats(self) -> Dict[str, Any]:
+        now = time.time()
+        with self._cond:
+            oldest = min(self._queue.values(), default=None)
+            next_due = self.scheduler.next_due()
+            return {
+                "running": bool(self._thread and self._thread.is_alive()),
+                "campaigns": len(self._campaigns),
+                "queue_depth": len(self._queue),
+                "in_flight": len(self._in_flight),
+                "max_workers": self.max_workers,
+                "lag_seconds": round(now - oldest, 3) if oldest is not None else 0.0,
+                "last_dispatch_lag_seconds": round(self._last_lag, 3),
+                "pending_timers": self.scheduler.pending_count(),
+                "next_due_in_seconds": round(next_due - now, 3) if next_due is not None else None,
+                "watched_messages": self.listener.scanner.watched_count(),
+                "push_active": self.listener.push_active,
+                "runs": self._runs,
+                "failures": self._failures
+            }
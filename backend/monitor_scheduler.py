@@ -0,0 +1,216 @@
+import heapq
+import itertools
+import threading
+import time
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Set, Tuple
+
+# =================================================
+# CONSTANTS
+# =================================================
+FOLLOWUP_1_AFTER_SECONDS = 60
+FOLLOWUP_2_AFTER_SECONDS = 420
+EXPIRE_AFTER_SECONDS = 600
+
+
+# =================================================
+# Helper
+# =================================================
+def next_monitor_event(m: Dict[str, Any]) -> Optional[Tuple[float, str]]:
+    """
+    Next (due_timestamp, kind) follow-up for a monitoring entry, or None
+    when both were sent. kind is followup_1 or followup_2.
+    """
+    if not is_monitored(m):
+        return None
+
+    start = datetime.fromisoformat(m["monitor_started_at"]).timestamp()
+
+    if not m.get("followup_1_sent"):
+        return start + FOLLOWUP_1_AFTER_SECONDS, "followup_1"
+    if not m.get("followup_2_sent"):
+        return start + FOLLOWUP_2_AFTER_SECONDS, "followup_2"
+    return None
+
+
+def expiry_time(m: Dict[str, Any]) -> Optional[float]:
+    """
+    When a monitoring entry expires, whether or not its follow-ups went
+    out (None when it is no longer monitored).
+    """
+    if not is_monitored(m):
+        return None
+    return datetime.fromisoformat(m["monitor_started_at"]).timestamp() + EXPIRE_AFTER_SECONDS
+
+
+def is_monitored(m: Dict[str, Any]) -> bool:
+    # A lead that replied gets no more timers; it waits for a meeting decision
+    return m.get("monitor_status") == "active" and not m.get("reply_received")
+
+
+def timer_slot(kind: str) -> str:
+    # Each message has one follow-up timer and one expiry timer
+    return "expire" if kind == "expire" else "followup"
+
+
+# =================================================
+# MONITOR SCHEDULER
+# =================================================
+class MonitorScheduler:
+    """
+    Deadline-ordered timers for every monitored message.
+
+    Each campaign thread has its own min-heap of (due_at, message_id, kind),
+    and a global heap orders threads by their earliest deadline. A message
+    has a follow-up timer and an independent expiry timer. Entries are
+    replaced lazily: rescheduling a timer bumps its token and the stale
+    heap item is discarded when it surfaces.
+    """
+
+    def __init__(self):
+        self._heaps: Dict[str, List[Tuple[float, int, str, str]]] = {}
+        self._tokens: Dict[str, Dict[Tuple[str, str], int]] = {}
+        self._global: List[Tuple[float, str]] = []
+        self._loaded: Set[str] = set()
+        self._seq = itertools.count()
+        self._lock = threading.Lock()
+
+    # ---------------------------------------------
+    # Registration
+    # ---------------------------------------------
+    def ensure_loaded(self, thread_id: str, entries: List[Dict[str, Any]]) -> bool:
+        """
+        Seed timers for a thread the first time it is seen in this process.
+        Returns True when the thread was loaded by this call.
+        """
+        with self._lock:
+            if thread_id in self._loaded:
+                return False
+            self._loaded.add(thread_id)
+
+        for m in entries:
+            self.schedule(thread_id, m)
+        return True
+
+    def schedule(self, thread_id: str, m: Dict[str, Any], not_before: Optional[float] = None):
+        """
+        (Re)set a message's timers from its entry. not_before delays the
+        follow-up (e.g. a retry after a failed send), never the expiry.
+        """
+        followup = next_monitor_event(m)
+        if followup is not None and not_before is not None:
+            followup = (max(followup[0], not_before), followup[1])
+
+        expire_at = expiry_time(m)
+        expiry = (expire_at, "expire") if expire_at is not None else None
+
+        with self._lock:
+            self._set_timer(thread_id, m["message_id"], "followup", followup)
+            self._set_timer(thread_id, m["message_id"], "expire", expiry)
+
+    def forget(self, thread_id: str):
+        with self._lock:
+            self._heaps.pop(thread_id, None)
+            self._tokens.pop(thread_id, None)
+            self._loaded.discard(thread_id)
+
+    # ---------------------------------------------
+    # Heap helpers (caller holds the lock)
+    # ---------------------------------------------
+    def _set_timer(self, thread_id: str, message_id: str, slot: str, event: Optional[Tuple[float, str]]):
+        tokens = self._tokens.setdefault(thread_id, {})
+
+        if event is None:
+            tokens.pop((message_id, slot), None)
+            return
+
+        due_at, kind = event
+        token = next(self._seq)
+        tokens[(message_id, slot)] = token
+
+        heap = self._heaps.setdefault(thread_id, [])
+        heapq.heappush(heap, (due_at, token, message_id, kind))
+        if heap[0][1] == token:
+            heapq.heappush(self._global, (due_at, thread_id))
+
+    def _head(self, thread_id: str) -> Optional[Tuple[float, int, str, str]]:
+        heap = self._heaps.get(thread_id)
+        tokens = self._tokens.get(thread_id, {})
+
+        while heap and tokens.get((heap[0][2], timer_slot(heap[0][3]))) != heap[0][1]:
+            heapq.heappop(heap)
+
+        return heap[0] if heap else None
+
+    def _global_head(self) -> Optional[Tuple[float, str]]:
+        while self._global:
+            due_at, thread_id = self._global[0]
+            head = self._head(thread_id)
+            if head and head[0] == due_at:
+                return self._global[0]
+            heapq.heappop(self._global)
+            if head:
+                heapq.heappush(self._global, (head[0], thread_id))
+        return None
+
+    # ---------------------------------------------
+    # Queries
+    # ---------------------------------------------
+    def pop_due(self, thread_id: str, now: Optional[float] = None) -> List[Tuple[str, str]]:
+        """
+        Remove and return every (message_id, kind) due for this thread.
+        """
+        now = time.time() if now is None else now
+        due = []
+
+        with self._lock:
+            tokens = self._tokens.get(thread_id, {})
+            while True:
+                head = self._head(thread_id)
+                if not head or head[0] > now:
+                    break
+                _, token, message_id, kind = heapq.heappop(self._heaps[thread_id])
+                del tokens[(message_id, timer_slot(kind))]
+                due.append((message_id, kind))
+
+            head = self._head(thread_id)
+            if head:
+                heapq.heappush(self._global, (head[0], thread_id))
+
+        return due
+
+    def next_due(self, thread_id: Optional[str] = None) -> Optional[float]:
+        with self._lock:
+            if thread_id is not None:
+                head = self._head(thread_id)
+                return head[0] if head else None
+
+            head = self._global_head()
+            return head[0] if head else None
+
+    def due_threads(self, now: Optional[float] = None) -> List[str]:
+        """
+        Thread ids with at least one due timer, earliest first.
+        """
+        now = time.time() if now is None else now
+        threads = []
+
+        with self._lock:
+            popped = []
+            while True:
+                head = self._global_head()
+                if not head or head[0] > now:
+                    break
+                popped.append(heapq.heappop(self._global))
+                if head[1] not in threads:
+                    threads.append(head[1])
+
+            # Keep them queued until pop_due actually consumes the timers
+            for item in popped:
+                heapq.heappush(self._global, item)
+
+        return threads
+
+    def pending_count(self) -> int:
+        with self._lock:
+            return sum(len(t) for t in self._tokens.values())
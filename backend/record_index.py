@@ -0,0 +1,230 @@
+import base64
+import bisect
+import hashlib
+import json
+import threading
+from collections import OrderedDict
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+# =================================================
+# CONSTANTS
+# =================================================
+# Campaigns whose joined rows stay cached
+RECORD_CACHE_SIZE = 32
+
+LEAD_SORT_FIELDS = {"company_name", "qualification_score", "research_confidence", "industry"}
+EMAIL_SORT_FIELDS = {"company_name", "email", "sent_at"}
+
+
+# =================================================
+# Joins (built once per checkpoint, never mutate state)
+# =================================================
+def build_lead_rows(state: Dict[str, Any]) -> List[Dict[str, Any]]:
+    """Leads joined with their qualification result (both keyed by domain)"""
+    by_domain: Dict[str, Dict[str, Any]] = {}
+    for q in state.get("qualification", []):
+        by_domain.setdefault(q.get("domain") or q["company_name"], q)
+
+    rows = []
+    for lead in state.get("leads", []):
+        qual = by_domain.get(lead_key(lead), {})
+        rows.append({
+            **lead,
+            "qualification_score": qual.get("qualification_score", 0),
+            "qualified": qual.get("qualified", False),
+            "qualification_reason": qual.get("qualification_reason", [])
+        })
+    return rows
+
+
+def build_email_rows(state: Dict[str, Any]) -> List[Dict[str, Any]]:
+    """Drafted emails joined with their send log entry"""
+    by_recipient: Dict[Tuple[str, str], Dict[str, Any]] = {}
+    for log in state.get("email_send_logs", []):
+        by_recipient.setdefault((log["email"], log["company_name"]), log)
+
+    rows = []
+    for email in state.get("emails", []):
+        log = by_recipient.get((email["email"], email["company_name"]), {})
+        rows.append({
+            **email,
+            "sent": log.get("status") == "sent",
+            "sent_at": log.get("sent_at"),
+            "message_id": log.get("message_id")
+        })
+    return rows
+
+
+# Unique row keys (the keys of the upsert_leads / upsert_emails channels);
+# they end every sort tuple, so the order is total and no cursor can
+# fall between tied rows
+def lead_key(row: Dict[str, Any]) -> str:
+    return row.get("domain") or row["company_name"]
+
+
+def email_key(row: Dict[str, Any]) -> str:
+    return f'{row["company_name"]}\x00{row["email"]}'
+
+
+# =================================================
+# Cursor helpers
+# =================================================
+def sort_tuple(row: Dict[str, Any], field: str, key: str) -> list:
+    value = row.get(field)
+    if isinstance(value, str):
+        value = value.lower()
+    elif value is not None and not isinstance(value, (int, float)):
+        value = json.dumps(value, sort_keys=True, default=str)
+    # None sorts last; the unique row key breaks ties
+    return [value is None, value if value is not None else 0, key]
+
+
+def encode_cursor(position: list) -> str:
+    raw = json.dumps(position, separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str, size: int = 3) -> list:
+    padded = cursor + "=" * (-len(cursor) % 4)
+    try:
+        position = json.loads(base64.urlsafe_b64decode(padded))
+    except ValueError:
+        raise ValueError("Invalid cursor")
+    if not isinstance(position, list) or len(position) != size:
+        raise ValueError("Invalid cursor")
+    return position
+
+
+def make_etag(*parts: Any) -> str:
+    digest = hashlib.sha256(json.dumps(parts, sort_keys=True, default=str).encode()).hexdigest()
+    return f'"{digest[:32]}"'
+
+
+# =================================================
+# PER-CHECKPOINT RECORD SET
+# =================================================
+class RecordSet:
+    """
+    Joined rows of one kind for one checkpoint, with sorted orders built
+    lazily per field and reused by every page request.
+    """
+
+    def __init__(self, rows: List[Dict[str, Any]], key_fn: Callable[[Dict[str, Any]], str]):
+        self.rows = rows
+        self.key_fn = key_fn
+        self._orders: Dict[str, Tuple[List[list], List[Dict[str, Any]]]] = {}
+        self._lock = threading.Lock()
+
+    def ordered(self, field: str) -> Tuple[List[list], List[Dict[str, Any]]]:
+        """(ascending sort tuples, rows in the same order)"""
+        with self._lock:
+            order = self._orders.get(field)
+            if order is None:
+                decorated = sorted(
+                    ((sort_tuple(r, field, self.key_fn(r)), r) for r in self.rows),
+                    key=lambda item: item[0]
+                )
+                order = ([t for t, _ in decorated], [r for _, r in decorated])
+                self._orders[field] = order
+            return order
+
+    def page(
+        self,
+        sort: str,
+        descending: bool = False,
+        cursor: Optional[str] = None,
+        limit: Optional[int] = None,
+        predicate: Optional[Callable[[Dict[str, Any]], bool]] = None,
+        fields: Optional[List[str]] = None
+    ) -> Dict[str, Any]:
+        """
+        Keyset page over the filtered, sorted rows. The cursor names the
+        last row returned, so pages stay stable while rows are appended.
+        """
+        tuples, rows = self.ordered(sort)
+        position = decode_cursor(cursor) if cursor else None
+
+        try:
+            if descending:
+                end = bisect.bisect_left(tuples, position) if position else len(rows)
+                candidates = range(end - 1, -1, -1)
+            else:
+                start = bisect.bisect_right(tuples, position) if position else 0
+                candidates = range(start, len(rows))
+        except TypeError:
+            # Cursor from a different sort field
+            raise ValueError("Invalid cursor")
+
+        items: List[Dict[str, Any]] = []
+        last_index = None
+        for i in candidates:
+            if limit is not None and len(items) >= limit:
+                break
+            row = rows[i]
+            if predicate and not predicate(row):
+                continue
+            items.append({f: row.get(f) for f in fields} if fields else row)
+            last_index = i
+
+        has_more = False
+        if limit is not None and last_index is not None and len(items) >= limit:
+            rest = range(last_index - 1, -1, -1) if descending else range(last_index + 1, len(rows))
+            has_more = any(predicate is None or predicate(rows[i]) for i in rest)
+
+        total = len(rows) if predicate is None else sum(1 for r in rows if predicate(r))
+
+        return {
+            "items": items,
+            "total": total,
+            "next_cursor": encode_cursor(tuples[last_index]) if has_more else None
+        }
+
+
+# =================================================
+# RECORD CACHE
+# =================================================
+class RecordCache:
+    """
+    Joined lead/email rows per campaign, keyed by the checkpoint they
+    were built from and evicted least-recently-used.
+    """
+
+    def __init__(self, max_threads: int = RECORD_CACHE_SIZE):
+        self.max_threads = max_threads
+        self._entries: "OrderedDict[str, Tuple[str, Dict[str, RecordSet]]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(
+        self,
+        thread_id: str,
+        checkpoint_id: str,
+        load: Callable[[], Tuple[Dict[str, Any], str]]
+    ) -> Tuple[str, Dict[str, RecordSet]]:
+        """
+        (checkpoint id, record sets). On a miss `load()` returns the state
+        and the id of the checkpoint it was read from, which may be newer
+        than checkpoint_id; the records are cached under the loaded id.
+        """
+        with self._lock:
+            entry = self._entries.get(thread_id)
+            if entry and entry[0] == checkpoint_id:
+                self._entries.move_to_end(thread_id)
+                return entry
+
+        state, checkpoint_id = load()
+        records = {
+            "leads": RecordSet(build_lead_rows(state), lead_key),
+            "emails": RecordSet(build_email_rows(state), email_key)
+        }
+
+        with self._lock:
+            self._entries[thread_id] = (checkpoint_id, records)
+            self._entries.move_to_end(thread_id)
+            while len(self._entries) > self.max_threads:
+                self._entries.popitem(last=False)
+
+        return checkpoint_id, records
+
+    def discard(self, thread_id: str):
+        with self._lock:
+            self._entries.pop(thread_id, None)
@@ -0,0 +1,203 @@
+import imaplib
+import select
+import ssl
+import threading
+from typing import Any, Callable, Dict, List, Optional, Set
+
+from reply_scanner import ReplyScanner, imap_ssl_connect
+
+# =================================================
+# CONSTANTS
+# =================================================
+# Servers may drop an IDLE after 30 min (RFC 2177), so renew well before
+IDLE_RENEW_SECONDS = 9 * 60
+FALLBACK_POLL_SECONDS = 60
+
+
+# =================================================
+# REPLY LISTENER
+# =================================================
+class ReplyListener:
+    """
+    Push-based reply detection.
+
+    A dedicated IMAP connection sits in IDLE and only acts as a doorbell:
+    when the server reports a mailbox change, the shared ReplyScanner
+    fetches the new headers and the affected campaign threads are woken.
+    Servers without IDLE (or a broken IDLE session) fall back to polling.
+    """
+
+    def __init__(
+        self,
+        scanner: ReplyScanner,
+        config: Dict[str, Any],
+        connect: Optional[Callable[[Dict[str, Any]], Any]] = None,
+        idle_timeout: float = IDLE_RENEW_SECONDS,
+        poll_interval: float = FALLBACK_POLL_SECONDS
+    ):
+        self.scanner = scanner
+        self.config = config
+        self.idle_timeout = idle_timeout
+        self.poll_interval = poll_interval
+        self._connect = connect or imap_ssl_connect
+
+        self._session = None
+        self._thread: Optional[threading.Thread] = None
+        self._stop = threading.Event()
+
+        self._events: Dict[str, threading.Event] = {}
+        self._callbacks: List[Callable[[Set[str]], None]] = []
+        self._lock = threading.Lock()
+
+        # True while the doorbell connection is in IDLE
+        self.push_active = False
+
+    # ---------------------------------------------
+    # Public API
+    # ---------------------------------------------
+    def start(self):
+        with self._lock:
+            if self._thread and self._thread.is_alive():
+                return
+            self._stop.clear()
+            self._thread = threading.Thread(
+                target=self._run, name="reply-listener", daemon=True
+            )
+            self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        self._drop_session()
+        if self._thread:
+            self._thread.join(timeout=5)
+
+    def add_callback(self, callback: Callable[[Set[str]], None]):
+        """
+        Register a callback receiving the set of thread ids with new replies.
+        """
+        self._callbacks.append(callback)
+
+    def wait_for_thread(self, thread_id: str, timeout: Optional[float] = None) -> bool:
+        """
+        Block until a reply arrives for this thread or the timeout passes.
+        """
+        with self._lock:
+            event = self._events.setdefault(thread_id, threading.Event())
+        woken = event.wait(timeout)
+        event.clear()
+        return woken
+
+    def notify(self, thread_ids: Set[str]):
+        with self._lock:
+            for thread_id in thread_ids:
+                self._events.setdefault(thread_id, threading.Event()).set()
+
+        for callback in list(self._callbacks):
+            try:
+                callback(thread_ids)
+            except Exception as e:
+                print(f"Reply callback failed: {e}")
+
+    # ---------------------------------------------
+    # Doorbell connection
+    # ---------------------------------------------
+    def _ensure_session(self):
+        if self._session is None:
+            session = self._connect(self.config)
+            session.login(self.config["username"], self.config["password"])
+            session.select(self.scanner.mailbox, readonly=True)
+            self._session = session
+        return self._session
+
+    def _drop_session(self):
+        session, self._session = self._session, None
+        self.push_active = False
+        if session is None:
+            return
+        try:
+            session.logout()
+        except Exception:
+            pass
+
+    def _supports_idle(self, session) -> bool:
+        return "IDLE" in getattr(session, "capabilities", ())
+
+    def _input_ready(self, session) -> bool:
+        """
+        Whether a response can be read without blocking: already in
+        imaplib's buffered reader (e.g. an EXISTS that came in with the
+        IDLE continuation), decrypted by SSL, or waiting on the socket.
+        """
+        sock = session.sock
+        previous = sock.gettimeout()
+        sock.setblocking(False)
+        try:
+            return bool(session.file.peek(1))
+        except (BlockingIOError, ssl.SSLWantReadError):
+            return False
+        finally:
+            sock.settimeout(previous)
+
+    def _idle(self, session, timeout: float) -> bool:
+        """
+        Run one IDLE round. Returns True when the server reported a change.
+        """
+        tag = session._new_tag()
+        session.send(tag + b" IDLE\r\n")
+
+        if not session.readline().startswith(b"+"):
+            raise imaplib.IMAP4.error("IDLE rejected")
+
+        self.push_active = True
+        changed = False
+        sock = session.sock
+
+        try:
+            if self._input_ready(session) or select.select([sock], [], [], timeout)[0]:
+                line = session.readline()
+                if not line:
+                    raise imaplib.IMAP4.abort("connection closed during IDLE")
+                changed = line.startswith(b"*")
+        finally:
+            self.push_active = False
+            session.send(b"DONE\r\n")
+            while True:
+                line = session.readline()
+                if not line or line.startswith(tag):
+                    break
+                if line.startswith(b"*"):
+                    changed = True
+
+        return changed
+
+    # ---------------------------------------------
+    # Loop
+    # ---------------------------------------------
+    def _check_replies(self):
+        replies = self.scanner.poll()
+        thread_ids = {t for t in replies.values() if t}
+        if thread_ids:
+            self.notify(thread_ids)
+
+    def _run(self):
+        # Catch up on anything that arrived while nobody was listening
+        self._check_replies()
+
+        while not self._stop.is_set():
+            if not self.scanner.watched_count():
+                self._stop.wait(self.poll_interval)
+                continue
+
+            try:
+                session = self._ensure_session()
+                if self._supports_idle(session):
+                    changed = self._idle(session, self.idle_timeout)
+                else:
+                    changed = not self._stop.wait(self.poll_interval)
+            except (imaplib.IMAP4.error, OSError) as e:
+                print(f"IMAP IDLE failed, polling instead: {e}")
+                self._drop_session()
+                changed = not self._stop.wait(self.poll_interval)
+
+            if changed:
+                self._check_replies()
@@ -0,0 +1,262 @@
+import imaplib
+import re
+import threading
+from datetime import datetime, timezone
+from email.parser import BytesHeaderParser
+from typing import Any, Callable, Dict, Iterable, Optional, Set
+
+# =================================================
+# CONSTANTS
+# =================================================
+MESSAGE_ID_REGEX = re.compile(r"<[^<>\s]+>")
+FETCH_UID_REGEX = re.compile(rb"UID (\d+)")
+UIDNEXT_REGEX = re.compile(rb"UIDNEXT (\d+)")
+
+REPLY_FETCH_ITEMS = "(UID BODY.PEEK[HEADER.FIELDS (IN-REPLY-TO REFERENCES)])"
+
+IMAP_MONTHS = [
+    "Jan", "Feb", "Mar", "Apr", "May", "Jun",
+    "Jul", "Aug", "Sep", "Oct", "Nov", "Dec"
+]
+
+
+# =================================================
+# Helper
+# =================================================
+def normalize_message_id(message_id: str) -> str:
+    return f"<{message_id.strip().strip('<>')}>"
+
+
+def imap_date(dt: datetime) -> str:
+    return f"{dt.day:02d}-{IMAP_MONTHS[dt.month - 1]}-{dt.year}"
+
+
+def parse_reply_references(header_bytes: bytes) -> Set[str]:
+    """
+    Return every Message-ID referenced by In-Reply-To / References.
+    """
+    headers = BytesHeaderParser().parsebytes(header_bytes)
+    found = set()
+    for name in ("In-Reply-To", "References"):
+        for value in headers.get_all(name, []):
+            found.update(MESSAGE_ID_REGEX.findall(str(value)))
+    return found
+
+
+def imap_ssl_connect(config: Dict[str, Any]):
+    return imaplib.IMAP4_SSL(config["host"])
+
+
+# =================================================
+# REPLY SCANNER
+# =================================================
+class ReplyScanner:
+    """
+    Incremental reply detection over one authenticated IMAP session.
+
+    Every monitored Message-ID (across all campaigns) is kept in an
+    in-memory index. Each poll fetches only the headers of messages
+    with a UID above the last one seen, so the cost is proportional to
+    new mail rather than to the number of monitored messages.
+    A UIDVALIDITY change resets the cursor and rescans from the
+    earliest monitored send date.
+    """
+
+    def __init__(
+        self,
+        config: Dict[str, Any],
+        connect: Optional[Callable[[Dict[str, Any]], Any]] = None,
+        mailbox: str = "INBOX"
+    ):
+        self.config = config
+        self.mailbox = mailbox
+        self._connect = connect or imap_ssl_connect
+
+        self._session = None
+        self._uidvalidity: Optional[int] = None
+        self._last_uid = 0
+        self._synced_at: Optional[datetime] = None
+        self._backfill_since: Optional[datetime] = None
+
+        # message_id -> {"thread_id": str, "sent_at": datetime}
+        self._watched: Dict[str, Dict[str, Any]] = {}
+        self._replied: Set[str] = set()
+        # thread_id -> replied message ids not yet taken by monitor_node
+        self._unseen: Dict[str, Set[str]] = {}
+
+        self._lock = threading.RLock()
+
+    # ---------------------------------------------
+    # Index
+    # ---------------------------------------------
+    def watch(self, message_id: str, thread_id: str = "", sent_at: Any = None):
+        message_id = normalize_message_id(message_id)
+
+        if isinstance(sent_at, str):
+            sent_at = datetime.fromisoformat(sent_at)
+        sent_at = sent_at or datetime.now(timezone.utc)
+        if sent_at.tzinfo is None:
+            sent_at = sent_at.replace(tzinfo=timezone.utc)
+
+        with self._lock:
+            if message_id in self._watched:
+                self._watched[message_id]["thread_id"] = thread_id
+                return
+
+            self._watched[message_id] = {"thread_id": thread_id, "sent_at": sent_at}
+
+            # A message sent before the last sync may already have
+            # replies below the cursor, so pick those up on the next poll.
+            if self._last_uid and self._synced_at and sent_at < self._synced_at and (
+                self._backfill_since is None or sent_at < self._backfill_since
+            ):
+                self._backfill_since = sent_at
+
+    def unwatch(self, message_id: str):
+        message_id = normalize_message_id(message_id)
+        with self._lock:
+            entry = self._watched.pop(message_id, None)
+            self._replied.discard(message_id)
+            if entry:
+                self._unseen.get(entry["thread_id"], set()).discard(message_id)
+
+    def watch_all(self, entries: Iterable[Dict[str, Any]], thread_id: str = ""):
+        for m in entries:
+            if m.get("monitor_status") == "active":
+                self.watch(m["message_id"], thread_id, m.get("monitor_started_at"))
+            else:
+                self.unwatch(m["message_id"])
+
+    def watched_count(self) -> int:
+        return len(self._watched)
+
+    def has_reply(self, message_id: str) -> bool:
+        return normalize_message_id(message_id) in self._replied
+
+    def take_replies(self, thread_id: str) -> Set[str]:
+        """
+        Pop replied message ids for a thread that have not been handled yet.
+        """
+        with self._lock:
+            return self._unseen.pop(thread_id, set())
+
+    def thread_for(self, message_id: str) -> str:
+        entry = self._watched.get(normalize_message_id(message_id), {})
+        return entry.get("thread_id", "")
+
+    # ---------------------------------------------
+    # Session
+    # ---------------------------------------------
+    def _ensure_session(self):
+        if self._session is not None:
+            return self._session
+
+        session = self._connect(self.config)
+        session.login(self.config["username"], self.config["password"])
+        session.select(self.mailbox, readonly=True)
+
+        _, data = session.response("UIDVALIDITY")
+        uidvalidity = int(data[0]) if data and data[0] else None
+
+        if uidvalidity != self._uidvalidity:
+            self._uidvalidity = uidvalidity
+            self._last_uid = 0
+
+        self._session = session
+        return session
+
+    def _drop_session(self):
+        session, self._session = self._session, None
+        if session is None:
+            return
+        try:
+            session.logout()
+        except Exception:
+            pass
+
+    def close(self):
+        with self._lock:
+            self._drop_session()
+
+    # ---------------------------------------------
+    # Scanning
+    # ---------------------------------------------
+    def _uidnext(self, session) -> int:
+        _, data = session.status(self.mailbox, "(UIDNEXT)")
+        match = UIDNEXT_REGEX.search(data[0] if data and data[0] else b"")
+        return int(match.group(1)) if match else 1
+
+    def _fetch_and_match(self, session, uid_set: str) -> Dict[str, str]:
+        status, data = session.uid("FETCH", uid_set, REPLY_FETCH_ITEMS)
+        if status != "OK":
+            return {}
+
+        found = {}
+        for item in data or []:
+            if not isinstance(item, tuple):
+                continue
+
+            match = FETCH_UID_REGEX.search(item[0])
+            if not match:
+                continue
+
+            uid = int(match.group(1))
+            if uid > self._last_uid:
+                self._last_uid = uid
+
+            for ref in parse_reply_references(item[1]):
+                if ref in self._watched and ref not in self._replied:
+                    self._replied.add(ref)
+                    thread_id = self._watched[ref]["thread_id"]
+                    self._unseen.setdefault(thread_id, set()).add(ref)
+                    found[ref] = thread_id
+
+        return found
+
+    def _backfill(self, session) -> Dict[str, str]:
+        since, self._backfill_since = self._backfill_since, None
+
+        status, data = session.uid("SEARCH", None, f"SINCE {imap_date(since)}")
+        if status != "OK" or not data or not data[0]:
+            return {}
+
+        uids = [u for u in data[0].split() if int(u) <= self._last_uid]
+        if not uids:
+            return {}
+
+        return self._fetch_and_match(session, b",".join(uids).decode())
+
+    def _sync(self, session) -> Dict[str, str]:
+        found = {}
+        self._synced_at = datetime.now(timezone.utc)
+
+        if self._last_uid == 0:
+            self._last_uid = self._uidnext(session) - 1
+            self._backfill_since = min(
+                (w["sent_at"] for w in self._watched.values()),
+                default=None
+            )
+
+        if self._backfill_since is not None:
+            found.update(self._backfill(session))
+
+        # "N:*" always returns the newest message, even when its UID < N
+        found.update(self._fetch_and_match(session, f"{self._last_uid + 1}:*"))
+        return found
+
+    def poll(self) -> Dict[str, str]:
+        """
+        Fetch new mail once and return newly replied {message_id: thread_id}.
+        """
+        with self._lock:
+            if not self._watched:
+                return {}
+
+            try:
+                session = self._ensure_session()
+                return self._sync(session)
+            except (imaplib.IMAP4.error, OSError) as e:
+                # Cursor is kept, so nothing is lost; reconnect next poll
+                print(f"IMAP reply scan failed: {e}")
+                self._drop_session()
+                return {}
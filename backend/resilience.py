@@ -0,0 +1,422 @@
+import os
+import threading
+import time
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from typing import Any, Callable, Deque, Dict, Iterable, Optional, Tuple
+
+from deadline import call_timeout, current_deadline, deadline_expired, run_with_timeout, time_left
+
+# =================================================
+# CONSTANTS
+# =================================================
+# Per-provider limits. rate/burst: token bucket (requests per second);
+# timeout: seconds passed to the client; failure_threshold/reset_seconds:
+# circuit breaker; retries: extra attempts on errors (not on an open circuit)
+PROVIDER_CONFIG = {
+    "apollo": {"rate": 0.8, "burst": 5, "timeout": 8, "failure_threshold": 3, "reset_seconds": 60, "retries": 1},
+    "ddg": {"rate": 0.5, "burst": 3, "timeout": 10, "failure_threshold": 3, "reset_seconds": 60, "retries": 1},
+    "groq": {"rate": 0.5, "burst": 5, "timeout": 30, "failure_threshold": 5, "reset_seconds": 30, "retries": 0},
+    "dns": {"rate": 20, "burst": 40, "timeout": 3, "failure_threshold": 10, "reset_seconds": 30, "retries": 1},
+    # Breakers are per site host, so one dead site does not stop the crawler
+    "crawl": {"rate": 10, "burst": 20, "timeout": 8, "failure_threshold": 2, "reset_seconds": 300, "retries": 0},
+}
+
+# Longest a caller waits for a rate-limit token before giving up
+RATE_LIMIT_MAX_WAIT_SECONDS = 20
+RETRY_BACKOFF_SECONDS = 0.5
+
+# Hedged crawl fetches: a second request goes out when the first is
+# slower than the provider's recent p90 (at least HEDGE_MIN_DELAY)
+CRAWL_HEDGING = os.getenv("CRAWL_HEDGING", "1") == "1"
+HEDGE_MIN_DELAY_SECONDS = 0.5
+HEDGE_POOL_SIZE = 16
+
+# LLM calls under a campaign deadline get at least this long
+LLM_MIN_TIMEOUT_SECONDS = 5
+
+LATENCY_WINDOW = 200
+# Keyed (per-host) breakers kept before closed ones are dropped
+MAX_KEYED_BREAKERS = 1000
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+
+class ProviderUnavailable(Exception):
+    """The call was not attempted: circuit open or no rate-limit token"""
+
+
+class CircuitOpen(ProviderUnavailable):
+    pass
+
+
+class RateLimited(ProviderUnavailable):
+    pass
+
+
+class ProviderError(Exception):
+    """A response that counts as a provider failure (e.g. HTTP 429/5xx)"""
+
+
+def check_http(resp):
+    """Raise ProviderError for throttling/server errors, else return resp"""
+    if resp.status_code == 429 or resp.status_code >= 500:
+        raise ProviderError(f"HTTP {resp.status_code} from {resp.url}")
+    return resp
+
+
+# =================================================
+# TOKEN BUCKET
+# =================================================
+class TokenBucket:
+    """Allows `rate` calls per second on average, bursts up to `burst`."""
+
+    def __init__(self, rate: float, burst: float):
+        self.rate = rate
+        self.burst = burst
+        self._tokens = burst
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _refill(self):
+        # Caller holds the lock
+        now = time.monotonic()
+        self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def acquire(self, cost: float = 1, max_wait: float = RATE_LIMIT_MAX_WAIT_SECONDS) -> bool:
+        """Take `cost` tokens, waiting up to max_wait; False if that is not enough"""
+        cost = min(cost, self.burst)
+        deadline = time.monotonic() + max_wait
+
+        while True:
+            with self._lock:
+                self._refill()
+                if self._tokens >= cost:
+                    self._tokens -= cost
+                    return True
+                wait_for = (cost - self._tokens) / self.rate
+
+            if time.monotonic() + wait_for > deadline:
+                return False
+            time.sleep(wait_for)
+
+    def available(self) -> float:
+        with self._lock:
+            self._refill()
+            return round(self._tokens, 2)
+
+
+# =================================================
+# CIRCUIT BREAKER
+# =================================================
+class CircuitBreaker:
+    """
+    Opens after `failure_threshold` consecutive failures and rejects calls
+    for `reset_seconds`; then lets one trial call through (half-open),
+    which closes it on success or re-opens it on failure.
+    """
+
+    def __init__(self, failure_threshold: int, reset_seconds: float):
+        self.failure_threshold = failure_threshold
+        self.reset_seconds = reset_seconds
+        self.state = CLOSED
+        self.failures = 0
+        self.opened_at = 0.0
+        self._trial_running = False
+        self._lock = threading.Lock()
+
+    def allow(self) -> bool:
+        with self._lock:
+            if self.state == CLOSED:
+                return True
+            if self.state == OPEN and time.monotonic() - self.opened_at >= self.reset_seconds:
+                self.state = HALF_OPEN
+                self._trial_running = False
+            if self.state == HALF_OPEN and not self._trial_running:
+                self._trial_running = True
+                return True
+            return False
+
+    def record_success(self):
+        with self._lock:
+            self.state = CLOSED
+            self.failures = 0
+            self._trial_running = False
+
+    def record_failure(self):
+        with self._lock:
+            self.failures += 1
+            self._trial_running = False
+            if self.state == HALF_OPEN or self.failures >= self.failure_threshold:
+                self.state = OPEN
+                self.opened_at = time.monotonic()
+
+    def release_trial(self):
+        with self._lock:
+            self._trial_running = False
+
+    def retry_in(self) -> float:
+        with self._lock:
+            if self.state != OPEN:
+                return 0.0
+            return max(0.0, self.reset_seconds - (time.monotonic() - self.opened_at))
+
+
+# =================================================
+# PROVIDER
+# =================================================
+class Provider:
+    """
+    Rate limit, circuit breaker(s), retries and latency tracking for one
+    external dependency. Pass `key` to call() for a breaker per key
+    (e.g. per host) instead of one for the whole provider.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        rate: float,
+        burst: float,
+        timeout: float,
+        failure_threshold: int,
+        reset_seconds: float,
+        retries: int = 0
+    ):
+        self.name = name
+        self.timeout = timeout
+        self.retries = retries
+        self.bucket = TokenBucket(rate, burst)
+        self.failure_threshold = failure_threshold
+        self.reset_seconds = reset_seconds
+
+        self._breakers: Dict[Optional[str], CircuitBreaker] = {}
+        self._latencies: Deque[float] = deque(maxlen=LATENCY_WINDOW)
+        self._lock = threading.Lock()
+        self._stats = {"calls": 0, "failures": 0, "rejected_open": 0, "rate_limited": 0, "retries": 0}
+
+    def breaker(self, key: Optional[str] = None) -> CircuitBreaker:
+        with self._lock:
+            breaker = self._breakers.get(key)
+            if breaker is None:
+                if len(self._breakers) >= MAX_KEYED_BREAKERS:
+                    self._breakers = {k: b for k, b in self._breakers.items() if b.state != CLOSED}
+                breaker = CircuitBreaker(self.failure_threshold, self.reset_seconds)
+                self._breakers[key] = breaker
+            return breaker
+
+    def is_open(self, key: Optional[str] = None) -> bool:
+        return self.breaker(key).retry_in() > 0
+
+    def call(self, fn: Callable[..., Any], *args, key: Optional[str] = None, cost: float = 1, **kwargs) -> Any:
+        """
+        Run fn(*args, **kwargs) under this provider's policy. Raises
+        CircuitOpen / RateLimited without calling fn, or the last error.
+        """
+        breaker = self.breaker(key)
+        attempt = 0
+
+        while True:
+            if not breaker.allow():
+                self._count("rejected_open")
+                raise CircuitOpen(f"{self.name} circuit open{f' for {key}' if key else ''}, retry in {breaker.retry_in():.0f}s")
+
+            # Never wait for a token past the campaign deadline
+            if not self.bucket.acquire(cost, max_wait=min(RATE_LIMIT_MAX_WAIT_SECONDS, time_left())):
+                # Nothing was attempted; give a half-open trial slot back
+                breaker.release_trial()
+                self._count("rate_limited")
+                raise RateLimited(f"{self.name} rate limit exceeded")
+
+            started = time.monotonic()
+            try:
+                result = fn(*args, **kwargs)
+            except Exception:
+                breaker.record_failure()
+                self._count("failures")
+                if attempt >= self.retries or breaker.retry_in() > 0 or deadline_expired():
+                    raise
+                attempt += 1
+                self._count("retries")
+                time.sleep(RETRY_BACKOFF_SECONDS * attempt)
+                continue
+
+            breaker.record_success()
+            with self._lock:
+                self._stats["calls"] += 1
+                self._latencies.append(time.monotonic() - started)
+            return result
+
+    def latency_quantile(self, q: float) -> Optional[float]:
+        with self._lock:
+            samples = sorted(self._latencies)
+        if not samples:
+            return None
+        return samples[min(len(samples) - 1, int(q * len(samples)))]
+
+    def _count(self, stat: str):
+        with self._lock:
+            self._stats[stat] += 1
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            stats = dict(self._stats)
+            breakers = list(self._breakers.items())
+
+        p50, p95 = self.latency_quantile(0.5), self.latency_quantile(0.95)
+        return {
+            **stats,
+            # Provider-wide breaker, or the count of open per-key breakers
+            "state": dict(breakers).get(None).state if None in dict(breakers) else None,
+            "open_breakers": sum(1 for _, b in breakers if b.state != CLOSED),
+            "tokens": self.bucket.available(),
+            "p50_ms": round(p50 * 1000) if p50 is not None else None,
+            "p95_ms": round(p95 * 1000) if p95 is not None else None,
+        }
+
+
+providers: Dict[str, Provider] = {
+    name: Provider(name, **config) for name, config in PROVIDER_CONFIG.items()
+}
+
+
+def provider_stats() -> Dict[str, Any]:
+    return {name: p.stats() for name, p in providers.items()}
+
+
+# =================================================
+# HEDGED REQUESTS
+# =================================================
+_hedge_pool: Optional[ThreadPoolExecutor] = None
+_hedge_pool_lock = threading.Lock()
+_hedge_stats = {"hedged": 0, "hedge_wins": 0, "hedge_skipped": 0}
+
+
+def _pool() -> ThreadPoolExecutor:
+    global _hedge_pool
+    with _hedge_pool_lock:
+        if _hedge_pool is None:
+            _hedge_pool = ThreadPoolExecutor(max_workers=HEDGE_POOL_SIZE, thread_name_prefix="hedge")
+        return _hedge_pool
+
+
+def hedged(
+    fn: Callable[[], Any],
+    delay: float,
+    max_attempts: int = 2,
+    admit: Optional[Callable[[], bool]] = None
+) -> Tuple[Any, bool]:
+    """
+    Run fn; if it has not finished after `delay` seconds (or has failed),
+    start another copy and return whichever succeeds first. Returns
+    (result, hedge_won). Losing calls finish in the background.
+    Each extra copy first needs admit() (e.g. a rate-limit token); when
+    it says no, no more copies are started.
+    """
+    pool = _pool()
+    primary = pool.submit(fn)
+    pending = {primary}
+    launched = 1
+    last_error: Optional[Exception] = None
+
+    while pending:
+        timeout = delay if launched < max_attempts else None
+        done, pending = wait(pending, timeout=timeout, return_when=FIRST_COMPLETED)
+
+        for future in done:
+            try:
+                return future.result(), future is not primary
+            except Exception as e:
+                last_error = e
+
+        if launched < max_attempts and (not done or not pending):
+            if admit is not None and not admit():
+                _hedge_stats["hedge_skipped"] += 1
+                max_attempts = launched
+                continue
+            _hedge_stats["hedged"] += 1
+            pending.add(pool.submit(fn))
+            launched += 1
+
+    raise last_error
+
+
+def fetch_url(get: Callable[..., Any], url: str, key: Optional[str] = None, **kwargs) -> Any:
+    """
+    GET through the crawl provider (rate limit, per-host breaker), hedged
+    when CRAWL_HEDGING is on and the request runs past recent p90 latency.
+    """
+    crawl = providers["crawl"]
+    kwargs.setdefault("timeout", call_timeout(crawl.timeout))
+
+    def attempt():
+        return check_http(get(url, **kwargs))
+
+    if not CRAWL_HEDGING:
+        return crawl.call(attempt, key=key)
+
+    p90 = crawl.latency_quantile(0.9)
+    delay = max(HEDGE_MIN_DELAY_SECONDS, p90 if p90 is not None else kwargs["timeout"] / 4)
+
+    def run_hedged():
+        # The extra attempt is a real request: it takes its own token,
+        # and is skipped rather than waited for when none is left
+        result, hedge_won = hedged(attempt, delay, admit=lambda: crawl.bucket.acquire(max_wait=0))
+        if hedge_won:
+            _hedge_stats["hedge_wins"] += 1
+        return result
+
+    return crawl.call(run_hedged, key=key)
+
+
+def hedge_stats() -> Dict[str, int]:
+    return dict(_hedge_stats)
+
+
+# =================================================
+# GUARDED MODEL
+# =================================================
+class GuardedModel:
+    """
+    Chat model wrapper that sends invoke/batch through a Provider, bounded
+    by the current campaign deadline. Derived runnables (structured
+    output, bound tools) are guarded too. `key` gives the model its own
+    breaker (e.g. one per model name); `timeout` overrides the provider's.
+    """
+
+    def __init__(self, runnable: Any, provider: Provider, key: Optional[str] = None, timeout: Optional[float] = None):
+        self.runnable = runnable
+        self.provider = provider
+        self.key = key
+        self.timeout = timeout or provider.timeout
+
+    def invoke(self, *args, **kwargs):
+        return self._bounded(lambda: self.provider.call(self.runnable.invoke, *args, key=self.key, **kwargs))
+
+    def batch(self, inputs: Iterable[Any], *args, **kwargs):
+        inputs = list(inputs)
+        return self._bounded(
+            lambda: self.provider.call(
+                self.runnable.batch, inputs, *args, key=self.key, cost=max(1, len(inputs)), **kwargs
+            )
+        )
+
+    def _bounded(self, call: Callable[[], Any]) -> Any:
+        # Under a campaign deadline the call may not outlive it (DeadlineExceeded)
+        if current_deadline() is None:
+            return call()
+        return run_with_timeout(call, call_timeout(self.timeout, LLM_MIN_TIMEOUT_SECONDS))
+
+    def _derive(self, runnable: Any) -> "GuardedModel":
+        return GuardedModel(runnable, self.provider, self.key, self.timeout)
+
+    def with_structured_output(self, *args, **kwargs) -> "GuardedModel":
+        return self._derive(self.runnable.with_structured_output(*args, **kwargs))
+
+    def bind_tools(self, *args, **kwargs) -> "GuardedModel":
+        return self._derive(self.runnable.bind_tools(*args, **kwargs))
+
+    def __getattr__(self, name: str) -> Any:
+        return getattr(self.runnable, name)
@@ -0,0 +1,389 @@
+import gzip
+import json
+import os
+import sqlite3
+import threading
+import time
+from datetime import datetime, timedelta, timezone
+from typing import Any, Callable, Dict, List, Optional
+
+from blob_store import BLOB_REF_PATTERN
+from campaign_registry import CampaignRegistry
+from sqlite_store import connect_sqlite
+
+# =================================================
+# CONSTANTS
+# =================================================
+# Checkpoints kept per thread while a campaign is still active
+CHECKPOINT_KEEP_LAST = int(os.getenv("CHECKPOINT_KEEP_LAST", 20))
+# Settled campaigns (nothing monitored) idle this long keep only their latest checkpoint
+COLLAPSE_AFTER_HOURS = float(os.getenv("CHECKPOINT_COLLAPSE_AFTER_HOURS", 24))
+# Settled campaigns idle this long are written to the archive and removed
+ARCHIVE_AFTER_DAYS = float(os.getenv("CAMPAIGN_ARCHIVE_AFTER_DAYS", 30))
+ARCHIVE_DIR = os.getenv("CAMPAIGN_ARCHIVE_DIR", "campaign_archive")
+
+RETENTION_INTERVAL_SECONDS = float(os.getenv("RETENTION_INTERVAL_SECONDS", 3600))
+# Free pages returned to the OS per incremental_vacuum step, and steps
+# per file per pass (the rest is freed on later passes), so one pass
+# never holds the write lock for long
+VACUUM_STEP_PAGES = 2000
+VACUUM_MAX_STEPS_PER_PASS = 25
+
+# Blobs younger than this are never collected: their checkpoint may not be
+# written yet, and the research cache (6h TTL) can hand them to new runs
+BLOB_GC_GRACE_HOURS = float(os.getenv("BLOB_GC_GRACE_HOURS", 24))
+
+ARCHIVED_PHASE = "archived"
+MONITOR_PHASE = "monitor"
+
+
+def is_settled(state: Dict[str, Any]) -> bool:
+    """
+    True when a campaign has finished for good: everything sent has stopped
+    being monitored, the drafts were rejected, or no lead qualified.
+    Campaigns still discovering, researching or waiting for approval are live.
+    """
+    if state.get("phase") == MONITOR_PHASE:
+        return not any(m.get("monitor_status") == "active" for m in state.get("monitoring", []))
+
+    if (state.get("human_decision") or {}).get("send_first_email") == "no":
+        return True
+
+    qualification = state.get("qualification") or []
+    return bool(qualification) and not any(q.get("qualified") for q in qualification)
+
+
+# =================================================
+# RETENTION SERVICE
+# =================================================
+class RetentionService:
+    """
+    Keeps the checkpoint database bounded.
+
+    Each pass:
+    - trims every thread to its last CHECKPOINT_KEEP_LAST checkpoints
+      (and drops the pending writes of removed checkpoints)
+    - collapses settled (finished, see is_settled) campaigns to their
+      final checkpoint
+    - archives long-idle settled campaigns to gzipped JSON and deletes
+      their checkpoints (the registry row stays, with phase "archived")
+    - deletes blobs that no remaining checkpoint refers to
+    - returns free pages with incremental VACUUM and truncates the WAL,
+      reporting the bytes reclaimed
+
+    Works over every checkpoint shard (db_paths).
+    """
+
+    def __init__(
+        self,
+        db_paths: List[str],
+        registry: CampaignRegistry,
+        load_state: Callable[[str], Dict[str, Any]],
+        resolve_state: Optional[Callable[[Dict[str, Any]], Dict[str, Any]]] = None,
+        blob_store=None,
+        keep_last: int = CHECKPOINT_KEEP_LAST,
+        collapse_after_hours: float = COLLAPSE_AFTER_HOURS,
+        archive_after_days: float = ARCHIVE_AFTER_DAYS,
+        archive_dir: str = ARCHIVE_DIR,
+        interval: float = RETENTION_INTERVAL_SECONDS
+    ):
+        self.db_paths = list(db_paths)
+        self.registry = registry
+        self.load_state = load_state
+        self.resolve_state = resolve_state
+        self.blob_store = blob_store
+        self.keep_last = max(1, keep_last)
+        self.collapse_after = timedelta(hours=collapse_after_hours)
+        self.archive_after = timedelta(days=archive_after_days)
+        self.archive_dir = archive_dir
+        self.interval = interval
+
+        # Called with the thread id after a campaign is archived
+        self.on_archived: List[Callable[[str], None]] = []
+
+        # One connection per checkpoint shard
+        self._conns = {path: connect_sqlite(path) for path in self.db_paths}
+        self._lock = threading.Lock()
+        self._thread: Optional[threading.Thread] = None
+        self._stop = threading.Event()
+        self.last_report: Optional[Dict[str, Any]] = None
+
+    # ---------------------------------------------
+    # Lifecycle
+    # ---------------------------------------------
+    def start(self):
+        if self._thread and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="checkpoint-retention", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        if self._thread:
+            self._thread.join(timeout=5)
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            try:
+                self.run_once()
+            except Exception as e:
+                print(f"Checkpoint retention failed: {e}")
+
+    # ---------------------------------------------
+    # One pass
+    # ---------------------------------------------
+    def run_once(self) -> Dict[str, Any]:
+        with self._lock:
+            started = time.time()
+            size_before = self._db_bytes()
+
+            archived = self._archive_idle()
+            pruned = self._prune()
+            blobs_deleted = self._collect_blobs()
+            vacuum = self._compact()
+
+            report = {
+                "finished_at": datetime.now(timezone.utc).isoformat(),
+                "duration_seconds": round(time.time() - started, 3),
+                "checkpoints_deleted": pruned["checkpoints"],
+                "writes_deleted": pruned["writes"],
+                "threads_trimmed": pruned["threads"],
+                "campaigns_archived": archived,
+                "blobs_deleted": blobs_deleted,
+                "bytes_before": size_before,
+                "bytes_after": self._db_bytes(),
+                **vacuum
+            }
+            report["bytes_reclaimed"] = max(0, report["bytes_before"] - report["bytes_after"])
+            self.last_report = report
+
+        print(
+            f"Checkpoint retention: -{report['checkpoints_deleted']} checkpoints, "
+            f"{archived} archived, -{blobs_deleted} blobs, {report['bytes_reclaimed']} bytes reclaimed"
+        )
+        return report
+
+    def _collect_blobs(self) -> int:
+        """Delete blobs no checkpoint or pending write refers to (past the grace period)"""
+        if self.blob_store is None:
+            return 0
+
+        # References are stored verbatim in the serialized checkpoints
+        live = set()
+        for conn in self._conns.values():
+            for table, column in (("checkpoints", "checkpoint"), ("writes", "value")):
+                try:
+                    for (data,) in conn.execute(f"SELECT {column} FROM {table}"):
+                        if data:
+                            live.update(d.decode() for d in BLOB_REF_PATTERN.findall(bytes(data)))
+                except sqlite3.OperationalError:
+                    continue
+
+        cutoff = datetime.now(timezone.utc) - timedelta(hours=BLOB_GC_GRACE_HOURS)
+        return self.blob_store.delete_unreferenced(live, cutoff)
+
+    def _settled_campaigns(self) -> Dict[str, datetime]:
+        """
+        thread_id -> last update, for finished campaigns (is_settled) idle
+        long enough to collapse or archive
+        """
+        now = datetime.now(timezone.utc)
+        idle_for = min(self.collapse_after, self.archive_after)
+        settled = {}
+
+        for row in self.registry.list_all():
+            if row["phase"] == ARCHIVED_PHASE or row["monitoring_count"] > 0:
+                continue
+            try:
+                updated_at = datetime.fromisoformat(row["updated_at"])
+            except ValueError:
+                continue
+            if now - updated_at < idle_for:
+                continue
+
+            # Monitor phase with nothing active is final; any earlier phase
+            # needs the state to tell a finished campaign from a paused one
+            if row["phase"] != MONITOR_PHASE:
+                try:
+                    if not is_settled(self.load_state(row["thread_id"])):
+                        continue
+                except Exception as e:
+                    print(f"Retention: could not read {row['thread_id']}: {e}")
+                    continue
+
+            settled[row["thread_id"]] = updated_at
+        return settled
+
+    def _prune(self) -> Dict[str, int]:
+        now = datetime.now(timezone.utc)
+        settled = self._settled_campaigns()
+        deleted = {"checkpoints": 0, "writes": 0, "threads": 0}
+
+        for conn in self._conns.values():
+            try:
+                over_limit = conn.execute(
+                    "SELECT thread_id, COUNT(*) FROM checkpoints GROUP BY thread_id HAVING COUNT(*) > 1"
+                ).fetchall()
+            except sqlite3.OperationalError:
+                # Shard without checkpoints yet (tables are created lazily)
+                continue
+
+            for thread_id, count in over_limit:
+                updated_at = settled.get(thread_id)
+                keep = 1 if updated_at and now - updated_at >= self.collapse_after else self.keep_last
+                if count <= keep:
+                    continue
+
+                result = self._trim_thread(conn, thread_id, keep)
+                deleted["checkpoints"] += result["checkpoints"]
+                deleted["writes"] += result["writes"]
+                deleted["threads"] += 1
+
+        return deleted
+
+    def _trim_thread(self, conn: sqlite3.Connection, thread_id: str, keep: int) -> Dict[str, int]:
+        # One short transaction per thread so campaign writes are not held up
+        cur = conn.cursor()
+        try:
+            checkpoints = 0
+            namespaces = [r[0] for r in cur.execute(
+                "SELECT DISTINCT checkpoint_ns FROM checkpoints WHERE thread_id = ?", (thread_id,)
+            ).fetchall()]
+
+            for ns in namespaces:
+                cur.execute(
+                    "DELETE FROM checkpoints WHERE thread_id = ? AND checkpoint_ns = ? "
+                    "AND checkpoint_id NOT IN ("
+                    " SELECT checkpoint_id FROM checkpoints WHERE thread_id = ? AND checkpoint_ns = ?"
+                    " ORDER BY checkpoint_id DESC LIMIT ?)",
+                    (thread_id, ns, thread_id, ns, keep)
+                )
+                checkpoints += cur.rowcount
+
+            cur.execute(
+                "DELETE FROM writes WHERE thread_id = ? AND checkpoint_id NOT IN ("
+                " SELECT checkpoint_id FROM checkpoints WHERE thread_id = ?)",
+                (thread_id, thread_id)
+            )
+            writes = cur.rowcount
+            conn.commit()
+        finally:
+            cur.close()
+
+        return {"checkpoints": checkpoints, "writes": writes}
+
+    def _archive_idle(self) -> int:
+        now = datetime.now(timezone.utc)
+        archived = 0
+
+        for thread_id, updated_at in self._settled_campaigns().items():
+            if now - updated_at < self.archive_after:
+                continue
+            try:
+                self.archive(thread_id)
+                archived += 1
+            except Exception as e:
+                print(f"Archiving {thread_id} failed: {e}")
+
+        return archived
+
+    def archive(self, thread_id: str) -> str:
+        """Write the final state to the archive and delete the thread's checkpoints"""
+        state = self.load_state(thread_id)
+        if self.resolve_state:
+            state = self.resolve_state(state)
+
+        # Serialize first, so a failure never leaves a truncated archive
+        data = json.dumps({
+            "thread_id": thread_id,
+            "archived_at": datetime.now(timezone.utc).isoformat(),
+            "campaign": self.registry.get(thread_id),
+            "state": state
+        }, default=str)
+
+        os.makedirs(self.archive_dir, exist_ok=True)
+        path = os.path.join(self.archive_dir, f"{thread_id}.json.gz")
+        with gzip.open(path, "wt", encoding="utf-8") as f:
+            f.write(data)
+
+        # The thread lives on one shard; deleting everywhere needs no routing
+        for conn in self._conns.values():
+            try:
+                conn.execute("DELETE FROM writes WHERE thread_id = ?", (thread_id,))
+                conn.execute("DELETE FROM checkpoints WHERE thread_id = ?", (thread_id,))
+                conn.commit()
+            except sqlite3.OperationalError:
+                continue
+        self.registry.set_phase(thread_id, ARCHIVED_PHASE)
+
+        for callback in self.on_archived:
+            try:
+                callback(thread_id)
+            except Exception as e:
+                print(f"Archive callback failed for {thread_id}: {e}")
+
+        return path
+
+    # ---------------------------------------------
+    # Compaction
+    # ---------------------------------------------
+    def _compact(self) -> Dict[str, Any]:
+        released, full = 0, False
+        for conn in self._conns.values():
+            pages, page_size, full_vacuum = self._compact_db(conn)
+            released += pages * page_size
+            full = full or full_vacuum
+        return {"vacuum_bytes_released": released, "full_vacuum": full}
+
+    def _compact_db(self, conn: sqlite3.Connection) -> tuple:
+        """(free pages released, page size, ran a full VACUUM) for one file"""
+        page_size = conn.execute("PRAGMA page_size").fetchone()[0]
+        free_before = conn.execute("PRAGMA freelist_count").fetchone()[0]
+
+        # auto_vacuum can only be switched on by one full VACUUM; after
+        # that every pass frees pages incrementally
+        mode = conn.execute("PRAGMA auto_vacuum").fetchone()[0]
+        full_vacuum = False
+        if mode != 2:
+            try:
+                conn.execute("PRAGMA auto_vacuum=INCREMENTAL")
+                conn.execute("VACUUM")
+                full_vacuum = True
+            except sqlite3.OperationalError as e:
+                # Busy with campaign traffic; retried on the next pass
+                print(f"Full VACUUM skipped: {e}")
+        else:
+            for _ in range(VACUUM_MAX_STEPS_PER_PASS):
+                if self._stop.is_set() or conn.execute("PRAGMA freelist_count").fetchone()[0] == 0:
+                    break
+                # Each sqlite3_step frees one page and execute() steps a
+                # column-less statement only once; executescript runs it
+                # to completion
+                conn.executescript(f"PRAGMA incremental_vacuum({VACUUM_STEP_PAGES});")
+
+        conn.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+        free_after = conn.execute("PRAGMA freelist_count").fetchone()[0]
+
+        return max(0, free_before - free_after), page_size, full_vacuum
+
+    def _db_bytes(self) -> int:
+        total = 0
+        for path in self.db_paths:
+            for suffix in ("", "-wal"):
+                try:
+                    total += os.path.getsize(path + suffix)
+                except OSError:
+                    pass
+        return total
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "running": bool(self._thread and self._thread.is_alive()),
+            "keep_last": self.keep_last,
+            "collapse_after_hours": self.collapse_after.total_seconds() / 3600,
+            "archive_after_days": self.archive_after.days,
+            "interval_seconds": self.interval,
+            "db_bytes": self._db_bytes(),
+            "last_report": self.last_report
+        }
@@ -0,0 +1,195 @@
+import bisect
+import hashlib
+import heapq
+import os
+from itertools import islice
+from typing import Any, Dict, Iterator, List, Optional
+
+from langgraph.checkpoint.base import BaseCheckpointSaver
+
+from sqlite_store import STATE_DB_PATH, PooledSqliteSaver
+from state_projection import CheckpointHooks
+
+# =================================================
+# CONSTANTS
+# =================================================
+# Number of SQLite files checkpoints are spread over. Changing it moves
+# roughly 1/N of the threads; run ShardedSqliteSaver.rebalance() after.
+CHECKPOINT_SHARDS = max(1, int(os.getenv("CHECKPOINT_SHARDS", 1)))
+# Points per shard on the hash ring (smooths the distribution)
+HASH_RING_VNODES = 64
+
+
+def shard_paths(base_path: str = STATE_DB_PATH, count: int = CHECKPOINT_SHARDS) -> List[str]:
+    """
+    Database files for `count` shards. Shard 0 is the base file itself, so a
+    single-shard setup is the plain database and growing keeps its data.
+    """
+    root, ext = os.path.splitext(base_path)
+    return [base_path] + [f"{root}.shard{i}{ext or '.db'}" for i in range(1, count)]
+
+
+# =================================================
+# CONSISTENT HASH RING
+# =================================================
+class HashRing:
+    """
+    Maps keys to nodes so adding a node only moves the keys it takes over.
+    """
+
+    def __init__(self, nodes: List[str], vnodes: int = HASH_RING_VNODES):
+        self._points: List[int] = []
+        self._owners: List[str] = []
+
+        ring = sorted(
+            (self._hash(f"{node}#{i}"), node)
+            for node in nodes
+            for i in range(vnodes)
+        )
+        self._points = [p for p, _ in ring]
+        self._owners = [n for _, n in ring]
+
+    @staticmethod
+    def _hash(key: str) -> int:
+        return int.from_bytes(hashlib.sha1(key.encode("utf-8")).digest()[:8], "big")
+
+    def node_for(self, key: str) -> str:
+        i = bisect.bisect(self._points, self._hash(key)) % len(self._points)
+        return self._owners[i]
+
+
+# =================================================
+# SHARDED CHECKPOINTER
+# =================================================
+class ShardedSqliteSaver(CheckpointHooks, BaseCheckpointSaver):
+    """
+    Checkpointer that routes each thread id to one of several SQLite files.
+
+    Every shard is a PooledSqliteSaver with its own WAL writer lock, so
+    campaigns on different shards write in parallel. All reads and writes
+    of a thread go to its shard; listing without a thread id (and
+    thread_ids()) merges across shards. Hooks are shared by every shard.
+    """
+
+    def __init__(self, paths: Optional[List[str]] = None, vnodes: int = HASH_RING_VNODES):
+        super().__init__()
+        self.paths = list(paths or shard_paths())
+        self.hooks = []
+
+        # Ring nodes are shard indexes, so node names survive a path change
+        self.shards: Dict[str, PooledSqliteSaver] = {}
+        for i, path in enumerate(self.paths):
+            shard = PooledSqliteSaver(path, serde=self.serde)
+            shard.hooks = self.hooks
+            self.shards[f"shard-{i}"] = shard
+
+        self.ring = HashRing(list(self.shards), vnodes)
+
+    # ---------------------------------------------
+    # Routing
+    # ---------------------------------------------
+    def shard_for(self, thread_id: str) -> PooledSqliteSaver:
+        return self.shards[self.ring.node_for(str(thread_id))]
+
+    def shard_path(self, thread_id: str) -> str:
+        return self.shard_for(thread_id).connections.path
+
+    def _route(self, config) -> PooledSqliteSaver:
+        return self.shard_for(config["configurable"]["thread_id"])
+
+    # ---------------------------------------------
+    # Checkpointer interface
+    # ---------------------------------------------
+    def get_tuple(self, config):
+        return self._route(config).get_tuple(config)
+
+    def list(self, config, *, filter=None, before=None, limit=None) -> Iterator[Any]:
+        if config and config.get("configurable", {}).get("thread_id") is not None:
+            yield from self._route(config).list(config, filter=filter, before=before, limit=limit)
+            return
+
+        # Every shard lists newest first; merge on checkpoint id (time-ordered)
+        merged = heapq.merge(
+            *(shard.list(config, filter=filter, before=before, limit=limit) for shard in self.shards.values()),
+            key=lambda t: t.config["configurable"]["checkpoint_id"],
+            reverse=True
+        )
+        yield from islice(merged, limit) if limit else merged
+
+    def put(self, config, checkpoint, metadata, new_versions):
+        # The shard runs the shared hooks
+        return self._route(config).put(config, checkpoint, metadata, new_versions)
+
+    def put_writes(self, config, writes, task_id, *args, **kwargs):
+        return self._route(config).put_writes(config, writes, task_id, *args, **kwargs)
+
+    def delete_thread(self, thread_id: str):
+        return self.shard_for(thread_id).delete_thread(thread_id)
+
+    def get_next_version(self, current, channel):
+        return next(iter(self.shards.values())).get_next_version(current, channel)
+
+    # ---------------------------------------------
+    # Cross-shard queries
+    # ---------------------------------------------
+    def thread_ids(self) -> List[str]:
+        """All thread ids that have at least one checkpoint, on any shard"""
+        ids: List[str] = []
+        for shard in self.shards.values():
+            with shard.cursor(transaction=False) as cur:
+                ids.extend(r[0] for r in cur.execute("SELECT DISTINCT thread_id FROM checkpoints"))
+        return ids
+
+    def latest_checkpoint_id(self, thread_id: str) -> Optional[str]:
+        with self.shard_for(thread_id).cursor(transaction=False) as cur:
+            row = cur.execute(
+                "SELECT checkpoint_id FROM checkpoints WHERE thread_id = ? AND checkpoint_ns = '' "
+                "ORDER BY checkpoint_id DESC LIMIT 1",
+                (thread_id,)
+            ).fetchone()
+        return row[0] if row else None
+
+    def rebalance(self) -> int:
+        """
+        Move threads stored on a shard that no longer owns them (after the
+        shard count changed). Copies before deleting, so an interrupted run
+        is repaired by the next one. Returns how many threads moved.
+        """
+        moved = 0
+
+        for shard in self.shards.values():
+            with shard.cursor(transaction=False) as cur:
+                thread_ids = [r[0] for r in cur.execute("SELECT DISTINCT thread_id FROM checkpoints")]
+
+            for thread_id in thread_ids:
+                owner = self.shard_for(thread_id)
+                if owner is shard:
+                    continue
+
+                for table in ("checkpoints", "writes"):
+                    rows = shard.conn.execute(
+                        f"SELECT * FROM {table} WHERE thread_id = ?", (thread_id,)
+                    ).fetchall()
+                    if rows:
+                        with owner.cursor() as cur:
+                            cur.executemany(
+                                f"INSERT OR REPLACE INTO {table} VALUES ({', '.join('?' * len(rows[0]))})",
+                                rows
+                            )
+
+                with shard.cursor() as cur:
+                    cur.execute("DELETE FROM writes WHERE thread_id = ?", (thread_id,))
+                    cur.execute("DELETE FROM checkpoints WHERE thread_id = ?", (thread_id,))
+                moved += 1
+
+        if moved:
+            print(f"Checkpoint shards: moved {moved} threads to their owning shard")
+        return moved
+
+    def stats(self) -> Dict[str, Any]:
+        shards = []
+        for name, shard in self.shards.items():
+            with shard.cursor(transaction=False) as cur:
+                threads = cur.execute("SELECT COUNT(DISTINCT thread_id) FROM checkpoints").fetchone()[0]
+            shards.append({"shard": name, "threads": threads, **shard.stats()})
+        return {"shard_count": len(self.shards), "shards": shards}
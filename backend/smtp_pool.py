@@ -0,0 +1,141 @@
+import queue
+import smtplib
+import threading
+import time
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Optional
+
+from deadline import call_timeout
+
+# =================================================
+# CONSTANTS
+# =================================================
+SMTP_POOL_SIZE = 4
+# Connections idle longer than this are checked with NOOP before reuse
+SMTP_IDLE_CHECK_SECONDS = 30
+# Connect + STARTTLS + login, capped by the campaign deadline when there is one
+SMTP_CONNECT_TIMEOUT_SECONDS = 30
+
+
+def is_connection_error(e: Exception) -> bool:
+    """Errors after which the connection itself is unusable (vs. one bad message)"""
+    if isinstance(e, smtplib.SMTPServerDisconnected):
+        return True
+    if isinstance(e, smtplib.SMTPResponseException) and e.smtp_code == 421:
+        return True
+    return isinstance(e, OSError) and not isinstance(e, smtplib.SMTPException)
+
+
+def smtp_starttls_connect(config: Dict[str, Any]):
+    server = smtplib.SMTP(config["host"], config["port"], timeout=call_timeout(SMTP_CONNECT_TIMEOUT_SECONDS))
+    server.starttls()
+    server.login(config["username"], config["password"])
+    return server
+
+
+# =================================================
+# SMTP POOL
+# =================================================
+class PooledConnection:
+    """
+    A checked-out connection. After a connection-level error (see
+    is_connection_error) the connection is discarded and the next use
+    opens a new one, so one dead socket fails a single message, not the
+    rest of the batch, and never goes back to the pool.
+    """
+
+    def __init__(self, pool: "SMTPPool"):
+        self.pool = pool
+        self.server = None
+
+    def _server(self):
+        if self.server is None:
+            self.server = self.pool._acquire()
+        return self.server
+
+    def discard(self):
+        if self.server is not None:
+            self.pool._close(self.server)
+            self.server = None
+
+    def send_message(self, msg, *args, **kwargs):
+        try:
+            return self._server().send_message(msg, *args, **kwargs)
+        except Exception as e:
+            if is_connection_error(e):
+                self.discard()
+            raise
+
+    def __getattr__(self, name: str) -> Any:
+        return getattr(self._server(), name)
+
+
+class SMTPPool:
+    """
+    Bounded pool of logged-in SMTP connections shared by all campaigns.
+    A connection that fails at the connection level, or is checked out
+    when an exception escapes, is discarded, not reused.
+    """
+
+    def __init__(
+        self,
+        config: Dict[str, Any],
+        size: int = SMTP_POOL_SIZE,
+        connect: Optional[Callable[[Dict[str, Any]], Any]] = None
+    ):
+        self.config = config
+        self.size = size
+        self._connect = connect or smtp_starttls_connect
+
+        self._idle: "queue.LifoQueue" = queue.LifoQueue()
+        self._slots = threading.BoundedSemaphore(size)
+
+    def _is_alive(self, server) -> bool:
+        try:
+            return server.noop()[0] == 250
+        except smtplib.SMTPException:
+            return False
+        except OSError:
+            return False
+
+    def _close(self, server):
+        try:
+            server.quit()
+        except Exception:
+            pass
+
+    def _acquire(self):
+        while True:
+            try:
+                server, idle_since = self._idle.get_nowait()
+            except queue.Empty:
+                return self._connect(self.config)
+
+            if time.monotonic() - idle_since < SMTP_IDLE_CHECK_SECONDS:
+                return server
+            if self._is_alive(server):
+                return server
+            self._close(server)
+
+    @contextmanager
+    def connection(self):
+        self._slots.acquire()
+        conn = PooledConnection(self)
+        try:
+            conn._server()
+            yield conn
+        except Exception:
+            conn.discard()
+            raise
+        finally:
+            if conn.server is not None:
+                self._idle.put((conn.server, time.monotonic()))
+            self._slots.release()
+
+    def close_all(self):
+        while True:
+            try:
+                server, _ = self._idle.get_nowait()
+            except queue.Empty:
+                return
+            self._close(server)
@@ -0,0 +1,155 @@
+import os
+import sqlite3
+import threading
+from contextlib import asynccontextmanager, contextmanager
+from typing import Any, Dict, Iterator, List
+
+from state_projection import CheckpointHook, CheckpointHooks, ProjectingSqliteSaver
+
+# =================================================
+# CONSTANTS
+# =================================================
+STATE_DB_PATH = os.getenv("STATE_DB_PATH", "lead_graph_state.db")
+
+SQLITE_BUSY_TIMEOUT_MS = 10000
+
+# Applied to every connection. WAL lets readers run alongside the single
+# writer; NORMAL sync is durable in WAL mode except on power loss.
+SQLITE_PRAGMAS = [
+    "PRAGMA journal_mode=WAL",
+    "PRAGMA synchronous=NORMAL",
+    f"PRAGMA busy_timeout={SQLITE_BUSY_TIMEOUT_MS}",
+    "PRAGMA cache_size=-16000",
+    "PRAGMA temp_store=MEMORY",
+    "PRAGMA wal_autocheckpoint=1000",
+]
+
+
+def connect_sqlite(path: str = STATE_DB_PATH) -> sqlite3.Connection:
+    """Connection with the shared pragmas applied"""
+    conn = sqlite3.connect(path, timeout=SQLITE_BUSY_TIMEOUT_MS / 1000, check_same_thread=False)
+    for pragma in SQLITE_PRAGMAS:
+        conn.execute(pragma)
+    return conn
+
+
+# =================================================
+# PER-THREAD CONNECTIONS
+# =================================================
+class ThreadConnections:
+    """
+    One SQLite connection per OS thread, opened on first use. Connections
+    of threads that have exited are closed when the next one is opened.
+    """
+
+    def __init__(self, path: str = STATE_DB_PATH):
+        self.path = path
+        self._conns: Dict[int, sqlite3.Connection] = {}
+        self._lock = threading.Lock()
+
+    def get(self) -> sqlite3.Connection:
+        ident = threading.get_ident()
+        conn = self._conns.get(ident)
+        if conn is not None:
+            return conn
+
+        conn = connect_sqlite(self.path)
+        with self._lock:
+            self._prune()
+            self._conns[ident] = conn
+        return conn
+
+    def _prune(self):
+        # Caller holds the lock
+        alive = {t.ident for t in threading.enumerate()}
+        for ident in [i for i in self._conns if i not in alive]:
+            try:
+                self._conns.pop(ident).close()
+            except sqlite3.Error:
+                pass
+
+    def open_count(self) -> int:
+        with self._lock:
+            return len(self._conns)
+
+    def close_all(self):
+        with self._lock:
+            conns = list(self._conns.values())
+            self._conns.clear()
+        for conn in conns:
+            try:
+                conn.close()
+            except sqlite3.Error:
+                pass
+
+
+# =================================================
+# POOLED CHECKPOINTER
+# =================================================
+class PooledSqliteSaver(ProjectingSqliteSaver):
+    """
+    Checkpointer where every thread uses its own WAL-mode connection.
+
+    The stock SqliteSaver funnels all threads through one connection and
+    a process-wide lock, so concurrent campaigns wait on each other even
+    for reads. Here `conn` resolves to the calling thread's connection and
+    `cursor()` skips the global lock; SQLite's own locking (with a busy
+    timeout) serialises the writes.
+    """
+
+    def __init__(self, path: str = STATE_DB_PATH, **kwargs):
+        self.connections = ThreadConnections(path)
+        super().__init__(conn=self.connections.get(), **kwargs)
+
+    @property
+    def conn(self) -> sqlite3.Connection:
+        return self.connections.get()
+
+    @conn.setter
+    def conn(self, value: sqlite3.Connection):
+        # SqliteSaver.__init__ assigns the creating thread's connection,
+        # which the pool already owns
+        pass
+
+    @contextmanager
+    def cursor(self, transaction: bool = True) -> Iterator[sqlite3.Cursor]:
+        self.setup()
+        conn = self.conn
+        cur = conn.cursor()
+        try:
+            yield cur
+        finally:
+            if transaction:
+                conn.commit()
+            cur.close()
+
+    def stats(self) -> Dict[str, Any]:
+        return {"path": self.connections.path, "connections": self.connections.open_count()}
+
+
+# =================================================
+# ASYNC CHECKPOINTER
+# =================================================
+@asynccontextmanager
+async def open_async_saver(path: str = STATE_DB_PATH, hooks: List[CheckpointHook] = ()):
+    """
+    AsyncSqliteSaver over one aiosqlite connection with the same pragmas
+    and checkpoint hooks, for graphs driven with ainvoke/astream.
+    Requires the `aiosqlite` package.
+    """
+    import aiosqlite
+    from langgraph.checkpoint.sqlite.aio import AsyncSqliteSaver
+
+    class ProjectingAsyncSqliteSaver(CheckpointHooks, AsyncSqliteSaver):
+        async def aput(self, config, checkpoint, metadata, new_versions):
+            result = await super().aput(config, checkpoint, metadata, new_versions)
+            self.run_hooks(config, checkpoint, metadata)
+            return result
+
+    async with aiosqlite.connect(path, timeout=SQLITE_BUSY_TIMEOUT_MS / 1000) as conn:
+        for pragma in SQLITE_PRAGMAS:
+            await conn.execute(pragma)
+
+        saver = ProjectingAsyncSqliteSaver(conn)
+        saver.hooks = list(hooks)
+        yield saver
@@ -0,0 +1,50 @@
+from typing import Any, Callable, Dict, List, Optional, Sequence
+
+# =================================================
+# KEYED LIST CHANNELS
+# =================================================
+Reducer = Callable[[Optional[List[Dict[str, Any]]], Optional[List[Dict[str, Any]]]], List[Dict[str, Any]]]
+
+
+def keyed_upsert(*key_fields: str) -> Reducer:
+    """
+    Reducer for list channels whose items are identified by key_fields.
+
+    A node returns only the items it created or changed. An item whose key
+    already exists is merged field by field into the stored one (so a
+    partial dict such as {"message_id": ..., "reply_received": True} is a
+    valid update); new keys are appended. Order of first insertion is kept.
+    """
+    def key_of(item: Dict[str, Any]) -> tuple:
+        return tuple(item.get(f) for f in key_fields)
+
+    def reduce(current: Optional[List[Dict[str, Any]]], update: Optional[Sequence[Dict[str, Any]]]) -> List[Dict[str, Any]]:
+        current = list(current or [])
+        if not update:
+            return current
+
+        if isinstance(update, dict):
+            update = [update]
+
+        positions = {key_of(item): i for i, item in enumerate(current)}
+
+        for item in update:
+            key = key_of(item)
+            i = positions.get(key)
+            if i is None:
+                positions[key] = len(current)
+                current.append(dict(item))
+            else:
+                current[i] = {**current[i], **item}
+
+        return current
+
+    reduce.__name__ = f"upsert_by_{'_'.join(key_fields)}"
+    return reduce
+
+
+upsert_leads = keyed_upsert("domain")
+upsert_qualification = keyed_upsert("domain")
+upsert_emails = keyed_upsert("company_name", "email")
+upsert_send_logs = keyed_upsert("company_name", "email")
+upsert_monitoring = keyed_upsert("message_id")
@@ -0,0 +1,223 @@
+import json
+import threading
+from collections import deque
+from datetime import datetime, timezone
+from typing import Any, Callable, Deque, Dict, List, Optional, Tuple
+
+from langgraph.checkpoint.sqlite import SqliteSaver
+
+from json_patch import Patch, make_patch
+
+# =================================================
+# CONSTANTS
+# =================================================
+# Patches kept per thread; older clients get a full resync
+STATE_HISTORY_LENGTH = 50
+
+# =================================================
+# Helper
+# =================================================
+def summarize_state(state: Dict[str, Any]) -> Dict[str, Any]:
+    """Extract summary from state"""
+    return {
+        "phase": state.get("phase", "unknown"),
+        "leads_count": len(state.get("leads", [])),
+        "qualified_count": len([q for q in state.get("qualification", []) if q.get("qualified")]),
+        "emails_ready": len(state.get("emails", [])),
+        "emails_sent": len([e for e in state.get("email_send_logs", []) if e.get("status") == "sent"]),
+        "monitoring_count": len([m for m in state.get("monitoring", []) if m.get("monitor_status") == "active"]),
+        "replies_received": len([m for m in state.get("monitoring", []) if m.get("reply_received")]),
+        "current_node": "unknown"
+    }
+
+
+# =================================================
+# SUMMARY PROJECTION
+# =================================================
+class StateProjection:
+    """
+    Per-thread campaign summaries, refreshed on every checkpoint write,
+    so status reads never load or execute the graph.
+    """
+
+    def __init__(self):
+        self._summaries: Dict[str, Dict[str, Any]] = {}
+        self._lock = threading.Lock()
+
+    def update(self, thread_id: str, values: Dict[str, Any], checkpoint_id: str = ""):
+        summary = summarize_state(values)
+        summary["checkpoint_id"] = checkpoint_id
+        summary["updated_at"] = datetime.now(timezone.utc).isoformat()
+
+        with self._lock:
+            self._summaries[thread_id] = summary
+
+    def get(self, thread_id: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            summary = self._summaries.get(thread_id)
+            return dict(summary) if summary else None
+
+    def discard(self, thread_id: str):
+        with self._lock:
+            self._summaries.pop(thread_id, None)
+
+
+# =================================================
+# VERSIONED STATE HISTORY
+# =================================================
+def public_values(channel_values: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    JSON-normalised copy of the state channels, without LangGraph's
+    internal ones (__start__, branch:...). Copying also detaches the
+    snapshot from lists that nodes keep mutating.
+    """
+    values = {
+        k: v for k, v in channel_values.items()
+        if not k.startswith("__") and ":" not in k
+    }
+    return json.loads(json.dumps(values, default=str))
+
+
+PatchListener = Callable[[str, int, int, Patch], None]
+
+
+class StateHistory:
+    """
+    Versioned state per thread for delta sync.
+
+    The version of a state is its checkpoint step, which only grows for a
+    thread and survives restarts. For each thread the latest snapshot is
+    kept along with the last STATE_HISTORY_LENGTH patches, so a client
+    that reports the version it holds receives just the operations since
+    then, or the full state when it is too far behind.
+    """
+
+    def __init__(self, max_patches: int = STATE_HISTORY_LENGTH):
+        self.max_patches = max_patches
+        self._snapshots: Dict[str, Dict[str, Any]] = {}
+        self._versions: Dict[str, int] = {}
+        self._checkpoint_ids: Dict[str, str] = {}
+        self._patches: Dict[str, Deque[Tuple[int, int, Patch]]] = {}
+        self._listeners: List[PatchListener] = []
+        self._lock = threading.Lock()
+
+    def add_listener(self, listener: PatchListener):
+        """listener(thread_id, from_version, version, patch) on every change"""
+        self._listeners.append(listener)
+
+    def record(self, thread_id: str, values: Dict[str, Any], version: int, checkpoint_id: str = ""):
+        snapshot = public_values(values)
+
+        with self._lock:
+            current = self._versions.get(thread_id)
+            if current is not None and version <= current:
+                return
+
+            self._checkpoint_ids[thread_id] = checkpoint_id
+            self._versions[thread_id] = version
+            previous = self._snapshots.get(thread_id)
+            self._snapshots[thread_id] = snapshot
+
+            if previous is None:
+                return
+
+            patch = make_patch(previous, snapshot)
+            patches = self._patches.setdefault(thread_id, deque(maxlen=self.max_patches))
+            patches.append((current, version, patch))
+
+        for listener in self._listeners:
+            try:
+                listener(thread_id, current, version, patch)
+            except Exception as e:
+                print(f"State patch listener failed for {thread_id}: {e}")
+
+    def checkpoint_id(self, thread_id: str) -> Optional[str]:
+        with self._lock:
+            return self._checkpoint_ids.get(thread_id)
+
+    def delta(self, thread_id: str, since_version: Optional[int] = None) -> Optional[Dict[str, Any]]:
+        """
+        {"version", "full": True, "state"} or {"version", "full": False, "patch"}.
+        None when the thread has no recorded state.
+        """
+        with self._lock:
+            if thread_id not in self._snapshots:
+                return None
+
+            version = self._versions[thread_id]
+
+            if since_version is not None:
+                if since_version == version:
+                    return {"version": version, "from_version": since_version, "full": False, "patch": []}
+
+                patch: Patch = []
+                chained = False
+                for from_version, to_version, ops in self._patches.get(thread_id, ()):
+                    if from_version == since_version:
+                        chained = True
+                    if chained:
+                        patch.extend(ops)
+
+                if chained:
+                    return {"version": version, "from_version": since_version, "full": False, "patch": patch}
+
+            return {"version": version, "full": True, "state": self._snapshots[thread_id]}
+
+    def discard(self, thread_id: str):
+        with self._lock:
+            self._snapshots.pop(thread_id, None)
+            self._versions.pop(thread_id, None)
+            self._checkpoint_ids.pop(thread_id, None)
+            self._patches.pop(thread_id, None)
+
+
+# =================================================
+# CHECKPOINTER WITH WRITE HOOKS
+# =================================================
+CheckpointHook = Callable[[str, Dict[str, Any], Dict[str, Any]], None]
+
+
+class CheckpointHooks:
+    """
+    Mixin for savers: notifies hooks with (thread_id, checkpoint, metadata)
+    after each checkpoint is persisted.
+    """
+
+    def add_hook(self, hook: CheckpointHook):
+        self.hooks.append(hook)
+
+    def run_hooks(self, config, checkpoint, metadata):
+        thread_id = config["configurable"]["thread_id"]
+        for hook in self.hooks:
+            try:
+                hook(thread_id, checkpoint, metadata)
+            except Exception as e:
+                print(f"Checkpoint hook failed for {thread_id}: {e}")
+
+
+class ProjectingSqliteSaver(CheckpointHooks, SqliteSaver):
+    """SqliteSaver that runs checkpoint hooks after each write."""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.hooks: List[CheckpointHook] = []
+
+    def put(self, config, checkpoint, metadata, new_versions):
+        result = super().put(config, checkpoint, metadata, new_versions)
+        self.run_hooks(config, checkpoint, metadata)
+        return result
+
+
+def projection_hook(projection: StateProjection) -> CheckpointHook:
+    def hook(thread_id: str, checkpoint: Dict[str, Any], metadata: Dict[str, Any]):
+        projection.update(thread_id, checkpoint.get("channel_values", {}), checkpoint.get("id", ""))
+    return hook
+
+
+def history_hook(history: StateHistory) -> CheckpointHook:
+    def hook(thread_id: str, checkpoint: Dict[str, Any], metadata: Dict[str, Any]):
+        step = (metadata or {}).get("step")
+        if step is None:
+            return
+        history.record(thread_id, checkpoint.get("channel_values", {}), step, checkpoint.get("id", ""))
+    return hook
@@ -0,0 +1,80 @@
+import threading
+from datetime import datetime, timedelta
+from zoneinfo import ZoneInfo
+
+from calendar_client import CALENDAR_TIMEZONE, FakeCalendarService, create_calendar_client
+
+
+def fake_client(busy=None, batch_window=0.25):
+    service = FakeCalendarService(busy=busy)
+    client = create_calendar_client("fake")
+    client.service_factory = lambda creds: service
+    client.batch_window = batch_window
+    return client, service
+
+
+def next_friday():
+    """Local date of the next Friday after today (within the cached window)"""
+    day = datetime.now(ZoneInfo(CALENDAR_TIMEZONE)).date() + timedelta(days=1)
+    while day.weekday() != 4:
+        day += timedelta(days=1)
+    return day
+
+
+def test_concurrent_create_event_calls_share_one_batch():
+    client, service = fake_client(batch_window=0.5)
+    start = datetime(2030, 1, 7, 10, 0)
+    barrier = threading.Barrier(5)
+    created = []
+
+    def book(i):
+        event = client.meeting_event(f"Company {i}", f"lead{i}@example.com", start + timedelta(hours=i))
+        barrier.wait()
+        created.append(client.create_event(event, timeout=5))
+
+    threads = [threading.Thread(target=book, args=(i,)) for i in range(5)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    client.stop()
+
+    assert len(created) == 5
+    assert len({e["id"] for e in created}) == 5
+    assert service.batches == 1
+    assert client.stats()["events_created"] == 5
+
+
+def test_suggest_slots_skips_busy_intervals_and_weekends():
+    friday = next_friday()
+    monday = friday + timedelta(days=3)
+    client, service = fake_client(busy=[
+        (f"{friday} 17:00:00", f"{friday} 18:00:00"),
+        (f"{monday} 09:00:00", f"{monday} 10:00:00"),
+    ])
+    # Cover the Monday after the Friday
+    client.refresh_free_busy(days=14)
+
+    after = datetime.combine(friday, datetime.min.time()).replace(hour=17, tzinfo=client.tz)
+    slots = client.suggest_slots(count=2, minutes=30, after=after)
+    client.stop()
+
+    assert slots == [f"{monday} 10:00", f"{monday} 10:30"]
+    assert service.freebusy_queries == 1
+
+
+def test_booked_meeting_is_busy_without_another_freebusy_query():
+    client, service = fake_client(batch_window=0)
+    friday = next_friday()
+    client.refresh_free_busy(days=14)
+
+    start = datetime.combine(friday, datetime.min.time()).replace(hour=9)
+    client.create_event(client.meeting_event("Acme", "lead@acme.test", start), timeout=5)
+
+    after = start.replace(tzinfo=client.tz)
+    slots = client.suggest_slots(count=1, minutes=30, after=after)
+    client.stop()
+
+    assert slots == [f"{friday} 09:30"]
+    assert not client.is_free(start)
+    assert service.freebusy_queries == 1
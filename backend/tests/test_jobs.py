@@ -0,0 +1,59 @@
+import threading
+
+from jobs import JOB_CANCELLED, JOB_RUNNING, JOB_SUCCEEDED, JobManager
+
+
+def wait_for(predicate, timeout=5.0):
+    done = threading.Event()
+    for _ in range(int(timeout / 0.01)):
+        if predicate():
+            return True
+        done.wait(0.01)
+    return predicate()
+
+
+def test_on_done_runs_for_a_job_cancelled_while_queued():
+    manager = JobManager(max_workers=1)
+    release = threading.Event()
+    finished = []
+
+    running = manager.submit("run", "thread-1", lambda should_cancel: release.wait(5),
+                             on_done=lambda job: finished.append(job["status"]))
+    # Same thread: waits until the running job is done
+    queued = manager.submit("run", "thread-1", lambda should_cancel: "never",
+                            on_done=lambda job: finished.append(job["status"]))
+
+    assert manager.cancel(queued["job_id"])
+    assert finished == [JOB_CANCELLED]
+
+    release.set()
+    assert wait_for(lambda: len(finished) == 2)
+    assert finished == [JOB_CANCELLED, JOB_SUCCEEDED]
+    assert manager.get(running["job_id"])["status"] == JOB_SUCCEEDED
+    manager.shutdown()
+
+
+def test_history_trim_skips_unfinished_jobs(monkeypatch):
+    monkeypatch.setattr("jobs.JOB_HISTORY_LIMIT", 3)
+    manager = JobManager(max_workers=2)
+    release = threading.Event()
+
+    # The oldest job is still running while later ones finish
+    stuck = manager.submit("run", "thread-stuck", lambda should_cancel: release.wait(5))
+    done = []
+    for i in range(3):
+        finished = threading.Event()
+        job = manager.submit("run", f"thread-{i}", lambda should_cancel: None,
+                             on_done=lambda job, finished=finished: finished.set())
+        done.append(job["job_id"])
+        assert finished.wait(5)
+
+    # One more submission trims the history around the stuck job
+    manager.submit("run", "thread-last", lambda should_cancel: None)
+
+    assert manager.get(stuck["job_id"])["status"] == JOB_RUNNING
+    assert len(manager.list()) == 3
+    assert manager.get(done[0]) is None
+    assert manager.get(done[1]) is None
+    release.set()
+    manager.shutdown()
@@ -0,0 +1,50 @@
+from lazy import Lazy
+
+
+class Store:
+    def __init__(self):
+        self.items = {"a": 1}
+        self.loaded = "own attribute"
+
+    def get(self, key):
+        return self.items.get(key)
+
+    def set(self, key, value):
+        self.items[key] = value
+
+
+def test_get_and_set_reach_the_wrapped_object():
+    store = Lazy(Store, "store")
+
+    store.set("b", 2)
+
+    assert store.get("a") == 1
+    assert store.get("b") == 2
+    assert store.loaded == "own attribute"
+
+
+def test_factory_runs_once_on_first_use():
+    calls = []
+
+    def factory():
+        calls.append(1)
+        return Store()
+
+    store = Lazy(factory, "store")
+    assert not store._loaded
+    assert calls == []
+
+    store.get("a")
+    store.get("a")
+    assert store._loaded
+    assert calls == [1]
+
+
+def test_override_replaces_the_factory():
+    store = Lazy(lambda: (_ for _ in ()).throw(AssertionError("factory ran")), "store")
+    configured = Store()
+
+    store._override(configured)
+
+    assert store._resolve() is configured
+    assert store.get("a") == 1
@@ -0,0 +1,85 @@
+import pytest
+
+from model_router import FakeChatModel, ModelRouter, create_model_router
+from resilience import Provider
+
+
+class Draft:
+    """Minimal structured-output schema (the fields FakeChatModel fills)"""
+    model_fields = {"text": None}
+
+    def __init__(self, text):
+        self.text = text
+
+
+TIERS = {
+    "fast": {"models": ["fast-a", "fast-b"], "timeout": 5, "max_input_chars": 20, "overflow_tier": "large"},
+    "large": {"models": ["large-a"], "timeout": 5, "max_input_chars": None, "overflow_tier": None},
+}
+TASKS = {"summary": {"tier": "fast", "concurrency": 2}}
+
+
+def make_router(failing=()):
+    models = {}
+
+    def factory(model_name, timeout):
+        error = RuntimeError(f"{model_name} is down") if model_name in failing else None
+        models[model_name] = FakeChatModel(model_name, reply=lambda text, m=model_name: m, error=error)
+        return models[model_name]
+
+    provider = Provider("test-llm", rate=100, burst=100, timeout=5, failure_threshold=100, reset_seconds=1)
+    router = ModelRouter(factory=factory, provider=provider, tiers=TIERS, tasks=TASKS)
+    return router, models
+
+
+def test_short_input_uses_the_task_tier():
+    router, _ = make_router()
+    model = router.for_task("summary").with_structured_output(Draft)
+
+    assert model.invoke("short").text == "fast-a"
+    assert router.stats()["tasks"]["summary"]["overflow"] == 0
+
+
+def test_long_input_overflows_to_the_next_tier():
+    router, _ = make_router()
+    model = router.for_task("summary").with_structured_output(Draft)
+
+    assert model.invoke("x" * 100).text == "large-a"
+    assert router.stats()["tasks"]["summary"]["overflow"] == 1
+
+
+def test_falls_back_to_the_next_model_on_error():
+    router, models = make_router(failing={"fast-a"})
+    model = router.for_task("summary").with_structured_output(Draft)
+
+    assert model.invoke("short").text == "fast-b"
+    assert len(models["fast-a"].calls) == 1
+    stats = router.stats()
+    assert stats["tasks"]["summary"]["fallbacks"] == 1
+    assert stats["models"] == {"fast-b": 1}
+
+
+def test_raises_the_last_error_when_every_model_fails():
+    router, _ = make_router(failing={"fast-a", "fast-b"})
+    model = router.for_task("summary").with_structured_output(Draft)
+
+    with pytest.raises(RuntimeError, match="fast-b is down"):
+        model.invoke("short")
+    assert router.stats()["tasks"]["summary"]["failures"] == 1
+
+
+def test_batch_routes_each_input_on_its_own():
+    router, _ = make_router()
+    model = router.for_task("summary").with_structured_output(Draft)
+
+    results = model.batch(["short", "y" * 100, "tiny"])
+
+    assert [r.text for r in results] == ["fast-a", "large-a", "fast-a"]
+
+
+def test_fake_backend_builds_every_task_without_an_api_key():
+    router = create_model_router("fake")
+
+    for task in router.tasks:
+        result = router.for_task(task).with_structured_output(Draft).invoke("hello")
+        assert result.text.startswith("Response from ")
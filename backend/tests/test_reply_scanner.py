@@ -0,0 +1,142 @@
+from datetime import datetime, timezone
+
+from reply_scanner import ReplyScanner
+
+CONFIG = {"host": "imap.test", "username": "me@test", "password": "secret"}
+
+
+class FakeImapServer:
+    """
+    One mailbox with UIDs and a UIDVALIDITY, answering the commands the
+    scanner sends. `connect` is passed to ReplyScanner as its factory.
+    """
+
+    def __init__(self, uidvalidity=1):
+        self.uidvalidity = uidvalidity
+        self.messages = {}
+        self.uidnext = 1
+        self.fetches = []
+        self.sessions = 0
+
+    def deliver(self, in_reply_to=None, date=None):
+        uid = self.uidnext
+        self.uidnext += 1
+        header = f"In-Reply-To: {in_reply_to}\r\n\r\n" if in_reply_to else "Subject: hello\r\n\r\n"
+        self.messages[uid] = (header.encode(), date or datetime.now(timezone.utc))
+        return uid
+
+    def connect(self, config):
+        self.sessions += 1
+        return FakeImapSession(self)
+
+
+class FakeImapSession:
+    def __init__(self, server):
+        self.server = server
+
+    def login(self, username, password):
+        return "OK", [b"Logged in"]
+
+    def select(self, mailbox, readonly=False):
+        return "OK", [str(len(self.server.messages)).encode()]
+
+    def response(self, code):
+        return code, [str(self.server.uidvalidity).encode()]
+
+    def status(self, mailbox, items):
+        return "OK", [f"{mailbox} (UIDNEXT {self.server.uidnext})".encode()]
+
+    def logout(self):
+        return "BYE", []
+
+    def uid(self, command, *args):
+        if command == "SEARCH":
+            since = datetime.strptime(args[1].split()[1], "%d-%b-%Y").date()
+            uids = [str(u).encode() for u, (_, date) in sorted(self.server.messages.items()) if date.date() >= since]
+            return "OK", [b" ".join(uids)]
+
+        uid_set = args[0]
+        self.server.fetches.append(uid_set)
+        return "OK", [
+            (f"{uid} (UID {uid} BODY[HEADER.FIELDS (IN-REPLY-TO REFERENCES)] {{0}}".encode(), header)
+            for uid, header in self._select(uid_set)
+        ]
+
+    def _select(self, uid_set):
+        messages = self.server.messages
+        if uid_set.endswith(":*"):
+            first = int(uid_set[:-2])
+            uids = [u for u in sorted(messages) if u >= first]
+            # Like a real server, "N:*" always includes the newest message
+            if not uids and messages:
+                uids = [max(messages)]
+        else:
+            uids = [int(u) for u in uid_set.split(",")]
+        return [(uid, messages[uid][0]) for uid in uids]
+
+
+def test_poll_fetches_only_messages_after_the_last_uid():
+    server = FakeImapServer()
+    server.deliver()
+    server.deliver()
+    scanner = ReplyScanner(CONFIG, connect=server.connect)
+    scanner.watch("<sent-1@test>", "thread-1")
+
+    assert scanner.poll() == {}
+
+    server.deliver(in_reply_to="<sent-1@test>")
+    assert scanner.poll() == {"<sent-1@test>": "thread-1"}
+    assert server.fetches[-1] == "3:*"
+    assert scanner.take_replies("thread-1") == {"<sent-1@test>"}
+
+    # Nothing new: only the newest message comes back, and it is not reported twice
+    assert scanner.poll() == {}
+    assert server.fetches[-1] == "4:*"
+    assert scanner.take_replies("thread-1") == set()
+    assert server.sessions == 1
+
+
+def test_reply_already_in_the_mailbox_is_found_on_first_poll():
+    server = FakeImapServer()
+    server.deliver(in_reply_to="<sent-1@test>")
+    server.deliver()
+    scanner = ReplyScanner(CONFIG, connect=server.connect)
+    scanner.watch("<sent-1@test>", "thread-1")
+
+    assert scanner.poll() == {"<sent-1@test>": "thread-1"}
+
+
+def test_uidvalidity_reset_rescans_from_the_earliest_send():
+    server = FakeImapServer()
+    for _ in range(3):
+        server.deliver()
+    scanner = ReplyScanner(CONFIG, connect=server.connect)
+    scanner.watch("<sent-1@test>", "thread-1")
+    assert scanner.poll() == {}
+
+    # While disconnected the mailbox is rebuilt under a new UIDVALIDITY;
+    # the reply gets a UID below the old cursor (3)
+    scanner.close()
+    server.uidvalidity += 1
+    server.messages = {}
+    server.uidnext = 1
+    server.deliver(in_reply_to="<sent-1@test>")
+    server.deliver()
+
+    assert scanner.poll() == {"<sent-1@test>": "thread-1"}
+    assert server.sessions == 2
+
+
+def test_unwatched_messages_are_ignored():
+    server = FakeImapServer()
+    scanner = ReplyScanner(CONFIG, connect=server.connect)
+    scanner.watch("<sent-1@test>", "thread-1")
+    assert scanner.poll() == {}
+
+    server.deliver(in_reply_to="<someone-else@test>")
+    assert scanner.poll() == {}
+
+    scanner.unwatch("<sent-1@test>")
+    server.deliver(in_reply_to="<sent-1@test>")
+    # Nothing watched: no IMAP round trip at all
+    assert scanner.poll() == {}
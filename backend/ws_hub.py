@@ -0,0 +1,182 @@
+import asyncio
+from collections import deque
+from datetime import datetime, timezone
+from typing import Any, Deque, Dict, Optional, Set
+
+from fastapi import WebSocket
+
+# =================================================
+# CONSTANTS
+# =================================================
+WS_QUEUE_SIZE = 64
+WS_SEND_TIMEOUT_SECONDS = 10
+WS_HEARTBEAT_SECONDS = 30
+# Close code sent to an evicted client ("try again later"), so it reconnects
+WS_EVICT_CLOSE_CODE = 1013
+
+# Only the newest message of these types matters to a client, so a queued
+# one is replaced instead of adding another
+COALESCE_TYPES = {"ping", "campaign_updated", "node_completed"}
+
+
+# =================================================
+# CLIENT CONNECTION
+# =================================================
+class ClientConnection:
+    """
+    One WebSocket with its own bounded send queue and sender task.
+    When the queue is full the oldest message is dropped.
+    """
+
+    def __init__(self, hub: "ConnectionHub", websocket: WebSocket, thread_id: str):
+        self.hub = hub
+        self.websocket = websocket
+        self.thread_id = thread_id
+
+        self._queue: Deque[Dict[str, Any]] = deque()
+        self._ready = asyncio.Event()
+        self._task: Optional[asyncio.Task] = None
+        self.dropped = 0
+        self.closed = False
+
+    def start(self):
+        self._task = asyncio.create_task(self._send_loop())
+
+    def offer(self, message: Dict[str, Any]):
+        if self.closed:
+            return
+
+        msg_type = message.get("type")
+        if msg_type in COALESCE_TYPES:
+            for i, queued in enumerate(self._queue):
+                if queued.get("type") == msg_type:
+                    self._queue[i] = message
+                    return
+
+        if len(self._queue) >= WS_QUEUE_SIZE:
+            self._queue.popleft()
+            self.dropped += 1
+
+        self._queue.append(message)
+        self._ready.set()
+
+    async def _send_loop(self):
+        try:
+            while not self.closed:
+                await self._ready.wait()
+                self._ready.clear()
+
+                while self._queue and not self.closed:
+                    message = self._queue.popleft()
+                    await asyncio.wait_for(
+                        self.websocket.send_json(message),
+                        timeout=WS_SEND_TIMEOUT_SECONDS
+                    )
+        except asyncio.CancelledError:
+            raise
+        except Exception:
+            # Slow or dead client: evict it without affecting others
+            await self.evict()
+
+    async def evict(self):
+        """Drop the connection from the hub and close its socket"""
+        self.hub.disconnect(self)
+        try:
+            await asyncio.wait_for(
+                self.websocket.close(code=WS_EVICT_CLOSE_CODE),
+                timeout=WS_SEND_TIMEOUT_SECONDS
+            )
+        except Exception:
+            pass
+
+    def close(self):
+        self.closed = True
+        self._queue.clear()
+        if self._task and self._task is not asyncio.current_task():
+            self._task.cancel()
+
+
+# =================================================
+# CONNECTION HUB
+# =================================================
+class ConnectionHub:
+    """
+    Fans campaign events out to WebSocket subscribers.
+
+    publish() never awaits a socket: it only enqueues, and each connection
+    drains its own queue concurrently. A single heartbeat task pings every
+    connection, and any connection whose send fails or times out is evicted.
+    """
+
+    def __init__(self, heartbeat_seconds: float = WS_HEARTBEAT_SECONDS):
+        self.heartbeat_seconds = heartbeat_seconds
+        self._connections: Dict[str, Set[ClientConnection]] = {}
+        self._heartbeat: Optional[asyncio.Task] = None
+        self.closed_connections = 0
+
+    # ---------------------------------------------
+    # Lifecycle
+    # ---------------------------------------------
+    def start(self):
+        if self._heartbeat is None or self._heartbeat.done():
+            self._heartbeat = asyncio.create_task(self._heartbeat_loop())
+
+    async def stop(self):
+        if self._heartbeat:
+            self._heartbeat.cancel()
+        for conns in list(self._connections.values()):
+            for conn in list(conns):
+                self.disconnect(conn)
+                try:
+                    await conn.websocket.close()
+                except Exception:
+                    pass
+
+    async def _heartbeat_loop(self):
+        while True:
+            await asyncio.sleep(self.heartbeat_seconds)
+            ping = {"type": "ping", "timestamp": datetime.now(timezone.utc).isoformat()}
+            for conns in list(self._connections.values()):
+                for conn in list(conns):
+                    conn.offer(ping)
+
+    # ---------------------------------------------
+    # Connections
+    # ---------------------------------------------
+    async def connect(self, websocket: WebSocket, thread_id: str) -> ClientConnection:
+        await websocket.accept()
+        conn = ClientConnection(self, websocket, thread_id)
+        self._connections.setdefault(thread_id, set()).add(conn)
+        conn.start()
+        return conn
+
+    def disconnect(self, conn: ClientConnection):
+        if conn.closed:
+            return
+        conn.close()
+
+        conns = self._connections.get(conn.thread_id)
+        if conns is None:
+            return
+        if conn in conns:
+            conns.discard(conn)
+            self.closed_connections += 1
+        if not conns:
+            del self._connections[conn.thread_id]
+
+    # ---------------------------------------------
+    # Fan-out
+    # ---------------------------------------------
+    def publish(self, thread_id: str, message: Dict[str, Any]):
+        for conn in list(self._connections.get(thread_id, ())):
+            conn.offer(message)
+
+    def stats(self) -> Dict[str, Any]:
+        conns = [c for cs in self._connections.values() for c in cs]
+        return {
+            "threads": len(self._connections),
+            "connections": len(conns),
+            "queued_messages": sum(len(c._queue) for c in conns),
+            "dropped_messages": sum(c.dropped for c in conns),
+            "closed_connections": self.closed_connections
+        }
@@ -1,6 +1,6 @@
-import React, { useState, useEffect } from 'react';
+import React, { useState, useEffect, useRef } from 'react';
 import { useParams, useNavigate } from 'react-router-dom';
-import { campaignAPI, WebSocketService } from '../services/api';
+import { campaignAPI, WebSocketService, applyPatch } from '../services/api';
 import LeadCard from '../components/LeadCard';
 import EmailPreview from '../components/EmailPreview';
 import './CampaignView.css';
@@ -19,6 +19,10 @@ const CampaignView = () => {
   const [showEmailApproval, setShowEmailApproval] = useState(false);
   const [wsService, setWsService] = useState(null);
 
+  // Latest campaign state and its version, kept current by state patches
+  const stateRef = useRef({ version: null, state: null });
+  const serviceRef = useRef(null);
+
   useEffect(() => {
     fetchCampaignData();
     setupWebSocket();
@@ -39,9 +43,23 @@ const CampaignView = () => {
       console.log('Connected to campaign updates');
     });
     
+    serviceRef.current = service;
     setWsService(service);
   };
 
+  const updateState = (state, version) => {
+    stateRef.current = { version, state };
+    setCampaign(prev => prev && { ...prev, current_state: state, state_version: version });
+    if (state?.human_decision?.send_first_email !== undefined) {
+      setShowEmailApproval(false);
+    }
+  };
+
+  const requestSync = () => {
+    // Missed a patch: ask for the changes since the version we have
+    serviceRef.current?.send({ type: 'sync', since_version: stateRef.current.version });
+  };
+
   const handleWebSocketMessage = (data) => {
     console.log('WebSocket update:', data);
     
@@ -51,6 +69,24 @@ const CampaignView = () => {
         data.type === 'meeting_scheduled') {
       fetchCampaignData();
     }
+
+    const current = stateRef.current;
+    if (data.type === 'state_patch') {
+      if (current.state === null) {
+        return;
+      }
+      if (data.from_version === current.version) {
+        updateState(applyPatch(current.state, data.patch), data.version);
+      } else if (data.version !== current.version) {
+        requestSync();
+      }
+    } else if (data.type === 'state_sync') {
+      if (data.full) {
+        updateState(data.state, data.version);
+      } else if (current.state !== null && data.from_version === current.version) {
+        updateState(applyPatch(current.state, data.patch), data.version);
+      }
+    }
   };
 
   const fetchCampaignData = async () => {
@@ -60,6 +96,7 @@ const CampaignView = () => {
       // Get campaign status
       const status = await campaignAPI.getCampaignStatus(threadId);
       setCampaign(status);
+      stateRef.current = { version: status.state_version ?? null, state: status.current_state ?? null };
       setPhase(status.phase || '');
       
       // Get leads
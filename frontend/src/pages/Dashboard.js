@@ -3,6 +3,13 @@ import { Link } from 'react-router-dom';
 import { campaignAPI } from '../services/api';
 import './Dashboard.css';
 
+// Registry phase -> badge label and style
+const PHASES = {
+  campaign: { label: 'In Progress', className: 'active' },
+  monitor: { label: 'Monitoring', className: 'active' },
+  archived: { label: 'Archived', className: 'completed' }
+};
+
 const Dashboard = () => {
   const [threads, setThreads] = useState([]);
   const [loading, setLoading] = useState(true);
@@ -125,19 +132,19 @@ const Dashboard = () => {
         ) : (
           <div className="campaigns-grid">
             {threads.map((thread) => (
-              <div key={thread.id} className="campaign-card">
+              <div key={thread.thread_id} className="campaign-card">
                 <div className="campaign-card-header">
-                  <h3>{thread.name || 'Untitled Campaign'}</h3>
-                  <span className={`status-badge status-${thread.status}`}>
-                    {thread.status || 'unknown'}
+                  <h3>{thread.query || 'Untitled Campaign'}</h3>
+                  <span className={`status-badge status-${(PHASES[thread.phase] || {}).className || thread.phase}`}>
+                    {(PHASES[thread.phase] || {}).label || thread.phase || 'unknown'}
                   </span>
                 </div>
                 
                 <div className="campaign-card-body">
                   <div className="campaign-info">
                     <div className="info-item">
-                      <span className="info-label">Query:</span>
-                      <span className="info-value">{thread.query || 'N/A'}</span>
+                      <span className="info-label">Mode:</span>
+                      <span className="info-value">{thread.mode || 'N/A'}</span>
                     </div>
                     <div className="info-item">
                       <span className="info-label">Leads Found:</span>
@@ -155,13 +162,13 @@ const Dashboard = () => {
                   
                   <div className="campaign-actions">
                     <Link 
-                      to={`/campaign/${thread.id}`} 
+                      to={`/campaign/${thread.thread_id}`} 
                       className="btn btn-secondary btn-sm"
                     >
                       View Details
                     </Link>
                     <Link 
-                      to={`/monitoring/${thread.id}`} 
+                      to={`/monitoring/${thread.thread_id}`} 
                       className="btn btn-primary btn-sm"
                     >
                       Monitor
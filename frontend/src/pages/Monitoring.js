@@ -107,6 +107,7 @@ const Monitoring = () => {
       case 'active': return '#3498db';
       case 'replied': return '#2ecc71';
       case 'meeting_created': return '#9b59b6';
+      case 'declined': return '#e67e22';
       case 'expired': return '#95a5a6';
       default: return '#7f8c8d';
     }
@@ -117,6 +118,7 @@ const Monitoring = () => {
       'active': '⏳ Monitoring',
       'replied': '✅ Reply Received',
       'meeting_created': '📅 Meeting Scheduled',
+      'declined': '🚫 Meeting Declined',
       'expired': '⌛️ Expired'
     };
     return labels[status] || status;
@@ -73,6 +73,44 @@ export const campaignAPI = {
   },
 };
 
+// Apply a JSON patch (add / remove / replace, as sent in state_patch
+// and state_sync messages) to a copy of doc and return the copy
+export const applyPatch = (doc, patch) => {
+  let result = structuredClone(doc);
+  const unescape = (token) => token.replace(/~1/g, '/').replace(/~0/g, '~');
+
+  for (const op of patch) {
+    if (op.path === '') {
+      result = op.op === 'remove' ? null : op.value;
+      continue;
+    }
+
+    const tokens = op.path.split('/').slice(1).map(unescape);
+    const last = tokens.pop();
+    let parent = result;
+    for (const token of tokens) {
+      parent = Array.isArray(parent) ? parent[Number(token)] : parent[token];
+    }
+
+    if (Array.isArray(parent)) {
+      const index = last === '-' ? parent.length : Number(last);
+      if (op.op === 'add') {
+        parent.splice(index, 0, op.value);
+      } else if (op.op === 'remove') {
+        parent.splice(index, 1);
+      } else {
+        parent[index] = op.value;
+      }
+    } else if (op.op === 'remove') {
+      delete parent[last];
+    } else {
+      parent[last] = op.value;
+    }
+  }
+
+  return result;
+};
+
 // WebSocket service
 export class WebSocketService {
   constructor() {